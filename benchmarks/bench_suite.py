@@ -0,0 +1,315 @@
+"""
+Benchmark the calculator's hot paths on synthetic portfolios.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes 10,1000,10000,100000] [--repeat 3]
+                                     [--save] [--baseline benchmarks/baselines.json]
+                                     [--tolerance 0.25] [--no-memory]
+
+For each portfolio size it times load_data, save_records, compute_state
+over every stock, the same in one vectorized pass (columns_from_records +
+compute_state_batch, seesaw.batch) and through the incremental state graph
+after a price tick (seesaw.calcgraph), compute_total_deployment, plot_levels rendered on an Agg canvas, and a full
+update_display-equivalent cycle (parse record, compute_state, plot_levels,
+render). Each case reports ops/sec (best of --repeat runs) and peak traced
+memory (one extra run under tracemalloc).
+
+--save writes the results as the local baseline. Otherwise results are
+compared with it and any case slower by more than --tolerance is reported
+as a regression (exit status 1). Absolute timings only mean something on
+the machine that recorded them, so the baseline is not part of the
+repository: save one first, and a baseline recorded on another machine or
+Python version is shown for reference but never fails the run.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+from matplotlib.figure import Figure  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+
+from seesaw import portfolio  # noqa: E402
+from seesaw.batch import columns_from_records, compute_state_batch  # noqa: E402
+from seesaw.calcgraph import StateGraphs  # noqa: E402
+from seesaw.chart import LevelChart  # noqa: E402
+from seesaw.state import compute_state, compute_total_deployment, parse_record  # noqa: E402
+
+DEFAULT_SIZES = (10, 1000, 10_000, 100_000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+PLOT_CALLS = 20  # plot_levels/update cycles timed per run (rendering does not depend on portfolio size)
+
+
+def synthetic_records(n, seed=0):
+    """Returns: [(name, record)] with a realistic mix of flat/held, KR/US and manual overrides."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        market = "US" if rng.random() < 0.4 else "KR"
+        rec = portfolio.default_record(market)
+        price = rng.uniform(20, 800) if market == "US" else rng.uniform(5_000, 900_000)
+        held = rng.random() < 0.6
+        rec.update(
+            avg_cost=price * rng.uniform(0.9, 1.1) if held else "",
+            num_shares=float(rng.randint(1, 400)) if held else "",
+            max_volume=1_000_000_000.0,
+            g_score=round(rng.uniform(0, 5), 1),
+            l_score=round(rng.uniform(0, 5), 1),
+            v_score=rng.choice((0.0, 0.5, 1.0, 1.5, 2.0)),
+            fx_rate=1350.0,
+            units_held=0,
+            current_price=price,
+            high_5d=price * 1.03,
+            high_10d=price * 1.06,
+            low_today=price * 0.98,
+            high_today=price * 1.01,
+            last_update="2026-10-16 15:30",
+            manual_sell_mode=int(rng.random() < 0.1),
+            manual_sell_step=2.0,
+            manual_rescue_mode=rng.choice(("AUTO", "AUTO", "AUTO", "LIGHT", "HEAVY")),
+        )
+        out.append((f"S{i:06d}", rec))
+    return out
+
+
+def install(records):
+    portfolio.stock_data.clear()
+    portfolio.stock_order.clear()
+    for name, rec in records:
+        portfolio.stock_data[name] = dict(rec)
+        portfolio.stock_order.append(name)
+    portfolio.deployment.rebuild(portfolio.stock_data, portfolio.GLOBAL_FX_RATE)
+
+
+def make_cases(n, workdir):
+    """Returns: [(case name, ops per run, setup, run)]; setup() runs untimed before each run()."""
+    records = synthetic_records(n)
+    db_path = os.path.join(workdir, f"bench_{n}.db")
+    names = [name for name, _ in records]
+    fig = Figure(figsize=(6.5, 4.0), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    chart = LevelChart(fig, canvas)
+    plot_names = names[:PLOT_CALLS]
+
+    def fresh_store():
+        # Store populated once; load_data then reads it back.
+        if os.path.exists(db_path):
+            return
+        portfolio.load_data(db_path, legacy_csv=os.path.join(workdir, "none.csv"))
+        install(records)
+        portfolio.save_records()
+
+    def run_load():
+        portfolio.load_data(db_path)
+
+    def setup_installed():
+        install(records)
+
+    def run_save():
+        portfolio.save_records()
+
+    def run_compute_state():
+        for name in names:
+            rec = portfolio.stock_data[name]
+            compute_state(parse_record(rec), rec, name)
+
+    def run_batch():
+        cols = columns_from_records(portfolio.stock_data, names, portfolio.GLOBAL_FX_RATE)
+        compute_state_batch(cols, portfolio.GLOBAL_MAX_VOLUME_KRW or 1_000_000_000.0)
+
+    graphs = StateGraphs()
+    parsed_all = {}
+
+    def setup_graph_tick():
+        # Warm graphs, then move every price so each stock sees one tick.
+        install(records)
+        for name in names:
+            rec = portfolio.stock_data[name]
+            parsed_all[name] = parse_record(rec)
+            graphs.compute(parsed_all[name], rec, name)
+            rec["current_price"] = float(rec["current_price"]) * 1.001
+
+    def run_graph_tick():
+        for name in names:
+            graphs.compute(parsed_all[name], portfolio.stock_data[name], name)
+
+    def run_deployment():
+        for name in names:
+            compute_total_deployment(name, 100.0, 10.0, 1e9, "KR", 1.0)
+
+    states = {}
+
+    def setup_plot():
+        install(records)
+        for name in plot_names:
+            rec = portfolio.stock_data[name]
+            parsed = parse_record(rec)
+            states[name] = (parsed, compute_state(parsed, rec, name))
+
+    def draw(name, parsed, data):
+        chart.plot_levels(
+            name=name,
+            market=parsed["market"],
+            avg_cost=parsed["avg_cost"],
+            units_held=parsed["units_held"],
+            current_price=data["current_price"],
+            high_context=data["high_ref"] if parsed["units_held"] <= 0 else 0.0,
+            high_context_label=data["high_ref_label"],
+            rescue_gear=data["rescue_gear"],
+            rescue_r=data["rescue_r"],
+            buy_price=data["buy_price"],
+            buy_label=data["buy_label"],
+            buy_drop_pct=data["buy_drop_pct"],
+            buy_units=data["buy_units"],
+            buy_shares=data["buy_shares"],
+            projected_avg=data["projected_avg"],
+            projected_units=data["projected_units"],
+            projected_shares=data["projected_shares"],
+            sell_targets=data["sell_targets"],
+            sell_step=data["active_step"],
+        )
+        canvas.draw()
+
+    def run_plot():
+        for name in plot_names:
+            draw(name, *states[name])
+
+    def run_cycle():
+        for name in plot_names:
+            rec = portfolio.stock_data[name]
+            parsed = parse_record(rec)
+            draw(name, parsed, compute_state(parsed, rec, name))
+
+    return [
+        ("load_data", n, fresh_store, run_load),
+        ("save_records", n, setup_installed, run_save),
+        ("compute_state", n, setup_installed, run_compute_state),
+        ("compute_state_batch", n, setup_installed, run_batch),
+        ("state_graph_tick", n, setup_graph_tick, run_graph_tick),
+        ("compute_total_deployment", n, setup_installed, run_deployment),
+        ("plot_levels", len(plot_names), setup_plot, run_plot),
+        ("update_cycle", len(plot_names), setup_installed, run_cycle),
+    ]
+
+
+def measure(ops, setup, run, repeat, memory):
+    best = None
+    for _ in range(repeat):
+        setup()
+        t0 = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    peak = None
+    if memory:
+        setup()
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {
+        "seconds": best,
+        "ops_per_sec": ops / best if best else float("inf"),
+        "peak_kib": peak / 1024 if peak is not None else None,
+    }
+
+
+def machine_id():
+    return f"{platform.node()} {platform.system()} {platform.machine()}"
+
+
+def compare(results, baseline, tolerance):
+    """Returns: list of (key, ratio) for cases slower than baseline by more than ``tolerance``."""
+    regressions = []
+    for key, res in results.items():
+        ref = baseline.get(key)
+        if not ref or not ref.get("ops_per_sec"):
+            continue
+        ratio = res["ops_per_sec"] / ref["ops_per_sec"]
+        res["vs_baseline"] = ratio
+        if ratio < 1.0 - tolerance:
+            regressions.append((key, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging (fraction)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    baseline = {}
+    gate = False
+    if not args.save:
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                saved = json.load(f)
+            baseline = saved.get("results", {})
+            gate = saved.get("python") == platform.python_version() and saved.get("machine") == machine_id()
+            if not gate:
+                print(
+                    f"note: {args.baseline} was recorded on {saved.get('machine')} / Python {saved.get('python')}; "
+                    "comparing for reference only (run with --save to record a local baseline)",
+                    file=sys.stderr,
+                )
+        else:
+            print(f"note: no baseline at {args.baseline}; run with --save to record one", file=sys.stderr)
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="seesaw-bench-")
+    try:
+        print(f"{'case':<26}{'stocks':>8}{'ops/sec':>14}{'seconds':>10}{'peak KiB':>12}{'vs base':>9}")
+        for n in sizes:
+            for name, ops, setup, run in make_cases(n, workdir):
+                key = f"{name}@{n}"
+                res = results[key] = measure(ops, setup, run, max(1, args.repeat), not args.no_memory)
+                compare({key: res}, baseline, args.tolerance)
+                peak = f"{res['peak_kib']:,.0f}" if res["peak_kib"] is not None else "-"
+                vs = f"{res['vs_baseline']:.2f}x" if "vs_baseline" in res else "-"
+                print(f"{name:<26}{n:>8}{res['ops_per_sec']:>14,.0f}{res['seconds']:>10.3f}{peak:>12}{vs:>9}", flush=True)
+    finally:
+        if portfolio.store is not None:
+            portfolio.store.close()
+            portfolio.store = None
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save:
+        payload = {
+            "python": platform.python_version(),
+            "machine": machine_id(),
+            "saved": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "results": {k: {f: v[f] for f in ("ops_per_sec", "peak_kib")} for k, v in results.items()},
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for key, ratio in regressions:
+        print(f"{'REGRESSION' if gate else 'slower'} {key}: {ratio:.2f}x of baseline ops/sec", file=sys.stderr)
+    return 1 if gate and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Benchmark the live alert path: TriggerIndex.touched and alerts.check_stocks.
+
+Usage:
+    python benchmarks/bench_triggers.py [--tickers 10000] [--ranges 1000000] [--stocks 10000] [--ticks 20]
+
+Compares TriggerIndex.touched (binary search) with testing every level of
+the ticker against each day range, times incremental level updates, and
+runs check_stocks over a synthetic portfolio the way live polling does:
+price ticks that reuse the indexed levels, and a portfolio-wide change that
+makes every stock recompute them through compute_state.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seesaw import portfolio  # noqa: E402
+from seesaw.alerts import AlertMonitor, check_stocks  # noqa: E402
+from seesaw.triggers import BUY_KINDS, TriggerIndex  # noqa: E402
+
+
+def synthetic_levels(n, seed=0):
+    rng = random.Random(seed)
+    out = {}
+    for i in range(n):
+        avg = rng.uniform(10, 500)
+        out[f"T{i}"] = {
+            "LOAD": avg * rng.uniform(0.92, 0.97),
+            "RESCUE": avg * rng.uniform(0.90, 0.96),
+            "T1": avg * rng.uniform(1.02, 1.06),
+            "T2": avg * rng.uniform(1.06, 1.12),
+        }
+    return out
+
+
+def naive_touched(levels, low, high):
+    touched = []
+    for kind, level in levels.items():
+        if kind in BUY_KINDS:
+            if low > 0 and low <= level:
+                touched.append((kind, level))
+        elif high > 0 and level <= high:
+            touched.append((kind, level))
+    return touched
+
+
+def install_portfolio(n, seed=0):
+    """Fill ``portfolio.stock_data`` with ``n`` stocks, about half of them held."""
+    rng = random.Random(seed)
+    portfolio.stock_data.clear()
+    portfolio.stock_order.clear()
+    portfolio.set_max_volume(float(n) * 50_000_000.0)
+    for i in range(n):
+        market = "US" if rng.random() < 0.4 else "KR"
+        rec = portfolio.default_record(market)
+        price = rng.uniform(20, 800) if market == "US" else rng.uniform(5_000, 900_000)
+        held = rng.random() < 0.5
+        rec.update(
+            avg_cost=price * rng.uniform(0.9, 1.1) if held else "",
+            num_shares=float(rng.randint(1, 40)) if held else "",
+            max_volume=portfolio.GLOBAL_MAX_VOLUME_KRW,
+            g_score=round(rng.uniform(0, 5), 1),
+            l_score=round(rng.uniform(0, 5), 1),
+            fx_rate=portfolio.GLOBAL_FX_RATE,
+            current_price=price,
+            high_10d=price * 1.06,
+            low_today=price * 0.98,
+            high_today=price * 1.01,
+        )
+        name = f"S{i:06d}"
+        portfolio.stock_data[name] = rec
+        portfolio.stock_order.append(name)
+    portfolio.deployment.rebuild(portfolio.stock_data, portfolio.GLOBAL_FX_RATE)
+    return list(portfolio.stock_order)
+
+
+def price_tick(rng, names):
+    for name in names:
+        rec = portfolio.stock_data[name]
+        price = rec["current_price"] * (1 + rng.gauss(0, 0.02))
+        rec.update(current_price=price, low_today=min(rec["low_today"], price), high_today=max(rec["high_today"], price))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=10_000)
+    parser.add_argument("--ranges", type=int, default=1_000_000)
+    parser.add_argument("--stocks", type=int, default=10_000)
+    parser.add_argument("--ticks", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    levels = synthetic_levels(args.tickers)
+    names = list(levels)
+    rng = random.Random(1)
+    ranges = []
+    for _ in range(args.ranges):
+        name = names[rng.randrange(len(names))]
+        mid = (levels[name]["T1"] + levels[name]["LOAD"]) / 2 * (1 + rng.gauss(0, 0.03))
+        ranges.append((name, mid * (1 - abs(rng.gauss(0, 0.02))), mid * (1 + abs(rng.gauss(0, 0.02)))))
+
+    index = TriggerIndex()
+    t0 = time.perf_counter()
+    for name, lv in levels.items():
+        index.set_levels(name, lv)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    hits_index = sum(len(index.touched(name, low, high)) for name, low, high in ranges)
+    t_index = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    hits_naive = sum(len(naive_touched(levels[name], low, high)) for name, low, high in ranges)
+    t_naive = time.perf_counter() - t0
+
+    updates = [(names[rng.randrange(len(names))], {"RESCUE": rng.uniform(10, 500), "T1": 1.0, "T2": 2.0}) for _ in range(100_000)]
+    t0 = time.perf_counter()
+    for name, lv in updates:
+        index.set_levels(name, lv)
+    t_update = time.perf_counter() - t0
+
+    # The live alert path on a synthetic portfolio.
+    stocks = install_portfolio(args.stocks)
+    monitor = AlertMonitor()
+    check_stocks(monitor, stocks)
+    t_tick = recomputed = 0
+    for _ in range(args.ticks):
+        price_tick(rng, stocks)
+        t0 = time.perf_counter()
+        check_stocks(monitor, stocks)
+        t_tick += time.perf_counter() - t0
+        recomputed += monitor.recomputed
+    price_tick(rng, stocks)
+    portfolio.set_max_volume(portfolio.GLOBAL_MAX_VOLUME_KRW * 1.1)
+    t0 = time.perf_counter()
+    check_stocks(monitor, stocks)
+    t_stale = time.perf_counter() - t0
+
+    print(f"{args.tickers} tickers x 4 levels, {args.ranges} day ranges")
+    print(f"build index          {build * 1e3:9.1f} ms")
+    print(f"touched (bisect)     {t_index / args.ranges * 1e6:9.2f} us/range   {args.ranges / t_index:12,.0f} ranges/s   {hits_index} levels")
+    print(f"scan all levels      {t_naive / args.ranges * 1e6:9.2f} us/range   {args.ranges / t_naive:12,.0f} ranges/s   {hits_naive} levels")
+    print(f"set_levels           {t_update / len(updates) * 1e6:9.2f} us/update")
+    print(f"{args.stocks} stocks, {args.ticks} price ticks")
+    print(f"check_stocks tick    {t_tick / args.ticks / len(stocks) * 1e6:9.2f} us/stock   ({recomputed} level recomputes)")
+    print(f"check_stocks stale   {t_stale / len(stocks) * 1e6:9.2f} us/stock   ({monitor.recomputed} level recomputes)")
+    if hits_index != hits_naive:
+        print("MISMATCH between index and scan", file=sys.stderr)
+        return 1
+    if recomputed:
+        print("price ticks recomputed levels", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
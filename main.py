@@ -1,775 +1,325 @@
-﻿import csv
-import os
+﻿import time
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-from math import ceil
 from datetime import datetime
+from tkinter import ttk, messagebox, simpledialog
 
 import matplotlib
+import numpy as np
 
 matplotlib.use("TkAgg")
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 
-try:
-    import yfinance as yf
-    YFINANCE_AVAILABLE = True
-except ImportError:
-    YFINANCE_AVAILABLE = False
-    print("Warning: yfinance not installed. Price fetching disabled.")
-
-
-DATA_FILE = "data.csv"
-DEFAULT_NAMES = [
-    ("Samsung", "KR"),
-    ("SK hynix", "KR"),
-    ("NVIDIA", "US"),
-    ("Alphabet", "US"),
-]
-GLOBAL_FX_RATE = 1300.0  # ₩ per $
-PORTFOLIO_N = 25  # Total units across all stocks
-LOAD_REF_DAYS = 5
-HIGH_CONTEXT_DAYS = 10
-
-RESCUE_GEAR_COLORS = {
-    1: "#ff9800",  # orange
-    2: "#d32f2f",  # red
-    3: "#8b5a2b",  # brown
-}
-
-RESCUE_U_SAT = 10.0
-RESCUE_DROP_MIN = 4.0
-RESCUE_DROP_SPAN = 2.0
-RESCUE_R_MIN = 0.5
-RESCUE_R_SPAN = 0.2
-
-# Ticker mappings for Yahoo Finance
-TICKER_MAP = {
-    "Samsung": "005930.KS",      # Samsung Electronics on KRX
-    "SK hynix": "000660.KS",     # SK hynix on KRX
-    "NVIDIA": "NVDA",            # NVIDIA on NASDAQ
-    "Alphabet": "GOOGL"          # Alphabet on NASDAQ
-}
-
-# Buy models (gear_drop %, r) - DEPRECATED, kept for backward compatibility
-# v1.4 uses dynamic LOAD/RESCUE formulas instead
-BUY_MODELS = {
-    "Agile (-5%,0.6)": {"gear_drop": 5.0, "r": 0.6},
-    "Heavy (-6%,0.7)": {"gear_drop": 6.0, "r": 0.7},
-    "Greedy (-4%,0.7)": {"gear_drop": 4.0, "r": 0.7},
-    "Cautious (-7%,0.65)": {"gear_drop": 7.0, "r": 0.65},
-}
-
-stock_data = {}
-stock_order = []
-GLOBAL_MAX_VOLUME_KRW = 0.0
-
-
-def default_record(market="KR"):
-    return {
-        "avg_cost": "",
-        "num_shares": "",
-        "max_volume": "",
-        "g_score": 0.0,
-        "l_score": 0.0,
-        "v_score": 1.0,
-        "g_date": "",
-        "l_date": "",
-        "market": market,
-        "fx_rate": GLOBAL_FX_RATE if market == "US" else 1.0,
-        # v1.4 new fields
-        "units_held": 0,  # Position size for RESCUE gear calculation
-        "current_price": "",  # Latest fetched price
-        "high_5d": "",  # 5-day high for LOAD calculation
-        "high_10d": "",  # 10-day high for context display
-        "low_today": "",  # Today's low
-        "high_today": "",  # Today's high
-        "last_update": "",  # Timestamp of last price fetch
-        "manual_sell_mode": 0,  # 0=auto, 1=manual
-        "manual_sell_step": 0.0,  # Manual override value if enabled
-        "manual_load_mode": 0,  # 0=auto, 1=manual
-        "manual_load_drop": 0.0,  # Manual load drop override (3-7%)
-        "manual_rescue_mode": "AUTO",  # AUTO/DEFAULT/HEAVY/LIGHT
-        # Deprecated fields (kept for backward compatibility)
-        "buy_model": list(BUY_MODELS.keys())[0],
-        "manual_mode": 0,
-        "manual_gear": 0.0,
-    }
-
-
-def load_data():
-    global stock_order, stock_data, GLOBAL_FX_RATE, GLOBAL_MAX_VOLUME_KRW
-    stock_data = {}
-    stock_order = []
-    GLOBAL_MAX_VOLUME_KRW = 0.0
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                name = (row.get("name") or "").strip()
-                if not name:
-                    continue
-
-                def to_float(val):
-                    try:
-                        return float(val)
-                    except (TypeError, ValueError):
-                        return ""
-
-                avg_cost = to_float(row.get("avg_cost", ""))
-                num_shares = to_float(row.get("num_shares", ""))
-                max_volume = to_float(row.get("max_volume", ""))
-                market = (row.get("market") or "KR").strip().upper()
-                if market not in ("KR", "US"):
-                    market = "KR"
-                fx_rate = to_float(row.get("fx_rate", GLOBAL_FX_RATE))
-                if fx_rate == "":
-                    fx_rate = GLOBAL_FX_RATE if market == "US" else 1.0
-                manual_mode = int(row.get("manual_mode", 0)) if str(row.get("manual_mode", "0")).isdigit() else 0
-                g_score = to_float(row.get("g_score", ""))
-                l_score = to_float(row.get("l_score", ""))
-                if g_score == "":
-                    g_score = 0.0
-                if l_score == "":
-                    l_score = 0.0
-                v_score = to_float(row.get("v_score", ""))
-                if v_score == "":
-                    v_score = 1.0
-                g_date = (row.get("g_date") or "").strip()
-                l_date = (row.get("l_date") or "").strip()
-
-                def parse_manual_gear(val):
-                    try:
-                        return float(val)
-                    except (TypeError, ValueError):
-                        pass
-                    if isinstance(val, str) and val.lower().startswith("gear"):
-                        digits = "".join(ch for ch in val if ch.isdigit())
-                        if digits:
-                            try:
-                                return float(int(digits))
-                            except ValueError:
-                                return 0.0
-                    return 0.0
-
-                manual_gear_val = parse_manual_gear(row.get("manual_gear", 0.0))
-
-                # v1.4 new fields
-                units_held = to_float(row.get("units_held", 0))
-                if units_held == "":
-                    units_held = 0
-                current_price = to_float(row.get("current_price", ""))
-                high_5d = to_float(row.get("high_5d", ""))
-                high_10d = to_float(row.get("high_10d", ""))
-                low_today = to_float(row.get("low_today", ""))
-                high_today = to_float(row.get("high_today", ""))
-                last_update = (row.get("last_update") or "").strip()
-                manual_sell_mode = int(row.get("manual_sell_mode", 0)) if str(row.get("manual_sell_mode", "0")).isdigit() else 0
-                manual_sell_step = to_float(row.get("manual_sell_step", 0.0))
-                if manual_sell_step == "":
-                    manual_sell_step = 0.0
-                manual_load_mode = int(row.get("manual_load_mode", 0)) if str(row.get("manual_load_mode", "0")).isdigit() else 0
-                manual_load_drop = to_float(row.get("manual_load_drop", 0.0))
-                if manual_load_drop == "":
-                    manual_load_drop = 0.0
-                manual_rescue_mode = (row.get("manual_rescue_mode") or "AUTO").strip().upper()
-                if manual_rescue_mode not in ("AUTO", "DEFAULT", "HEAVY", "LIGHT"):
-                    manual_rescue_mode = "AUTO"
-
-                stock_data[name] = {
-                    "avg_cost": avg_cost,
-                    "num_shares": num_shares,
-                    "max_volume": max_volume,
-                    "market": market,
-                    "fx_rate": fx_rate,
-                    "g_score": g_score,
-                    "l_score": l_score,
-                    "v_score": v_score,
-                    "g_date": g_date,
-                    "l_date": l_date,
-                    # v1.4 fields
-                    "units_held": units_held,
-                    "current_price": current_price,
-                    "high_5d": high_5d,
-                    "high_10d": high_10d,
-                    "low_today": low_today,
-                    "high_today": high_today,
-                    "last_update": last_update,
-                    "manual_sell_mode": manual_sell_mode,
-                    "manual_sell_step": manual_sell_step,
-                    "manual_load_mode": manual_load_mode,
-                    "manual_load_drop": manual_load_drop,
-                    "manual_rescue_mode": manual_rescue_mode,
-                    # Deprecated (backward compatibility)
-                    "buy_model": row.get("buy_model", list(BUY_MODELS.keys())[0]),
-                    "manual_mode": manual_mode,
-                    "manual_gear": manual_gear_val,
-                }
-                stock_order.append(name)
-                # Allow FX to be set from any row if a realistic value is present (>10 avoids overwriting with 1)
-                if fx_rate and fx_rate > 10:
-                    GLOBAL_FX_RATE = fx_rate
-                if max_volume and max_volume > 0:
-                    GLOBAL_MAX_VOLUME_KRW = max_volume
-    if not stock_order:
-        for nm, mk in DEFAULT_NAMES:
-            stock_order.append(nm)
-            stock_data[nm] = default_record(mk)
-
-    # After loading, propagate global FX to all records
-    for rec in stock_data.values():
-        rec["fx_rate"] = GLOBAL_FX_RATE
-
-
-def write_data_file():
-    fieldnames = [
-        "name",
-        "avg_cost",
-        "num_shares",
-        "max_volume",
-        "g_score",
-        "l_score",
-        "v_score",
-        "g_date",
-        "l_date",
-        "market",
-        "fx_rate",
-        # v1.4 new fields
-        "units_held",
-        "current_price",
-        "high_5d",
-        "high_10d",
-        "low_today",
-        "high_today",
-        "last_update",
-        "manual_sell_mode",
-        "manual_sell_step",
-        "manual_load_mode",
-        "manual_load_drop",
-        "manual_rescue_mode",
-        # Deprecated (backward compatibility)
-        "buy_model",
-        "manual_mode",
-        "manual_gear",
-    ]
-    with open(DATA_FILE, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for name in stock_order:
-            rec = stock_data.get(name, default_record())
-            writer.writerow(
-                {
-                    "name": name,
-                    "avg_cost": rec.get("avg_cost", ""),
-                    "num_shares": rec.get("num_shares", ""),
-                    "max_volume": rec.get("max_volume", ""),
-                    "g_score": rec.get("g_score", ""),
-                    "l_score": rec.get("l_score", ""),
-                    "v_score": rec.get("v_score", ""),
-                    "g_date": rec.get("g_date", ""),
-                    "l_date": rec.get("l_date", ""),
-                    "market": rec.get("market", "KR"),
-                    "fx_rate": rec.get("fx_rate", GLOBAL_FX_RATE if rec.get("market", "KR") == "US" else 1.0),
-                    # v1.4 fields
-                    "units_held": rec.get("units_held", 0),
-                    "current_price": rec.get("current_price", ""),
-                    "high_5d": rec.get("high_5d", ""),
-                    "high_10d": rec.get("high_10d", ""),
-                    "low_today": rec.get("low_today", ""),
-                    "high_today": rec.get("high_today", ""),
-                    "last_update": rec.get("last_update", ""),
-                    "manual_sell_mode": rec.get("manual_sell_mode", 0),
-                    "manual_sell_step": rec.get("manual_sell_step", 0.0),
-                    "manual_load_mode": rec.get("manual_load_mode", 0),
-                    "manual_load_drop": rec.get("manual_load_drop", 0.0),
-                    "manual_rescue_mode": rec.get("manual_rescue_mode", "AUTO"),
-                    # Deprecated
-                    "buy_model": rec.get("buy_model", list(BUY_MODELS.keys())[0]),
-                    "manual_mode": rec.get("manual_mode", 0),
-                    "manual_gear": rec.get("manual_gear", 0.0),
-                }
-            )
-
-
-def fmt_money(val, market="KR"):
-    try:
-        val = float(val)
-        if market == "US":
-            return f"${val:,.2f}"
-        return f"₩{val:,.0f}"
-    except (TypeError, ValueError):
-        return ""
-
-
-def fmt_or_na(val, market="KR"):
-    formatted = fmt_money(val, market)
-    return formatted if formatted else "N/A"
-
-
-def fmt_compact(val):
-    try:
-        text = f"{float(val):.2f}"
-        return text.rstrip("0").rstrip(".")
-    except (TypeError, ValueError):
-        return ""
-
-
-def compute_unit_size_krw(max_volume_krw):
-    return (max_volume_krw / PORTFOLIO_N) if max_volume_krw and PORTFOLIO_N else 0.0
-
-
-def compute_position_value_krw(avg_cost, num_shares, market, fx_rate):
-    if market == "US":
-        return avg_cost * num_shares * fx_rate
-    return avg_cost * num_shares
-
-
-def compute_units_held(avg_cost, num_shares, max_volume_krw, market, fx_rate):
-    unit_size_krw = compute_unit_size_krw(max_volume_krw)
-    position_krw = compute_position_value_krw(avg_cost, num_shares, market, fx_rate)
-    units = position_krw / unit_size_krw if unit_size_krw else 0.0
-    return units, unit_size_krw, position_krw
-
-
-def format_input(val, market="KR", is_money=True, decimals=2):
-    try:
-        val = float(val)
-        if is_money:
-            if market == "US":
-                return f"{val:,.{decimals}f}"
-            return f"{val:,.0f}"
-        return f"{val:,.{decimals}f}"
-    except (TypeError, ValueError):
-        return ""
-
-
-# ===== v1.4 CALCULATION FUNCTIONS =====
-
-def compute_load_trigger(T, V):
-    """
-    LOAD entry threshold based on trend and volatility (v1.4).
-
-    T = (3*L + 2*G) / 5 (Trend score)
-    Drop% = 6.0 - 0.6*T + 0.5*V  [clamped to 3-8%]
-
-    Returns: drop percentage (float)
-    """
-    drop_pct = 6.0 - 0.6 * T + 0.5 * V
-    drop_pct = max(3.0, min(8.0, drop_pct))
-    return drop_pct
-
-
-def compute_load_entry_price(high_5d, T, V):
-    """
-    Calculate LOAD entry price from 5-day high.
-
-    Entry price = high_5d * (1 - drop_pct/100)
-
-    Returns: entry trigger price (float)
-    """
-    drop_pct = compute_load_trigger(T, V)
-    return high_5d * (1 - drop_pct / 100)
-
-
-def round_half_up(val):
-    return int(val + 0.5)
-
-
-def get_rescue_gear(units_held, N):
-    """
-    Determine RESCUE gear based on position size (v1.3.7 smooth transmission).
-
-    Smooth ramp based on deployed units:
-      - U_sat=10.0 (or N if smaller)
-      - drop_pct = 4.0 + 2.0 * t
-      - r = 0.5 + 0.2 * t
-      - gear = 1.0 + 2.0 * t
-      - t = clamp(0, (units-1)/(U_sat-1), 1)
-
-    Returns: (drop_pct, r, gear) tuple
-    """
-    u_sat = RESCUE_U_SAT
-    if N and N > 0:
-        u_sat = min(RESCUE_U_SAT, float(N))
-    if u_sat <= 1.0:
-        t = 1.0
-    else:
-        t = (units_held - 1.0) / (u_sat - 1.0)
-    t = max(0.0, min(1.0, t))
-
-    drop_pct = RESCUE_DROP_MIN + RESCUE_DROP_SPAN * t
-    r = RESCUE_R_MIN + RESCUE_R_SPAN * t
-    gear = 1.0 + 2.0 * t
-    return drop_pct, r, gear
-
-
-def compute_rescue_trigger(avg_cost, units_held, total_units, N, drop_pct=None, r=None, gear=None):
-    """
-    RESCUE trigger price and buy quantity (v1.4).
-
-    Returns: (trigger_price, buy_units, gear, drop_pct, r) tuple
-    """
-    if units_held <= 0:
-        return avg_cost, 0, 0, 0.0, 0.0  # LOAD only when empty
-
-    if drop_pct is None or r is None:
-        drop_pct, r, gear = get_rescue_gear(units_held, N)
-    trigger_price = avg_cost * (1 - drop_pct / 100)
-
-    buy_units = units_held * r
-    if N and N > 0:
-        remaining_units = max(0.0, N - total_units)
-        buy_units = min(buy_units, remaining_units)
-
-    return trigger_price, buy_units, gear, drop_pct, r
-
-
-def compute_sell_targets_v1_4(avg_cost, s):
-    """
-    Unified 2-tier sell system (v1.4).
-
-    Tier 1: avg_cost * (1 + 1*s/100) - Sell 50%
-    Tier 2: avg_cost * (1 + 2*s/100) - Sell 50%
-
-    Returns: list of [tier1_price, tier2_price]
-    """
-    tier1 = avg_cost * (1 + 1.0 * s / 100)
-    tier2 = avg_cost * (1 + 2.0 * s / 100)
-    return [tier1, tier2]
-
-
-# ===== END v1.4 FUNCTIONS =====
-
-
-# ===== YAHOO FINANCE DATA FETCHING =====
-
-def fetch_current_price(stock_name):
-    """
-    Fetch current price and recent highs for stock from Yahoo Finance.
-
-    Returns: dict with keys:
-        'current': float - current/close price
-        'high_5d': float - highest high of past 5 days (excluding today when possible)
-        'high_10d': float - highest high of past 10 days (excluding today when possible)
-        'low_today': float - today's low
-        'high_today': float - today's high
-        'timestamp': datetime - fetch time
-    Returns None if fetch fails or yfinance not available.
-    """
-    if not YFINANCE_AVAILABLE:
-        return None
-
-    ticker = TICKER_MAP.get(stock_name)
-    if not ticker:
-        return None
-
-    try:
-        stock = yf.Ticker(ticker)
-
-        # Get recent history for highs (exclude today when possible)
-        hist_days = HIGH_CONTEXT_DAYS + 1
-        hist = stock.history(period=f"{hist_days}d")
-        if hist.empty:
-            return None
-
-        hist_completed = hist.iloc[:-1] if len(hist) > 1 else hist
-        if hist_completed.empty:
-            hist_completed = hist
-        high_10d = hist["High"].tail(HIGH_CONTEXT_DAYS).max()
-        high_5d = hist_completed["High"].tail(LOAD_REF_DAYS).max()
-
-        # Get today's data
-        today = stock.history(period="1d")
-        if today.empty:
-            return None
-
-        return {
-            'current': today['Close'].iloc[-1],
-            'high_5d': high_5d,
-            'high_10d': high_10d,
-            'low_today': today['Low'].iloc[-1],
-            'high_today': today['High'].iloc[-1],
-            'timestamp': datetime.now()
-        }
-    except Exception as e:
-        print(f"Error fetching {stock_name}: {e}")
-        return None
-
-
-def fetch_fx_rate():
-    """
-    Fetch USD/KRW exchange rate from Yahoo Finance.
-
-    Returns: float or None
-    """
-    if not YFINANCE_AVAILABLE:
-        return None
-
-    try:
-        fx = yf.Ticker("KRW=X")
-        hist = fx.history(period="1d")
-        if not hist.empty:
-            return hist['Close'].iloc[-1]
-    except Exception as e:
-        print(f"Error fetching FX rate: {e}")
-    return None
-
+from seesaw import formulas, portfolio
+from seesaw.alerts import AlertMonitor, append_alert_log, check_stocks, notify
+from seesaw.formulas import (
+    RESCUE_MODES,
+    RESCUE_PRESETS,
+    VOL_WINDOW_DAYS,
+    compute_units_held,
+    get_rescue_gear,
+)
+from seesaw.barstore import BARS_FILE, BarStore
+from seesaw.calcgraph import StateGraphs
+from seesaw.chart import LevelChart
+from seesaw.display import fmt_compact, fmt_money, fmt_or_na, format_input
+from seesaw.fxref import GREEN, RED, YELLOW
+from seesaw.ledger import BUY_TAGS, SELL_TAGS
+from seesaw.market import TICKER_MAP, YFINANCE_AVAILABLE, MarketRefresh
+from seesaw.overview import OVERVIEW_COLUMNS, OverviewCache
+from seesaw.montecarlo import (
+    GBM_SIGMA,
+    MC_HORIZON_DAYS,
+    MC_MIN_BOOTSTRAP_BARS,
+    MC_PATHS,
+    SimulationJob,
+    campaign_inputs,
+    estimate_drift_vol,
+    summarize_outcomes,
+)
+from seesaw.portfolio import (
+    BUY_MODELS,
+    add_stock,
+    apply_price_snapshot,
+    default_record,
+    deployment,
+    ensure_defaults,
+    load_data,
+    remove_stock,
+    stock_data,
+    stock_order,
+    save_records,
+)
+from seesaw.schema import KEPT, RESET, SKIPPED, format_error
+from seesaw.stocklist import LIST_COLUMNS, StockList
+from seesaw.timing import TRACE_FILE, timings
+from seesaw.volatility import update_vscores
+
+RECOMPUTE_DELAY_MS = 16  # coalesce slider/radio bursts to about one recompute per frame
+REFRESH_POLL_MS = 100  # how often the UI drains background refresh results
+MC_POLL_MS = 100  # how often the Monte Carlo window drains its worker's progress
+DIAGNOSTICS_POLL_MS = 1000
+LIVE_INTERVAL_S = 60  # default live polling period
+LIVE_MIN_INTERVAL_S = 5
+LIGHT_COLORS = {GREEN: "#2e7d32", YELLOW: "#b58900", RED: "#c62828"}
+EXPLAIN_NODES = ("load_status", "load_trigger", "buy_price", "rescue_trigger", "active_step", "sell_targets", "projected_avg")
+NAME_LIST_HEADINGS = {"#0": "Stock", "market": "Mkt", "units": "Units", "load_status": "LOAD", "distance": "To buy"}
+OVERVIEW_HEADINGS = (
+    "Mkt",
+    "Units",
+    "Current",
+    "LOAD status",
+    "Next buy",
+    "Buy price",
+    "Buy sh",
+    "To buy",
+    "RESCUE",
+    "T1",
+    "T2",
+    "To T1",
+)
 
-# ===== END YAHOO FINANCE FUNCTIONS =====
+bar_store = BarStore(BARS_FILE)
+_display_job = {"id": None}
+_refresh = {"job": None, "live": False, "fx_changed": False, "updated": [], "errors": {}, "started": 0.0}
+_live = {"after": None}
+alert_monitor = AlertMonitor()
+auto_vscores = {}  # ticker -> (bar_date, vol_pct, v_score) from the bar cache
+stock_list = StockList()
+overview = OverviewCache()
+state_graphs = StateGraphs()  # per-stock incremental compute_state for the form
+_overview = {"win": None, "tree": None, "status": None}
+_name_view = {"sort": "name", "descending": False, "shown": []}
 
 
-def refresh_market_data():
-    global GLOBAL_FX_RATE
+def refresh_market_data(live=False):
     if not YFINANCE_AVAILABLE:
         messagebox.showerror("Unavailable", "yfinance is not installed. Price fetching disabled.")
+        live_var.set(False)
+        return
+    if _refresh["job"] is not None:
         return
 
-    new_fx = fetch_fx_rate()
-    if new_fx and new_fx > 10:
-        GLOBAL_FX_RATE = new_fx
-        fx_rate_var.set(format_input(GLOBAL_FX_RATE, "KR", decimals=2))
+    job = MarketRefresh(stock_order, store=bar_store).start()
+    _refresh.update(job=job, live=live, fx_changed=False, updated=[], errors={}, started=time.time())
+    refresh_button.state(["disabled"])
+    cancel_button.state(["!disabled"])
+    refresh_progress.config(maximum=job.total, value=0)
+    refresh_status_var.set(f"Refreshing 0/{job.total}...")
+    root.after(REFRESH_POLL_MS, poll_market_refresh)
+
+
+def cancel_market_refresh():
+    if _refresh["job"] is not None:
+        _refresh["job"].cancel()
+        refresh_status_var.set("Cancelling...")
+
+
+def poll_market_refresh():
+    # Runs on the Tk thread: apply whatever the worker has delivered so far.
+    job = _refresh["job"]
+    arrived = []
+    fx_arrived = False
+    for name, result, error in job.poll():
+        if error is not None:
+            _refresh["errors"][name] = error
+        elif name == "FX":
+            if result and result > 10:
+                _refresh["fx_changed"] |= portfolio.set_fx_rate(result)
+                fx_arrived = True
+                update_fx_light()
+                fx_rate_var.set(format_input(portfolio.GLOBAL_FX_RATE, "KR", decimals=2))
+        elif name in stock_data:
+            apply_price_snapshot(name, result)
+            arrived.append(name)
+        refresh_status_var.set(f"Refreshing {job.received}/{job.total}: {name} {'failed' if error else 'ok'}")
+    if arrived:
+        _refresh["updated"].extend(arrived)
+        save_records(arrived)
+        on_records_changed(arrived)
+        if live_var.get():
+            raise_alerts(check_stocks(alert_monitor, arrived))
+    refresh_progress.config(value=job.received)
+    if arrived or fx_arrived:
+        schedule_display()
+    if not job.finished:
+        root.after(REFRESH_POLL_MS, poll_market_refresh)
+        return
 
-    for stock_name in stock_order:
-        price_data = fetch_current_price(stock_name)
-        if not price_data:
-            continue
-        rec = stock_data.get(stock_name, default_record())
-        rec["current_price"] = price_data["current"]
-        rec["high_5d"] = price_data["high_5d"]
-        rec["high_10d"] = price_data["high_10d"]
-        rec["low_today"] = price_data["low_today"]
-        rec["high_today"] = price_data["high_today"]
-        rec["last_update"] = price_data["timestamp"].strftime("%Y-%m-%d %H:%M")
-        rec["fx_rate"] = GLOBAL_FX_RATE
-        stock_data[stock_name] = rec
-
-    write_data_file()
+    _refresh["job"] = None
+    timings.record("refresh", time.time() - _refresh["started"], stocks=len(job.names), cancelled=job.cancelled)
+    update_status_bar()
+    refresh_button.state(["!disabled"])
+    cancel_button.state(["disabled"])
+    if _refresh["fx_changed"]:
+        # A new FX rate is stored on every record.
+        save_records()
+        on_records_changed()
+    refresh_auto_vscores()
     update_display()
-    messagebox.showinfo("Market data", "Prices and FX updated.")
-
-
-def compute_penalty(f):
-    if f <= 0.4:
-        return 0.0
-    return -3.0 * (f - 0.4) / 0.6
-
+    updated, errors = _refresh["updated"], _refresh["errors"]
+    summary = f"Updated {len(updated)}/{len(job.names)} stocks."
+    refresh_status_var.set(("Cancelled. " if job.cancelled else "") + summary)
+    if live_var.get() and not job.cancelled:
+        schedule_live_refresh()
+    if _refresh["live"]:
+        # Live polls report in the status line only.
+        stamp = datetime.now().strftime("%H:%M:%S")
+        refresh_status_var.set(f"Live {stamp}: {summary}" + (f" {len(errors)} failed." if errors else ""))
+        return
+    if errors:
+        failed = "\n".join(f"{name}: {msg}" for name, msg in errors.items())
+        messagebox.showwarning("Market data", f"{summary}\nNot updated:\n{failed}")
+    else:
+        messagebox.showinfo("Market data", "Prices and FX updated.")
 
-def compute_trend(g_score, l_score):
-    return (3.0 * l_score + 2.0 * g_score) / 5.0
 
+def refresh_auto_vscores():
+    # Only tickers with bars newer than their cached score are recomputed.
+    tickers = [TICKER_MAP[nm] for nm in stock_order if nm in TICKER_MAP]
+    auto_vscores.update(update_vscores(bar_store, tickers))
+    update_auto_v_label()
 
-def compute_auto_gear(g_score, l_score, f, quantize=True):
-    trend = compute_trend(g_score, l_score)
-    penalty = compute_penalty(f)
-    raw_gear = trend + penalty
-    gear = max(0.0, min(5.0, raw_gear))
-    if quantize:
-        gear = round(gear * 10.0) / 10.0
-    base_step = 1.0 + gear  # percent step for 2-tier ladder
-    return {
-        "gear": gear,
-        "trend": trend,
-        "penalty": penalty,
-        "base_step": base_step,
-        "f": f,
-    }
 
+def update_auto_v_label():
+    entry = auto_vscores.get(TICKER_MAP.get(name_var.get()))
+    if entry is None:
+        auto_v_var.set(f"Auto V: n/a (needs {VOL_WINDOW_DAYS + 1} cached bars)")
+        auto_v_button.state(["disabled"])
+        return
+    bar_date, vol_pct, v_score = entry
+    auto_v_var.set(f"Auto V: {v_score:.1f} (vol {vol_pct:.1f}%, bars to {bar_date})")
+    auto_v_button.state(["!disabled"])
+
+
+def use_auto_v():
+    # Copies the proposal into the form only; it is stored when the user saves.
+    entry = auto_vscores.get(TICKER_MAP.get(name_var.get()))
+    if entry is not None:
+        v_score_var.set(format_input(entry[2], "KR", is_money=False, decimals=2))
+        schedule_display()
+
+
+def update_fx_light():
+    # R_ref is a running aggregate, so this is O(1) and runs on every FX change.
+    light = portfolio.fx_light()
+    if light is None:
+        fx_ref_var.set("R_ref: no US fills in the ledger")
+        repatriate_label.config(text="")
+        reinforce_label.config(text="")
+        return
+    fx_ref_var.set(f"R_ref {light['r_ref']:,.2f} (FX {light['deviation_pct']:+.2f}%)")
+    repatriate_label.config(text=f"US→KR {light['repatriate']}", foreground=LIGHT_COLORS[light["repatriate"]])
+    reinforce_label.config(text=f"KR→US {light['reinforce']}", foreground=LIGHT_COLORS[light["reinforce"]])
+
+
+def update_status_bar():
+    # Last refresh wall time and its slowest request, plus the redraw cost, so a slow
+    # refresh can be pinned on the network, the compute or the redraw at a glance.
+    parts = []
+    refresh = timings.events("refresh")
+    if refresh:
+        last = refresh[-1]
+        parts.append(f"Last refresh {datetime.fromtimestamp(last.time):%H:%M:%S} took {last.seconds:.1f}s")
+        fetches = timings.events("fetch_ticker", since=last.time - last.seconds) + timings.events(
+            "fetch_fx", since=last.time - last.seconds
+        )
+        if fetches:
+            slowest = max(fetches, key=lambda e: e.seconds)
+            parts.append(f"slowest {slowest.detail.get('ticker', '?')} {slowest.seconds:.1f}s")
+    for name, label in (("compute_state", "compute"), ("canvas.draw", "draw")):
+        stats = timings.stats(name)
+        if stats:
+            parts.append(f"{label} p95 {stats['p95'] * 1000:.0f}ms")
+    status_bar_var.set(" | ".join(parts) if parts else "No timings yet")
+
+
+def open_diagnostics():
+    win = tk.Toplevel(root)
+    win.title("Diagnostics")
+    columns = ("count", "last", "p50", "p95", "max")
+    tree = ttk.Treeview(win, columns=columns, height=12)
+    tree.heading("#0", text="Section")
+    tree.column("#0", width=180)
+    for col in columns:
+        tree.heading(col, text=col if col == "count" else f"{col} (ms)")
+        tree.column(col, width=80, anchor="e")
+    tree.grid(row=0, column=0, columnspan=3, sticky="nsew", padx=8, pady=8)
+    trace_var = tk.BooleanVar(value=timings.tracing)
+
+    def toggle_trace():
+        if trace_var.get():
+            timings.start_trace(TRACE_FILE)
+        else:
+            timings.stop_trace()
 
-def compute_total_deployment(current_name, cur_avg_cost, cur_num_shares, cur_max_volume_krw, cur_market, cur_fx_rate):
-    def current_volume_krw(avg_cost, num_shares, market, fx_rate):
-        if market == "US":
-            return avg_cost * num_shares * fx_rate
-        return avg_cost * num_shares
-
-    total_current = current_volume_krw(cur_avg_cost, cur_num_shares, cur_market, cur_fx_rate)
-
-    for name, rec in stock_data.items():
-        if name == current_name:
-            continue
-        try:
-            avg = float(rec.get("avg_cost", 0) or 0)
-            shares = float(rec.get("num_shares", 0) or 0)
-            fx = float(rec.get("fx_rate", GLOBAL_FX_RATE) or 0)
-        except (TypeError, ValueError):
-            avg = shares = fx = 0.0
-        market = rec.get("market", "KR")
-        total_current += current_volume_krw(avg, shares, market, fx)
+    def clear():
+        timings.clear()
+        refresh_rows()
 
-    global_max = GLOBAL_MAX_VOLUME_KRW if GLOBAL_MAX_VOLUME_KRW else cur_max_volume_krw
-    return total_current, global_max
+    ttk.Checkbutton(win, text=f"Trace to {TRACE_FILE}", variable=trace_var, command=toggle_trace).grid(
+        row=1, column=0, sticky="w", padx=8, pady=(0, 8)
+    )
+    ttk.Button(win, text="Clear", command=clear).grid(row=1, column=2, sticky="e", padx=8, pady=(0, 8))
+    win.rowconfigure(0, weight=1)
+    win.columnconfigure(0, weight=1)
+
+    def refresh_rows():
+        if not win.winfo_exists():
+            return
+        summary = timings.summary()
+        for name in tree.get_children():
+            if name not in summary:
+                tree.delete(name)
+        for name, stats in summary.items():
+            values = (stats["count"],) + tuple(f"{stats[key] * 1000:.1f}" for key in columns[1:])
+            if tree.exists(name):
+                tree.item(name, values=values)
+            else:
+                tree.insert("", "end", iid=name, text=name, values=values)
+        win.after(DIAGNOSTICS_POLL_MS, refresh_rows)
 
+    refresh_rows()
 
-def select_load_reference(high_5d, high_10d):
-    if high_10d and high_10d > 0:
-        return high_10d, "High 10d"
-    return 0.0, "High 10d"
 
+def raise_alerts(alerts):
+    if not alerts:
+        return
+    append_alert_log(alerts)
+    for alert in alerts:
+        notify(f"AI Seesaw: {alert.name} {alert.kind}", alert.message)
+    latest = alerts[-1]
+    alert_var.set(f"{latest.time:%H:%M:%S} {latest.name}: {latest.message}")
+    root.bell()
 
-def compute_state(parsed, rec, current_name):
-    avg_cost = parsed["avg_cost"]
-    num_shares = parsed["num_shares"]
-    max_volume_krw = parsed["max_volume"]
-    market = parsed["market"]
-    fx_rate = parsed["fx_rate"]
-    g_score = parsed["g_score"]
-    l_score = parsed["l_score"]
-    v_score = parsed["v_score"]
-    units_held = parsed["units_held"]
-    unit_size_local = parsed["unit_size_local"]
-    manual_load_mode = parsed["manual_load_mode"]
-    manual_load_drop = parsed["manual_load_drop"]
-    manual_rescue_mode = parsed["manual_rescue_mode"]
 
+def live_interval_ms():
     try:
-        current_price = float(rec.get("current_price", 0) or 0)
-        high_5d = float(rec.get("high_5d", 0) or 0)
-        high_10d = float(rec.get("high_10d", 0) or 0)
-        low_today = float(rec.get("low_today", 0) or 0)
-        high_today = float(rec.get("high_today", 0) or 0)
+        seconds = float(live_interval_var.get())
     except (TypeError, ValueError):
-        current_price = high_5d = high_10d = low_today = high_today = 0.0
-    last_update = rec.get("last_update", "")
-
-    trend = compute_trend(g_score, l_score)
-    auto_load_drop_pct = compute_load_trigger(trend, v_score)
-    if manual_load_mode and manual_load_drop > 0:
-        load_drop_pct = max(3.0, min(7.0, manual_load_drop))
-        load_mode = "Manual"
-    else:
-        load_drop_pct = auto_load_drop_pct
-        load_mode = "Auto"
-    high_ref, high_ref_label = select_load_reference(high_5d, high_10d)
-    load_trigger = high_ref * (1 - load_drop_pct / 100) if high_ref else 0.0
+        seconds = LIVE_INTERVAL_S
+    return int(max(LIVE_MIN_INTERVAL_S, seconds) * 1000)
 
-    total_current, total_max = compute_total_deployment(
-        current_name, avg_cost, num_shares, max_volume_krw, market, fx_rate
-    )
-    total_u = total_current / total_max if total_max else 0.0
-    total_units = total_u * PORTFOLIO_N if PORTFOLIO_N else 0.0
-    remaining_units = max(0.0, PORTFOLIO_N - total_units) if PORTFOLIO_N else 0.0
-
-    if high_ref <= 0:
-        load_status = "Waiting for high"
-    elif units_held > 0:
-        load_status = "Blocked (units>0)"
-    elif remaining_units <= 0:
-        load_status = "Blocked (portfolio full)"
-    elif remaining_units < 1.0:
-        load_status = "Blocked (capacity<1u)"
-    else:
-        price_check = low_today if low_today > 0 else current_price
-        if price_check > 0 and load_trigger > 0 and price_check <= load_trigger:
-            load_status = "ACTIVE"
-        else:
-            load_status = "Watching"
-
-    rescue_override = None
-    rescue_label = "Auto"
-    if manual_rescue_mode != "AUTO":
-        if manual_rescue_mode == "LIGHT":
-            rescue_override = (4.0, 0.5, 1)
-            rescue_label = "Light"
-        elif manual_rescue_mode == "HEAVY":
-            rescue_override = (6.0, 0.7, 3)
-            rescue_label = "Heavy"
-        else:
-            rescue_override = (5.0, 0.6, 2)
-            rescue_label = "Default"
 
-    if rescue_override:
-        rescue_drop_pct, rescue_r, rescue_gear = rescue_override
-        rescue_trigger, rescue_qty, _, _, _ = compute_rescue_trigger(
-            avg_cost, units_held, total_units, PORTFOLIO_N, rescue_drop_pct, rescue_r, rescue_gear
-        )
-    else:
-        rescue_trigger, rescue_qty, rescue_gear, rescue_drop_pct, rescue_r = compute_rescue_trigger(
-            avg_cost, units_held, total_units, PORTFOLIO_N
-        )
+def schedule_live_refresh():
+    if _live["after"] is None:
+        _live["after"] = root.after(live_interval_ms(), run_live_refresh)
 
-    auto_gear = compute_auto_gear(g_score, l_score, total_u)
-    manual_step_val = parsed["manual_step"]
-    if parsed["manual_mode"]:
-        active_step_pct = 1.0 + max(manual_step_val, 0.0)
-        sell_mode = "Manual"
-    else:
-        active_step_pct = auto_gear["base_step"]
-        sell_mode = "Auto"
-
-    sell_targets = compute_sell_targets_v1_4(avg_cost, active_step_pct)
-
-    buy_units = 0
-    buy_price = 0.0
-    buy_drop_pct = 0.0
-    buy_r = 0.0
-    buy_gear = 0
-    buy_label = ""
-    if units_held <= 0:
-        buy_units = 1 if load_trigger > 0 and remaining_units >= 1.0 else 0
-        buy_price = load_trigger
-        buy_drop_pct = load_drop_pct
-        buy_label = "LOAD"
-    else:
-        buy_units = rescue_qty
-        buy_price = rescue_trigger
-        buy_drop_pct = rescue_drop_pct
-        buy_r = rescue_r
-        buy_gear = rescue_gear
-        if rescue_override:
-            buy_label = f"Rescue {rescue_label}"
-        else:
-            buy_label = f"G{rescue_gear:.1f}" if rescue_gear else "RESCUE"
 
-    buy_value_local = buy_units * unit_size_local if unit_size_local else 0.0
-    if buy_price and buy_units > 0 and buy_value_local > 0:
-        buy_shares = max(1, round_half_up(buy_value_local / buy_price))
-    else:
-        buy_shares = 0
-    total_shares = num_shares + buy_shares
-    projected_units = units_held + buy_units
-    projected_avg = (
-        (avg_cost * num_shares + buy_price * buy_shares) / total_shares
-        if buy_shares and total_shares
-        else 0.0
-    )
+def run_live_refresh():
+    _live["after"] = None
+    if live_var.get():
+        refresh_market_data(live=True)
 
-    return {
-        "trend": trend,
-        "load_drop_pct": load_drop_pct,
-        "load_mode": load_mode,
-        "high_5d": high_5d,
-        "high_10d": high_10d,
-        "high_ref": high_ref,
-        "high_ref_label": high_ref_label,
-        "load_trigger": load_trigger,
-        "load_status": load_status,
-        "current_price": current_price,
-        "low_today": low_today,
-        "high_today": high_today,
-        "last_update": last_update,
-        "rescue_trigger": rescue_trigger,
-        "rescue_qty": rescue_qty,
-        "rescue_gear": rescue_gear,
-        "rescue_drop_pct": rescue_drop_pct,
-        "rescue_r": rescue_r,
-        "rescue_mode": rescue_label if rescue_override else "Auto",
-        "buy_units": buy_units,
-        "buy_price": buy_price,
-        "buy_drop_pct": buy_drop_pct,
-        "buy_r": buy_r,
-        "buy_gear": buy_gear,
-        "buy_label": buy_label,
-        "buy_value_local": buy_value_local,
-        "buy_shares": buy_shares,
-        "projected_avg": projected_avg,
-        "projected_units": projected_units,
-        "projected_shares": int(total_shares) if total_shares else 0,
-        "auto_gear": auto_gear,
-        "sell_mode": sell_mode,
-        "active_step": active_step_pct,
-        "sell_targets": sell_targets,
-        "total_u": total_u,
-        "total_units": total_units,
-    }
+
+def toggle_live_mode():
+    if live_var.get():
+        if _refresh["job"] is None:
+            refresh_market_data(live=True)
+        return
+    if _live["after"] is not None:
+        root.after_cancel(_live["after"])
+        _live["after"] = None
 
 
 def parse_form_inputs():
@@ -782,9 +332,9 @@ def parse_form_inputs():
 
         avg_cost = to_float_str(avg_cost_var.get(), 0.0)
         num_shares = to_float_str(num_shares_var.get(), 0.0)
-        max_volume = to_float_str(max_volume_var.get(), GLOBAL_MAX_VOLUME_KRW or 0.0)
+        max_volume = to_float_str(max_volume_var.get(), portfolio.GLOBAL_MAX_VOLUME_KRW or 0.0)
         market = market_var.get()
-        fx_rate = to_float_str(fx_rate_var.get(), GLOBAL_FX_RATE) if market == "US" else to_float_str(fx_rate_var.get() or GLOBAL_FX_RATE, GLOBAL_FX_RATE)
+        fx_rate = to_float_str(fx_rate_var.get(), portfolio.GLOBAL_FX_RATE) if market == "US" else to_float_str(fx_rate_var.get() or portfolio.GLOBAL_FX_RATE, portfolio.GLOBAL_FX_RATE)
         g_score = to_float_str(g_score_var.get())
         l_score = to_float_str(l_score_var.get())
         v_score = to_float_str(v_score_var.get())
@@ -843,7 +393,7 @@ def fill_form_from_record(name):
     avg_cost_var.set("" if rec["avg_cost"] == "" else format_input(rec["avg_cost"], rec.get("market", "KR")))
     num_shares_var.set("" if rec["num_shares"] == "" else format_input(rec["num_shares"], rec.get("market", "KR"), is_money=False))
     max_volume_var.set("" if rec["max_volume"] == "" else format_input(rec["max_volume"], "KR"))
-    fx_rate_var.set(format_input(GLOBAL_FX_RATE, "KR", decimals=2))
+    fx_rate_var.set(format_input(portfolio.GLOBAL_FX_RATE, "KR", decimals=2))
     manual_sell_var.set(rec.get("manual_sell_mode", rec.get("manual_mode", 0)))
     try:
         manual_gear_val = float(rec.get("manual_sell_step", rec.get("manual_gear", 0.0)) or 0.0)
@@ -857,7 +407,7 @@ def fill_form_from_record(name):
         manual_load_val = 0.0
     manual_load_gear_var.set(manual_load_val)
     manual_rescue_mode = (rec.get("manual_rescue_mode", "AUTO") or "AUTO").strip().upper()
-    if manual_rescue_mode not in ("AUTO", "DEFAULT", "HEAVY", "LIGHT"):
+    if manual_rescue_mode not in RESCUE_MODES:
         manual_rescue_mode = "AUTO"
     manual_rescue_var.set(manual_rescue_mode)
     g_val = rec.get("g_score", "")
@@ -868,18 +418,114 @@ def fill_form_from_record(name):
     v_score_var.set("" if v_val == "" else format_input(v_val, "KR", is_money=False, decimals=2))
     g_date_var.set(rec.get("g_date", ""))
     l_date_var.set(rec.get("l_date", ""))
+    update_ledger_state(name)
+    update_auto_v_label()
     update_manual_state()
     update_manual_load_state()
     update_market_state()
 
 
+def update_ledger_state(name):
+    # With ledger fills the cost basis comes from the ledger and is not typed in.
+    pos = portfolio.ledger.position(name) if portfolio.ledger is not None and name else None
+    state = ["readonly"] if pos is not None and pos.fills else ["!readonly"]
+    avg_cost_entry.state(state)
+    num_shares_entry.state(state)
+    if pos is None or not pos.fills:
+        ledger_var.set("Ledger: no fills (cost basis typed in)")
+        return
+    market = stock_data.get(name, {}).get("market", "KR")
+    realized = fmt_money(pos.realized_pnl, market)
+    if market == "US":
+        realized += f" ({fmt_money(pos.realized_pnl_krw)})"
+    ledger_var.set(f"Ledger: {pos.fills} fills, Q={pos.q:g} sh, realized {realized}")
+
+
+def open_trades():
+    name = name_choice_var.get()
+    if not name or name not in stock_data:
+        messagebox.showinfo("Trades", "Select a saved stock first.")
+        return
+    market = stock_data[name].get("market", "KR")
+    win = tk.Toplevel(root)
+    win.title(f"Trades: {name}")
+    columns = ("date", "side", "tag", "price", "qty", "fx")
+    tree = ttk.Treeview(win, columns=columns, show="headings", height=12)
+    for col in columns:
+        tree.heading(col, text=col.upper() if col == "fx" else col.title())
+        tree.column(col, width=95 if col in ("date", "price") else 65, anchor="w" if col in ("date", "side", "tag") else "e")
+    tree.grid(row=0, column=0, columnspan=7, sticky="nsew", padx=8, pady=8)
+
+    def add_row(fill):
+        _, _, fill_date, side, price, qty, fx, tag = fill
+        tree.insert("", "end", values=(fill_date, side, tag, fmt_money(price, market), f"{qty:g}", f"{fx:,.2f}"))
+        tree.see(tree.get_children()[-1])
+
+    for fill in portfolio.ledger.fills(name):
+        add_row(fill)
+
+    date_var = tk.StringVar(value=datetime.now().strftime("%Y-%m-%d"))
+    side_var = tk.StringVar(value="BUY")
+    tag_var = tk.StringVar(value=BUY_TAGS[0])
+    price_var = tk.StringVar(value=format_input(stock_data[name].get("current_price") or "", market))
+    qty_var = tk.StringVar()
+    fx_var = tk.StringVar(value=format_input(portfolio.GLOBAL_FX_RATE if market == "US" else 1.0, "KR", decimals=2))
+    entry_frame = ttk.Frame(win)
+    entry_frame.grid(row=1, column=0, sticky="w", padx=8, pady=(0, 8))
+    for col, text in enumerate(("Date", "Side", "Tag", "Price", "Qty", "FX")):
+        ttk.Label(entry_frame, text=text).grid(row=0, column=col, sticky="w", padx=2)
+    ttk.Entry(entry_frame, textvariable=date_var, width=11).grid(row=1, column=0, padx=2)
+    side_box = ttk.Combobox(entry_frame, textvariable=side_var, values=("BUY", "SELL"), state="readonly", width=6)
+    side_box.grid(row=1, column=1, padx=2)
+    tag_box = ttk.Combobox(entry_frame, textvariable=tag_var, values=BUY_TAGS, state="readonly", width=8)
+    tag_box.grid(row=1, column=2, padx=2)
+    ttk.Entry(entry_frame, textvariable=price_var, width=12).grid(row=1, column=3, padx=2)
+    ttk.Entry(entry_frame, textvariable=qty_var, width=8).grid(row=1, column=4, padx=2)
+    fx_field = ttk.Entry(entry_frame, textvariable=fx_var, width=9)
+    fx_field.grid(row=1, column=5, padx=2)
+    if market != "US":
+        fx_field.state(["disabled"])
+
+    def on_side(event=None):
+        tags = BUY_TAGS if side_var.get() == "BUY" else SELL_TAGS
+        tag_box.config(values=tags)
+        tag_var.set(tags[0])
+
+    def record():
+        try:
+            price = float(price_var.get().replace(",", "").replace("$", "").replace("₩", ""))
+            qty = float(qty_var.get().replace(",", ""))
+            fx = float(fx_var.get().replace(",", "")) if market == "US" else 1.0
+            datetime.strptime(date_var.get().strip(), "%Y-%m-%d")
+        except ValueError:
+            messagebox.showerror("Trades", "Enter a YYYY-MM-DD date and numeric price, quantity and FX.", parent=win)
+            return
+        try:
+            fill = portfolio.record_fill(name, side_var.get(), price, qty, tag_var.get(), fx=fx, date=date_var.get().strip())
+        except ValueError as exc:
+            messagebox.showerror("Trades", str(exc), parent=win)
+            return
+        add_row(fill)
+        qty_var.set("")
+        update_fx_light()
+        if name_choice_var.get() == name:
+            fill_form_from_record(name)
+        on_records_changed([name])
+        update_display()
+
+    side_box.bind("<<ComboboxSelected>>", on_side)
+    ttk.Button(entry_frame, text="Record", command=record).grid(row=1, column=6, padx=(6, 2))
+    win.rowconfigure(0, weight=1)
+    win.columnconfigure(0, weight=1)
+
+
 def clear_form_fields():
     name_var.set("")
     avg_cost_var.set("")
     num_shares_var.set("")
-    units_held_var.set(f"0.00/0.00/{PORTFOLIO_N} units")
+    units_held_var.set(f"0.00/0.00/{formulas.PORTFOLIO_N} units")
     max_volume_var.set("")
-    fx_rate_var.set(format_input(GLOBAL_FX_RATE, "KR", decimals=2))
+    fx_rate_var.set(format_input(portfolio.GLOBAL_FX_RATE, "KR", decimals=2))
     market_var.set("KR")
     manual_sell_var.set(0)
     manual_gear_var.set(0.0)
@@ -891,6 +537,7 @@ def clear_form_fields():
     v_score_var.set("1.0")
     g_date_var.set("")
     l_date_var.set("")
+    update_ledger_state("")
     update_manual_state()
     update_manual_load_state()
     update_market_state()
@@ -907,28 +554,84 @@ def on_select_stock(selected=None):
 
 
 def refresh_name_list(selected=None):
-    for child in name_radio_frame.winfo_children():
-        child.destroy()
-    if not stock_order:
-        for nm, mk in DEFAULT_NAMES:
-            stock_order.append(nm)
-            stock_data[nm] = default_record(mk)
-    for nm in stock_order:
-        rec = stock_data.get(nm, default_record())
-        lbl = f"{nm} ({rec.get('market','KR')})"
-        ttk.Radiobutton(
-            name_radio_frame,
-            text=lbl,
-            value=nm,
-            variable=name_choice_var,
-            command=lambda n=nm: on_select_stock(n),
-        ).pack(anchor="w")
+    # Full rebuild, only when the whole stock set changes (startup, portfolio switch).
+    name_tree.delete(*[nm for nm in stock_list.rows if name_tree.exists(nm)])
+    stock_list.clear()
+    _name_view["shown"] = []
+    ensure_defaults()
+    update_name_rows()
     choice = selected if selected and selected in stock_order else (stock_order[0] if stock_order else "")
-    if choice:
-        name_choice_var.set(choice)
-        on_select_stock(choice)
+    select_in_list(choice)
+
+
+def format_list_row(row):
+    distance = "" if row["distance"] is None else f"{row['distance']:.1f}%"
+    return (row["market"], f"{row['units']:.2f}", row["load_status"], distance)
+
+
+def update_name_rows(names=None):
+    """Recompute the list rows of ``names`` (default: all) and update their items in place."""
+    for nm in stock_list.update(names):
+        row = stock_list.rows.get(nm)
+        if row is None:
+            if name_tree.exists(nm):
+                name_tree.delete(nm)
+        elif name_tree.exists(nm):
+            name_tree.item(nm, values=format_list_row(row))
+        else:
+            name_tree.insert("", "end", iid=nm, text=nm, values=format_list_row(row))
+    apply_name_filter()
+
+
+def apply_name_filter(*args):
+    shown = stock_list.visible(name_filter_var.get(), _name_view["sort"], _name_view["descending"])
+    if shown == _name_view["shown"]:
+        return
+    # Hidden rows are detached, not deleted, so filtering never recreates items.
+    visible = set(shown)
+    hidden = [nm for nm in stock_list.rows if nm not in visible and name_tree.exists(nm)]
+    if hidden:
+        name_tree.detach(*hidden)
+    for index, nm in enumerate(shown):
+        name_tree.move(nm, "", index)
+    _name_view["shown"] = shown
+
+
+def sort_name_list(column):
+    if _name_view["sort"] == column:
+        _name_view["descending"] = not _name_view["descending"]
     else:
+        _name_view.update(sort=column, descending=False)
+    for col, title in NAME_LIST_HEADINGS.items():
+        key = "name" if col == "#0" else col
+        arrow = (" ▼" if _name_view["descending"] else " ▲") if key == column else ""
+        name_tree.heading(col, text=title + arrow)
+    apply_name_filter()
+
+
+def select_in_list(name):
+    if not name:
+        name_choice_var.set("")
         clear_form_fields()
+        return
+    on_select_stock(name)
+    if name_tree.exists(name):
+        name_tree.selection_set(name)
+        if name in _name_view["shown"]:
+            name_tree.see(name)
+
+
+def on_records_changed(names=None):
+    """Propagate changed records (default: all) to the stock list and the overview."""
+    update_name_rows(names)
+    overview.invalidate(names)
+    update_overview()
+
+
+def on_name_tree_select(event=None):
+    selection = name_tree.selection()
+    if selection and selection[0] != name_choice_var.get():
+        on_select_stock(selection[0])
 
 
 def prompt_market_choice():
@@ -971,9 +674,9 @@ def on_add_new():
     if new_name in stock_data:
         messagebox.showerror("Duplicate name", f"'{new_name}' already exists.")
         return
-    stock_order.append(new_name)
-    stock_data[new_name] = default_record(market_choice)
-    refresh_name_list(selected=new_name)
+    add_stock(new_name, market_choice)
+    on_records_changed([new_name])
+    select_in_list(new_name)
 
 
 def on_delete_stock():
@@ -981,25 +684,36 @@ def on_delete_stock():
     if not selected:
         messagebox.showerror("No selection", "Select a stock to delete.")
         return
-    if selected in stock_data:
-        del stock_data[selected]
-    if selected in stock_order:
-        stock_order.remove(selected)
-    write_data_file()
-    next_sel = stock_order[0] if stock_order else ""
-    refresh_name_list(selected=next_sel)
+    remove_stock(selected)
+    state_graphs.discard(selected)
+    if not stock_order:
+        # The defaults are re-seeded into an empty list.
+        refresh_name_list()
+        return
+    on_records_changed([selected])
+    select_in_list(_name_view["shown"][0] if _name_view["shown"] else stock_order[0])
 
 
 def on_save():
-    global GLOBAL_FX_RATE
     parsed = parse_form_inputs()
     if parsed is None:
         return
+    try:
+        n_value = int(portfolio_n_var.get())
+    except ValueError:
+        n_value = 0
+    if n_value <= 0:
+        messagebox.showerror("Invalid N", "Portfolio N must be a whole number above 0.")
+        return
     selected = name_choice_var.get()
     if not selected:
         messagebox.showerror("No selection", "Select or add a stock before saving.")
         return
 
+    n_changed = portfolio.set_portfolio_n(n_value)
+    if n_changed:
+        # The unit size is max volume / N, so units_held has to be re-derived.
+        parsed = parse_form_inputs()
     rec = stock_data.get(selected, default_record(parsed["market"]))
     rec.update(
         {
@@ -1026,24 +740,230 @@ def on_save():
     )
     rec["buy_model"] = rec.get("buy_model", list(BUY_MODELS.keys())[0])
     stock_data[selected] = rec
-    GLOBAL_FX_RATE = parsed["fx_rate"]
-    for _, rec in stock_data.items():
-        rec["fx_rate"] = GLOBAL_FX_RATE
-    global GLOBAL_MAX_VOLUME_KRW
-    GLOBAL_MAX_VOLUME_KRW = parsed["max_volume"]
-    for _, rec in stock_data.items():
-        rec["max_volume"] = GLOBAL_MAX_VOLUME_KRW
-    fx_rate_var.set(format_input(GLOBAL_FX_RATE, "KR", decimals=2))
-    max_volume_var.set(format_input(GLOBAL_MAX_VOLUME_KRW, "KR"))
+    portfolio.apply_ledger_position(selected)
+    fx_changed = portfolio.set_fx_rate(parsed["fx_rate"])
+    deployment.update(selected, stock_data[selected])
+    volume_changed = portfolio.set_max_volume(parsed["max_volume"])
+    fx_rate_var.set(format_input(portfolio.GLOBAL_FX_RATE, "KR", decimals=2))
+    max_volume_var.set(format_input(portfolio.GLOBAL_MAX_VOLUME_KRW, "KR"))
+    update_fx_light()
     if selected not in stock_order:
         stock_order.append(selected)
 
-    write_data_file()
+    save_records(None if fx_changed or volume_changed or n_changed else [selected])
+    on_records_changed(None if fx_changed or volume_changed or n_changed else [selected])
     update_display()
     messagebox.showinfo("Saved", f"Saved data for '{selected}'.")
 
 
+def refresh_portfolio_list():
+    portfolio_combo.config(values=list(portfolio.list_portfolios()))
+    portfolio_var.set(portfolio.active_portfolio)
+    portfolio_n_var.set(str(formulas.PORTFOLIO_N))
+
+
+def on_switch_portfolio(event=None):
+    name = portfolio_var.get()
+    if name == portfolio.active_portfolio:
+        return
+    if _refresh["job"] is not None:
+        messagebox.showinfo("Portfolio", "Wait for the market refresh to finish before switching.")
+        portfolio_var.set(portfolio.active_portfolio)
+        return
+    portfolio.switch_portfolio(name)
+    show_portfolio()
+
+
+def show_portfolio():
+    # Re-read everything that depends on the active portfolio.
+    refresh_portfolio_list()
+    fx_rate_var.set(format_input(portfolio.GLOBAL_FX_RATE, "KR", decimals=2))
+    state_graphs.discard()
+    refresh_name_list()
+    reset_overview()
+    update_fx_light()
+    refresh_auto_vscores()
+
+
+def on_new_portfolio():
+    name = simpledialog.askstring("New portfolio", "Portfolio name (e.g. Pension):", parent=root)
+    if not name or not name.strip():
+        return
+    n_value = simpledialog.askinteger(
+        "New portfolio", "Portfolio N (units):", initialvalue=portfolio.DEFAULT_N, minvalue=1, parent=root
+    )
+    if n_value is None:
+        return
+    if _refresh["job"] is not None:
+        messagebox.showinfo("Portfolio", "Wait for the market refresh to finish before switching.")
+        return
+    try:
+        portfolio.create_portfolio(name, n_value)
+    except ValueError as exc:
+        messagebox.showerror("New portfolio", str(exc))
+        return
+    portfolio.switch_portfolio(name.strip())
+    show_portfolio()
+
+
+def open_portfolio_summary():
+    rows, total = portfolio.portfolio_summaries()
+    win = tk.Toplevel(root)
+    win.title("Portfolios")
+    columns = ("stocks", "N", "max_volume", "deployed", "units", "utilisation")
+    tree = ttk.Treeview(win, columns=columns, height=min(12, len(rows) + 2))
+    tree.heading("#0", text="Portfolio")
+    tree.column("#0", width=160)
+    for col, title in zip(columns, ("Stocks", "N", "Max volume", "Deployed", "Units", "Used")):
+        tree.heading(col, text=title)
+        tree.column(col, width=110 if col in ("max_volume", "deployed") else 70, anchor="e")
+    for row in rows:
+        label = row["name"] + (" (active)" if row["active"] else "")
+        if "deployed_krw" not in row:
+            tree.insert("", "end", text=label, values=("n/a",) * len(columns))
+            continue
+        tree.insert(
+            "",
+            "end",
+            text=label,
+            values=(
+                row["stocks"],
+                row["N"],
+                fmt_money(row["max_volume_krw"]),
+                fmt_money(row["deployed_krw"]),
+                f"{row['units']:.2f}",
+                f"{row['utilisation'] * 100:.1f}%",
+            ),
+        )
+    tree.insert(
+        "",
+        "end",
+        text=f"Total ({total['portfolios']})",
+        values=(
+            total["stocks"],
+            "",
+            fmt_money(total["max_volume_krw"]),
+            fmt_money(total["deployed_krw"]),
+            "",
+            f"{total['utilisation'] * 100:.1f}%",
+        ),
+    )
+    tree.grid(row=0, column=0, sticky="nsew", padx=8, pady=8)
+    ttk.Label(win, text=f"US holdings valued at {portfolio.GLOBAL_FX_RATE:,.2f} ₩/$; other portfolios as of their last save.").grid(
+        row=1, column=0, sticky="w", padx=8, pady=(0, 8)
+    )
+    win.rowconfigure(0, weight=1)
+    win.columnconfigure(0, weight=1)
+
+
+def format_overview_row(row):
+    market = row["market"]
+    price = lambda val: fmt_money(val, market) if val and val > 0 else ""
+    pct = lambda val: "" if val is None else f"{val:+.1f}%"
+    return (
+        market,
+        f"{row['units']:.2f}",
+        price(row["current_price"]),
+        row["load_status"],
+        row["buy_label"],
+        price(row["buy_price"]),
+        row["buy_shares"] or "",
+        pct(row["buy_distance"]),
+        price(row["rescue_trigger"]),
+        price(row["sell_t1"]),
+        price(row["sell_t2"]),
+        pct(row["t1_distance"]),
+    )
+
+
+def update_overview():
+    # Rows are recomputed only when dirty; the grid is patched item by item.
+    tree = _overview["tree"]
+    if tree is None:
+        return
+    with timings.timer("overview.refresh"):
+        changed = overview.refresh()
+    for nm in changed:
+        row = overview.rows.get(nm)
+        if row is None:
+            if tree.exists(nm):
+                tree.delete(nm)
+        elif tree.exists(nm):
+            tree.item(nm, values=format_overview_row(row))
+        else:
+            tree.insert("", "end", iid=nm, text=nm, values=format_overview_row(row))
+    _overview["status"].set(
+        f"{len(overview.rows)} stocks; last update recomputed {overview.recomputed}, changed {len(changed)}"
+    )
+
+
+def reset_overview():
+    # A different portfolio: nothing cached applies any more.
+    overview.rows.clear()
+    overview.invalidate()
+    if _overview["tree"] is not None:
+        _overview["tree"].delete(*_overview["tree"].get_children())
+        _overview["win"].title(f"Overview: {portfolio.active_portfolio}")
+    update_overview()
+
+
+def open_overview():
+    if _overview["win"] is not None:
+        _overview["win"].lift()
+        return
+    win = tk.Toplevel(root)
+    win.title(f"Overview: {portfolio.active_portfolio}")
+    tree = ttk.Treeview(win, columns=OVERVIEW_COLUMNS, height=20, selectmode="browse")
+    tree.heading("#0", text="Stock")
+    tree.column("#0", width=120)
+    for col, title in zip(OVERVIEW_COLUMNS, OVERVIEW_HEADINGS):
+        tree.heading(col, text=title)
+        tree.column(col, width=120 if col == "load_status" else 85, anchor="w" if col == "load_status" else "e")
+    scroll = ttk.Scrollbar(win, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=scroll.set)
+    tree.grid(row=0, column=0, sticky="nsew", padx=(8, 0), pady=8)
+    scroll.grid(row=0, column=1, sticky="ns", pady=8)
+    status = tk.StringVar()
+    ttk.Label(win, textvariable=status).grid(row=1, column=0, sticky="w", padx=8, pady=(0, 8))
+    win.rowconfigure(0, weight=1)
+    win.columnconfigure(0, weight=1)
+
+    def on_open_row(event=None):
+        selection = tree.selection()
+        if selection:
+            select_in_list(selection[0])
+
+    def on_close():
+        _overview.update(win=None, tree=None, status=None)
+        win.destroy()
+
+    tree.bind("<Double-1>", on_open_row)
+    win.protocol("WM_DELETE_WINDOW", on_close)
+    _overview.update(win=win, tree=tree, status=status)
+    # Cached rows are reused; only rows dirtied since the last view are recomputed.
+    for nm in stock_order:
+        row = overview.rows.get(nm)
+        if row is not None:
+            tree.insert("", "end", iid=nm, text=nm, values=format_overview_row(row))
+    update_overview()
+
+
+def schedule_display(*args):
+    """Queue one update_display for the next frame; repeated calls until then are merged."""
+    if _display_job["id"] is None:
+        _display_job["id"] = root.after(RECOMPUTE_DELAY_MS, _run_scheduled_display)
+
+
+def _run_scheduled_display():
+    _display_job["id"] = None
+    update_display()
+
+
 def update_display():
+    if _display_job["id"] is not None:
+        # An explicit refresh supersedes any queued one.
+        root.after_cancel(_display_job["id"])
+        _display_job["id"] = None
     parsed = parse_form_inputs()
     if parsed is None:
         return
@@ -1052,13 +972,14 @@ def update_display():
     if not current_name:
         return
     rec = stock_data.get(current_name, default_record(parsed["market"]))
-    data = compute_state(parsed, rec, current_name)
+    with timings.timer("compute_state", name=current_name):
+        data = state_graphs.compute(parsed, rec, current_name)
 
     market = parsed["market"]
     fmt_val = lambda val: fmt_or_na(val, market)
     fmt_price = lambda val: fmt_or_na(val, market) if val and val > 0 else "N/A"
     units_held_var.set(
-        f"{parsed['units_held']:.2f}/{data['total_units']:.2f}/{PORTFOLIO_N} units"
+        f"{parsed['units_held']:.2f}/{data['total_units']:.2f}/{formulas.PORTFOLIO_N} units"
     )
     show_load_context = parsed["units_held"] <= 0
     high_context = data["high_ref"] if show_load_context else 0.0
@@ -1075,17 +996,11 @@ def update_display():
         )
     else:
         if parsed["manual_rescue_mode"] != "AUTO":
-            if parsed["manual_rescue_mode"] == "LIGHT":
-                drop_pct, r, gear = 4.0, 0.5, 1
-                rescue_tag = "Rescue Light"
-            elif parsed["manual_rescue_mode"] == "HEAVY":
-                drop_pct, r, gear = 6.0, 0.7, 3
-                rescue_tag = "Rescue Heavy"
-            else:
-                drop_pct, r, gear = 5.0, 0.6, 2
-                rescue_tag = "Rescue Default"
+            preset = parsed["manual_rescue_mode"] if parsed["manual_rescue_mode"] in RESCUE_PRESETS else "DEFAULT"
+            drop_pct, r, gear = RESCUE_PRESETS[preset]
+            rescue_tag = f"Rescue {preset.title()}"
         else:
-            drop_pct, r, gear = get_rescue_gear(max(parsed["units_held"], 1.0), PORTFOLIO_N)
+            drop_pct, r, gear = get_rescue_gear(max(parsed["units_held"], 1.0), formulas.PORTFOLIO_N)
             rescue_tag = f"Rescue G{gear:.1f}"
         rescue_summary = f"{rescue_tag} (-{fmt_compact(drop_pct)}%, r={fmt_compact(r)})"
     buy_info_var.set(
@@ -1152,179 +1067,176 @@ def update_display():
 
     result_var.set("\n".join(result_lines))
 
-    plot_levels(
-        name=current_name,
-        market=market,
-        avg_cost=parsed["avg_cost"],
-        units_held=parsed["units_held"],
-        current_price=data["current_price"],
-        high_context=high_context,
-        high_context_label=high_context_label,
-        rescue_gear=data["rescue_gear"],
-        rescue_r=data["rescue_r"],
-        buy_price=data["buy_price"],
-        buy_label=data["buy_label"],
-        buy_drop_pct=data["buy_drop_pct"],
-        buy_units=data["buy_units"],
-        buy_shares=data["buy_shares"],
-        projected_avg=data["projected_avg"],
-        projected_units=data["projected_units"],
-        projected_shares=data["projected_shares"],
-        sell_targets=data["sell_targets"],
-        sell_step=data["active_step"],
-    )
+    with timings.timer("plot_levels", name=current_name):
+        level_chart.plot_levels(
+            name=current_name,
+            market=market,
+            avg_cost=parsed["avg_cost"],
+            units_held=parsed["units_held"],
+            current_price=data["current_price"],
+            high_context=high_context,
+            high_context_label=high_context_label,
+            rescue_gear=data["rescue_gear"],
+            rescue_r=data["rescue_r"],
+            buy_price=data["buy_price"],
+            buy_label=data["buy_label"],
+            buy_drop_pct=data["buy_drop_pct"],
+            buy_units=data["buy_units"],
+            buy_shares=data["buy_shares"],
+            projected_avg=data["projected_avg"],
+            projected_units=data["projected_units"],
+            projected_shares=data["projected_shares"],
+            sell_targets=data["sell_targets"],
+            sell_step=data["active_step"],
+        )
 
 
 def on_show():
     update_display()
 
 
-def plot_levels(
-    name,
-    market,
-    avg_cost,
-    units_held,
-    current_price,
-    high_context,
-    high_context_label,
-    rescue_gear,
-    rescue_r,
-    buy_price,
-    buy_label,
-    buy_drop_pct,
-    buy_units,
-    buy_shares,
-    projected_avg,
-    projected_units,
-    projected_shares,
-    sell_targets,
-    sell_step,
-):
-    fig.clear()
-    ax = fig.add_subplot(111)
-    x_start, x_end = 0.0, 1.0
-
-    fmt_val = lambda val: fmt_or_na(val, market)
-    levels = []
-
-    if high_context and high_context > 0:
-        levels.append((high_context_label, high_context, "#777777", ":", "", fmt_val(high_context), 1.4))
-    if current_price and current_price > 0:
-        levels.append(("Current", current_price, "#333333", "--", "", fmt_val(current_price), 2.0))
-    if avg_cost and avg_cost > 0:
-        levels.append(("Avg cost", avg_cost, "black", "-", f"units {units_held:.2f}", fmt_val(avg_cost), 3.0))
-    if buy_price and buy_price > 0 and buy_units > 0:
-        if units_held <= 0:
-            color = "#c62828"
-            left_text = f"-{buy_drop_pct:.1f}% {buy_units:.2f}u ~ {buy_shares} sh"
-            label = "LOAD"
-        else:
-            gear_key = int(round(rescue_gear)) if rescue_gear else 0
-            color = RESCUE_GEAR_COLORS.get(gear_key, "#d32f2f")
-            rescue_text = buy_label.replace("Rescue ", "")
-            left_text = (
-                f"{rescue_text} (-{fmt_compact(buy_drop_pct)}%, r={fmt_compact(rescue_r)}) "
-                f"{buy_units:.2f}u ~ {buy_shares} sh"
-            )
-            label = f"Buy {buy_label}"
-        levels.append((label, buy_price, color, "-", left_text, fmt_val(buy_price), 2.6))
-    if projected_avg and projected_avg > 0 and avg_cost and avg_cost > 0:
-        proj_text = f"units {projected_units:.2f}, sh {projected_shares}" if projected_shares else ""
-        levels.append(("Projected avg", projected_avg, "#999999", "--", proj_text, fmt_val(projected_avg), 1.6))
-    if avg_cost and avg_cost > 0 and sell_targets:
-        levels.append(("Sell T1 (50%)", sell_targets[0], "#0a8f08", "-", f"+{sell_step:.1f}%", fmt_val(sell_targets[0]), 2.6))
-        levels.append(("Sell T2 (50%)", sell_targets[1], "#0066cc", "-.", f"+{2*sell_step:.1f}%", fmt_val(sell_targets[1]), 2.2))
-
-    for label, y, color, style, left_text, right_text, lw in levels:
-        ax.plot([x_start, x_end], [y, y], color=color, linestyle=style, linewidth=lw)
-        left_label = f"{label} ({left_text})" if left_text else label
-        ax.text(
-            x_start + 0.01,
-            y,
-            left_label,
-            va="center",
-            ha="left",
-            fontsize=9,
-            color=color,
-            backgroundcolor="white",
-        )
-        ax.text(
-            x_end - 0.01,
-            y,
-            right_text,
-            va="center",
-            ha="right",
-            fontsize=9,
-            color=color,
-            backgroundcolor="white",
-        )
+def explain_outputs():
+    name = name_var.get().strip() or name_choice_var.get()
+    graph = state_graphs.graphs.get(name)
+    if graph is None:
+        messagebox.showinfo("Explain", "Show a result first.")
+        return
+    lines = []
+    for node in EXPLAIN_NODES:
+        drivers = ", ".join(sorted(graph.why(node))) or "n/a"
+        lines.append(f"{node}: last changed by {drivers}\n    depends on {', '.join(sorted(graph.inputs_of(node)))}")
+    messagebox.showinfo(f"Explain: {name}", "\n".join(lines))
 
-    gap_x = 0.5
-    if avg_cost and avg_cost > 0 and buy_price and buy_price > 0:
-        ax.plot([gap_x, gap_x], [buy_price, avg_cost], color="#c62828", linestyle="--", linewidth=1.0)
-        ax.text(
-            gap_x + 0.01,
-            (buy_price + avg_cost) / 2,
-            f"-{buy_drop_pct:.1f}%",
-            va="center",
-            ha="left",
-            fontsize=9,
-            color="#c62828",
-        )
 
-    if buy_price and projected_avg and projected_avg > 0 and buy_price != projected_avg:
-        gap_x2 = 0.72
-        proj_gap_pct = ((projected_avg - buy_price) / buy_price * 100) if buy_price else 0.0
-        ax.plot([gap_x2, gap_x2], [buy_price, projected_avg], color="#777777", linestyle="--", linewidth=1.0)
-        ax.text(
-            gap_x2 + 0.01,
-            (buy_price + projected_avg) / 2,
-            f"+{proj_gap_pct:.1f}%",
-            va="center",
-            ha="left",
-            fontsize=9,
-            color="#777777",
+def open_monte_carlo():
+    name = name_choice_var.get()
+    if not name or name not in stock_data:
+        messagebox.showinfo("Monte Carlo", "Select a saved stock first.")
+        return
+    win = tk.Toplevel(root)
+    win.title(f"Monte Carlo - {name}")
+    controls = ttk.Frame(win, padding=8)
+    controls.grid(row=0, column=0, sticky="ew")
+    method_var = tk.StringVar(value="GBM")
+    paths_var = tk.StringVar(value=str(MC_PATHS))
+    days_var = tk.StringVar(value=str(MC_HORIZON_DAYS))
+    status_var = tk.StringVar(value="Uses the saved record; save the form first to simulate edits.")
+    ttk.Label(controls, text="Paths").grid(row=0, column=0, padx=(0, 4))
+    ttk.Entry(controls, textvariable=paths_var, width=8).grid(row=0, column=1)
+    ttk.Label(controls, text="Days").grid(row=0, column=2, padx=(8, 4))
+    ttk.Entry(controls, textvariable=days_var, width=6).grid(row=0, column=3)
+    ttk.Combobox(controls, textvariable=method_var, values=("GBM", "Bootstrap"), state="readonly", width=10).grid(
+        row=0, column=4, padx=8
+    )
+    ttk.Label(win, textvariable=status_var, justify="left", padding=(8, 0)).grid(row=1, column=0, sticky="w")
+
+    mc_fig = Figure(figsize=(8.0, 3.2), dpi=100)
+    mc_canvas = FigureCanvasTkAgg(mc_fig, master=win)
+    mc_canvas.get_tk_widget().grid(row=2, column=0, sticky="nsew")
+    win.rowconfigure(2, weight=1)
+    win.columnconfigure(0, weight=1)
+    sim = {"job": None, "after": None}
+
+    def run():
+        if sim["job"] is not None:
+            return
+        try:
+            paths = max(1, int(paths_var.get()))
+            days = max(1, int(days_var.get()))
+        except ValueError:
+            messagebox.showerror("Monte Carlo", "Paths and days must be whole numbers.", parent=win)
+            return
+        inputs = campaign_inputs(name)
+        ticker = TICKER_MAP.get(name)
+        bars = bar_store.arrays(ticker) if ticker else None
+        if bars is not None and not len(bars["close"]):
+            bars = None
+        method = "bootstrap" if method_var.get() == "Bootstrap" else "gbm"
+        if method == "bootstrap" and (bars is None or len(bars["close"]) < MC_MIN_BOOTSTRAP_BARS):
+            messagebox.showinfo(
+                "Monte Carlo",
+                f"Bootstrap needs at least {MC_MIN_BOOTSTRAP_BARS} cached daily bars; using GBM instead.",
+                parent=win,
+            )
+            method = "gbm"
+        fitted = estimate_drift_vol(bars["close"]) if bars is not None else None
+        # Zero drift: only the volatility is taken from history.
+        mu, sigma = 0.0, fitted[1] if fitted else GBM_SIGMA
+
+        # The simulation runs on a worker thread; poll() picks up its progress on the Tk thread.
+        sim["job"] = SimulationJob(inputs, paths, days, method, bars, mu, sigma).start()
+        run_button.state(["disabled"])
+        cancel_button.state(["!disabled"])
+        status_var.set(f"Simulating 0/{paths:,} paths...")
+        sim["after"] = win.after(MC_POLL_MS, poll, days, method, sigma)
+
+    def poll(days, method, sigma):
+        sim["after"] = None
+        job = sim["job"]
+        result = error = None
+        for kind, value in job.poll():
+            if kind == "progress":
+                status_var.set(f"Simulating {value[0]:,}/{value[1]:,} paths...")
+            elif kind == "result":
+                result = value
+            else:
+                error = value
+        if not job.finished:
+            sim["after"] = win.after(MC_POLL_MS, poll, days, method, sigma)
+            return
+        sim["job"] = None
+        run_button.state(["!disabled"])
+        cancel_button.state(["disabled"])
+        if error is not None:
+            status_var.set("Simulation failed.")
+            messagebox.showerror("Monte Carlo", error, parent=win)
+            return
+        if result is None:
+            status_var.set("Simulation cancelled.")
+            return
+        show(result, days, method, sigma)
+
+    def show(result, days, method, sigma):
+        stats = summarize_outcomes(result)
+        exit_days = result["days_to_exit"]
+        mc_fig.clear()
+        ax_days, ax_units, ax_pnl = mc_fig.subplots(1, 3)
+        ax_days.hist(exit_days[~np.isnan(exit_days)], bins=30, color="#0066cc")
+        ax_days.set_title("Days to exit", fontsize=9)
+        ax_units.hist(result["max_units"], bins=30, color="#ff9800")
+        ax_units.set_title("Max units deployed", fontsize=9)
+        ax_pnl.hist(result["final_pnl_krw"] / 1e6, bins=40, color="#0a8f08")
+        ax_pnl.axvline(0.0, color="black", linewidth=1.0)
+        ax_pnl.set_title("Final P&L (₩M)", fontsize=9)
+        for ax in (ax_days, ax_units, ax_pnl):
+            ax.tick_params(labelsize=8)
+        mc_fig.tight_layout()
+        mc_canvas.draw_idle()
+        model = "bootstrap" if method == "bootstrap" else f"GBM sigma {sigma:.0%}"
+        status_var.set(
+            f"{stats['paths']:,} paths, {days} days, {model}\n"
+            f"Exited {stats['exit_rate']:.0%} (median {stats['median_days_to_exit']:.0f} d), "
+            f"hit N capacity {stats['capacity_rate']:.0%}, mean max units {stats['mean_max_units']:.2f}\n"
+            f"P&L mean {fmt_money(stats['mean_pnl_krw'])}, 5%..95% "
+            f"{fmt_money(stats['pnl_p5_krw'])}..{fmt_money(stats['pnl_p95_krw'])}, loss {stats['loss_rate']:.0%}"
         )
 
-    if avg_cost and avg_cost > 0 and sell_targets:
-        gap_x3 = 0.85
-        ax.plot([gap_x3, gap_x3], [avg_cost, sell_targets[0]], color="#0066cc", linestyle="--", linewidth=1.0)
-        ax.text(
-            gap_x3 + 0.01,
-            (avg_cost + sell_targets[0]) / 2,
-            f"+{sell_step:.1f}%",
-            va="center",
-            ha="left",
-            fontsize=9,
-            color="#0066cc",
-        )
-        ax.plot([gap_x3, gap_x3], [sell_targets[0], sell_targets[1]], color="#0066cc", linestyle="--", linewidth=1.0)
-        ax.text(
-            gap_x3 + 0.01,
-            (sell_targets[0] + sell_targets[1]) / 2,
-            f"+{sell_step:.1f}%",
-            va="center",
-            ha="left",
-            fontsize=9,
-            color="#0066cc",
-        )
+    def cancel():
+        if sim["job"] is not None:
+            sim["job"].cancel()
+            status_var.set("Cancelling...")
 
-    if levels:
-        prices = [lvl[1] for lvl in levels]
-        ymin = min(prices)
-        ymax = max(prices)
-        pad = (ymax - ymin) * 0.1 if ymax != ymin else max(1, ymax * 0.1)
-        ax.set_ylim(ymin - pad, ymax + pad)
+    def close():
+        cancel()
+        if sim["after"] is not None:
+            win.after_cancel(sim["after"])
+        win.destroy()
 
-    ax.set_xlim(x_start, x_end)
-    ax.set_xticks([])
-    ax.set_title(name or "")
-    ax.set_ylabel("Price")
-    ax.grid(False)
-    ax.spines["top"].set_visible(False)
-    ax.spines["right"].set_visible(False)
-    ax.spines["bottom"].set_visible(False)
-    canvas.draw()
+    run_button = ttk.Button(controls, text="Run", command=run)
+    run_button.grid(row=0, column=5)
+    cancel_button = ttk.Button(controls, text="Cancel", command=cancel, state="disabled")
+    cancel_button.grid(row=0, column=6, padx=(4, 0))
+    win.protocol("WM_DELETE_WINDOW", close)
 
 
 def update_manual_label(*args):
@@ -1336,7 +1248,7 @@ def update_manual_label(*args):
     effective_step = 1.0 + max(step_val, 0.0)
     label = f"Step {effective_step:.1f}% -> +{effective_step:.1f}% / +{2*effective_step:.1f}%"
     manual_gear_label.config(text=label)
-    update_display()
+    schedule_display()
 
 
 def update_manual_state():
@@ -1357,7 +1269,7 @@ def update_manual_load_label(*args):
     if manual_load_var.get() and abs(clamped - drop_val) > 1e-6:
         manual_load_gear_var.set(clamped)
     manual_load_label.config(text=f"Load drop {clamped:.1f}%")
-    update_display()
+    schedule_display()
 
 
 def update_manual_load_state():
@@ -1370,14 +1282,14 @@ def update_manual_load_state():
 
 
 def update_manual_rescue_state(*args):
-    update_display()
+    schedule_display()
 
 
 def update_market_state():
     # Always show FX and keep it editable for both KR and US; for KR it still stores a value.
     fx_entry.state(["!disabled"])
     if not fx_rate_var.get():
-        fx_rate_var.set(f"{GLOBAL_FX_RATE:,.2f}")
+        fx_rate_var.set(f"{portfolio.GLOBAL_FX_RATE:,.2f}")
     if market_var.get() == "US":
         avg_cost_label.config(text="Average Cost ($)")
     else:
@@ -1405,13 +1317,13 @@ root.columnconfigure(0, weight=1)
 root.rowconfigure(0, weight=1)
 main.columnconfigure(0, weight=0)
 main.columnconfigure(1, weight=1)
-main.rowconfigure(0, weight=1)
+main.rowconfigure(1, weight=1)
 
 name_choice_var = tk.StringVar()
 name_var = tk.StringVar()
 avg_cost_var = tk.StringVar()
 num_shares_var = tk.StringVar()
-units_held_var = tk.StringVar(value=f"0.00/0.00/{PORTFOLIO_N} units")
+units_held_var = tk.StringVar(value=f"0.00/0.00/{formulas.PORTFOLIO_N} units")
 max_volume_var = tk.StringVar()
 fx_rate_var = tk.StringVar()
 market_var = tk.StringVar(value="KR")
@@ -1428,30 +1340,59 @@ manual_rescue_var = tk.StringVar(value="AUTO")
 result_var = tk.StringVar()
 buy_info_var = tk.StringVar()
 sell_info_var = tk.StringVar()
+portfolio_var = tk.StringVar()
+portfolio_n_var = tk.StringVar(value=str(formulas.PORTFOLIO_N))
+
+portfolio_bar = ttk.Frame(main)
+portfolio_bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 8))
+ttk.Label(portfolio_bar, text="Portfolio").grid(row=0, column=0, padx=(0, 4))
+portfolio_combo = ttk.Combobox(portfolio_bar, textvariable=portfolio_var, state="readonly", width=18)
+portfolio_combo.grid(row=0, column=1)
+portfolio_combo.bind("<<ComboboxSelected>>", on_switch_portfolio)
+ttk.Label(portfolio_bar, text="N").grid(row=0, column=2, padx=(12, 4))
+ttk.Entry(portfolio_bar, textvariable=portfolio_n_var, width=5).grid(row=0, column=3)
+ttk.Button(portfolio_bar, text="New...", command=on_new_portfolio).grid(row=0, column=4, padx=(12, 4))
+ttk.Button(portfolio_bar, text="Summary...", command=open_portfolio_summary).grid(row=0, column=5)
+ttk.Button(portfolio_bar, text="Overview...", command=open_overview).grid(row=0, column=6, padx=(4, 0))
 
 form = ttk.Frame(main)
-form.grid(row=0, column=0, sticky="nsw", padx=(0, 12))
+form.grid(row=1, column=0, sticky="nsw", padx=(0, 12))
 
-ttk.Label(form, text="Stock").grid(row=0, column=0, sticky="ne", padx=4, pady=4)
 name_frame = ttk.Frame(form)
-name_frame.grid(row=0, column=1, sticky="w", padx=4, pady=4)
-name_radio_frame = ttk.Frame(name_frame)
-name_radio_frame.grid(row=0, column=0, sticky="w")
+name_frame.grid(row=0, column=0, columnspan=2, sticky="ew", padx=4, pady=4)
+name_frame.columnconfigure(1, weight=1)
+ttk.Label(name_frame, text="Stock filter").grid(row=0, column=0, sticky="w", padx=(0, 4))
+name_filter_var = tk.StringVar()
+name_filter_var.trace_add("write", apply_name_filter)
+ttk.Entry(name_frame, textvariable=name_filter_var).grid(row=0, column=1, columnspan=2, sticky="ew", pady=(0, 4))
+# Treeview only draws the visible rows, so thousands of names cost no widgets.
+name_tree = ttk.Treeview(name_frame, columns=LIST_COLUMNS, height=8, selectmode="browse")
+for col, width in (("#0", 110), ("market", 40), ("units", 55), ("load_status", 120), ("distance", 60)):
+    name_tree.heading(col, text=NAME_LIST_HEADINGS[col], command=lambda c=col: sort_name_list("name" if c == "#0" else c))
+    name_tree.column(col, width=width, stretch=col == "#0", anchor="w" if col in ("#0", "load_status") else "e")
+name_tree.grid(row=1, column=0, columnspan=2, sticky="ew")
+name_tree.bind("<<TreeviewSelect>>", on_name_tree_select)
+name_scroll = ttk.Scrollbar(name_frame, orient="vertical", command=name_tree.yview)
+name_scroll.grid(row=1, column=2, sticky="ns")
+name_tree.configure(yscrollcommand=name_scroll.set)
 
 avg_cost_label = ttk.Label(form, text="Average Cost (₩)")
 avg_cost_label.grid(row=1, column=0, sticky="e", padx=4, pady=4)
-ttk.Entry(form, textvariable=avg_cost_var, width=16).grid(
-    row=1, column=1, sticky="w", padx=4, pady=4
-)
+avg_cost_entry = ttk.Entry(form, textvariable=avg_cost_var, width=16)
+avg_cost_entry.grid(row=1, column=1, sticky="w", padx=4, pady=4)
 ttk.Label(form, text="Number of Stocks").grid(row=2, column=0, sticky="e", padx=4, pady=4)
-ttk.Entry(form, textvariable=num_shares_var, width=16).grid(
-    row=2, column=1, sticky="w", padx=4, pady=4
-)
+shares_frame = ttk.Frame(form)
+shares_frame.grid(row=2, column=1, sticky="w", padx=4, pady=4)
+num_shares_entry = ttk.Entry(shares_frame, textvariable=num_shares_var, width=16)
+num_shares_entry.grid(row=0, column=0)
+ttk.Button(shares_frame, text="Trades...", command=open_trades).grid(row=0, column=1, padx=(4, 0))
 
 ttk.Label(form, text="stock/deployed/total").grid(row=3, column=0, sticky="e", padx=4, pady=4)
-ttk.Label(form, textvariable=units_held_var).grid(
-    row=3, column=1, sticky="w", padx=4, pady=4
-)
+units_frame = ttk.Frame(form)
+units_frame.grid(row=3, column=1, sticky="w", padx=4, pady=4)
+ttk.Label(units_frame, textvariable=units_held_var).grid(row=0, column=0, sticky="w")
+ledger_var = tk.StringVar(value="")
+ttk.Label(units_frame, textvariable=ledger_var).grid(row=1, column=0, sticky="w")
 
 ttk.Label(form, text="Max Volume (₩)").grid(row=4, column=0, sticky="e", padx=4, pady=4)
 ttk.Entry(form, textvariable=max_volume_var, width=16).grid(
@@ -1473,6 +1414,14 @@ fx_frame.grid(row=6, column=0, columnspan=2, sticky="w", padx=4, pady=(0, 4))
 ttk.Label(fx_frame, text="FX rate (₩ per $)").grid(row=0, column=0, sticky="e", padx=(0, 8))
 fx_entry = ttk.Entry(fx_frame, textvariable=fx_rate_var, width=16)
 fx_entry.grid(row=0, column=1, sticky="w")
+fx_ref_var = tk.StringVar(value="")
+ttk.Label(fx_frame, textvariable=fx_ref_var).grid(row=1, column=0, columnspan=2, sticky="w")
+fx_light_frame = ttk.Frame(fx_frame)
+fx_light_frame.grid(row=2, column=0, columnspan=2, sticky="w")
+repatriate_label = ttk.Label(fx_light_frame, text="")
+repatriate_label.grid(row=0, column=0, sticky="w", padx=(0, 12))
+reinforce_label = ttk.Label(fx_light_frame, text="")
+reinforce_label.grid(row=0, column=1, sticky="w")
 
 buy_frame = ttk.LabelFrame(form, text="Buy")
 buy_frame.grid(row=7, column=0, columnspan=2, sticky="ew", padx=4, pady=4)
@@ -1494,6 +1443,10 @@ ttk.Label(gl_frame, text="As-of date").grid(row=1, column=2, sticky="e", padx=4,
 ttk.Entry(gl_frame, textvariable=l_date_var, width=12).grid(row=1, column=3, sticky="w", padx=4, pady=2)
 ttk.Label(gl_frame, text="Volatility V (0-2)").grid(row=2, column=0, sticky="e", padx=4, pady=2)
 ttk.Entry(gl_frame, textvariable=v_score_var, width=8).grid(row=2, column=1, sticky="w", padx=4, pady=2)
+auto_v_var = tk.StringVar(value="")
+ttk.Label(gl_frame, textvariable=auto_v_var).grid(row=3, column=0, columnspan=3, sticky="w", padx=4, pady=2)
+auto_v_button = ttk.Button(gl_frame, text="Use auto V", command=use_auto_v, state="disabled")
+auto_v_button.grid(row=3, column=3, sticky="w", padx=4, pady=2)
 
 manual_frame = ttk.Frame(form)
 manual_frame.grid(row=10, column=0, columnspan=2, sticky="w", padx=4, pady=4)
@@ -1570,8 +1523,29 @@ ttk.Label(manual_frame, text="Base step = 1% + slider (0 -> 1/2, 5 -> 6/12).").g
     row=10, column=0, sticky="w"
 )
 
-ttk.Button(form, text="Refresh Market Data", command=refresh_market_data).grid(
-    row=11, column=0, columnspan=2, pady=(4, 4), sticky="ew"
+refresh_frame = ttk.Frame(form)
+refresh_frame.grid(row=11, column=0, columnspan=2, pady=(4, 4), sticky="ew")
+refresh_frame.columnconfigure(0, weight=1)
+refresh_button = ttk.Button(refresh_frame, text="Refresh Market Data", command=refresh_market_data)
+refresh_button.grid(row=0, column=0, sticky="ew")
+cancel_button = ttk.Button(refresh_frame, text="Cancel", command=cancel_market_refresh, state="disabled")
+cancel_button.grid(row=0, column=1, padx=(4, 0))
+refresh_progress = ttk.Progressbar(refresh_frame, mode="determinate")
+refresh_progress.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(4, 0))
+refresh_status_var = tk.StringVar(value="")
+ttk.Label(refresh_frame, textvariable=refresh_status_var).grid(row=2, column=0, columnspan=2, sticky="w")
+live_frame = ttk.Frame(refresh_frame)
+live_frame.grid(row=3, column=0, columnspan=2, sticky="w", pady=(4, 0))
+live_var = tk.BooleanVar(value=False)
+ttk.Checkbutton(live_frame, text="Live every", variable=live_var, command=toggle_live_mode).grid(row=0, column=0)
+live_interval_var = tk.StringVar(value=str(LIVE_INTERVAL_S))
+ttk.Spinbox(live_frame, from_=LIVE_MIN_INTERVAL_S, to=3600, increment=15, width=6, textvariable=live_interval_var).grid(
+    row=0, column=1, padx=4
+)
+ttk.Label(live_frame, text="s (alerts: LOAD / RESCUE / sell tiers)").grid(row=0, column=2)
+alert_var = tk.StringVar(value="")
+ttk.Label(refresh_frame, textvariable=alert_var, foreground="#c62828", wraplength=320).grid(
+    row=4, column=0, columnspan=2, sticky="w"
 )
 ttk.Button(form, text="Show Result", command=on_show).grid(
     row=12, column=0, columnspan=2, pady=12, sticky="ew"
@@ -1579,9 +1553,15 @@ ttk.Button(form, text="Show Result", command=on_show).grid(
 ttk.Button(form, text="Save Result", command=on_save).grid(
     row=13, column=0, columnspan=2, pady=(0, 12), sticky="ew"
 )
+ttk.Button(form, text="Monte Carlo...", command=open_monte_carlo).grid(
+    row=14, column=0, columnspan=2, pady=(0, 12), sticky="ew"
+)
+ttk.Button(form, text="Explain outputs...", command=explain_outputs).grid(
+    row=15, column=0, columnspan=2, pady=(0, 12), sticky="ew"
+)
 
 output = ttk.Frame(main)
-output.grid(row=0, column=1, sticky="nsew")
+output.grid(row=1, column=1, sticky="nsew")
 output.columnconfigure(0, weight=1)
 output.rowconfigure(1, weight=1)
 
@@ -1592,12 +1572,38 @@ ttk.Label(output, textvariable=result_var, justify="left").grid(
 fig = Figure(figsize=(6.5, 4.0), dpi=100)
 canvas = FigureCanvasTkAgg(fig, master=output)
 canvas.get_tk_widget().grid(row=1, column=0, sticky="nsew")
+# draw_idle renders through canvas.draw on the next idle callback; time the actual redraw.
+canvas.draw = timings.wrap("canvas.draw", canvas.draw)
+level_chart = LevelChart(fig, canvas)
 
-main.rowconfigure(0, weight=1)
+main.rowconfigure(1, weight=1)
 main.columnconfigure(1, weight=1)
 
+status_bar = ttk.Frame(root, padding=(12, 2))
+status_bar.grid(row=1, column=0, sticky="ew")
+status_bar.columnconfigure(0, weight=1)
+status_bar_var = tk.StringVar(value="No timings yet")
+ttk.Label(status_bar, textvariable=status_bar_var).grid(row=0, column=0, sticky="w")
+ttk.Button(status_bar, text="Diagnostics...", command=open_diagnostics).grid(row=0, column=1, sticky="e")
+
 load_data()
+if portfolio.load_errors:
+    sections = []
+    for action, heading in (
+        (RESET, "Could not be read and were reset to defaults:"),
+        (KEPT, "Out of range; kept as saved:"),
+        (SKIPPED, "Rows skipped:"),
+    ):
+        lines = [f"{source}: {format_error(err)}" for source, err in portfolio.load_errors if err.action == action]
+        if lines:
+            more = len(lines) - 10
+            sections.append(heading + "\n" + "\n".join(lines[:10]) + (f"\n... and {more} more" if more > 0 else ""))
+    messagebox.showwarning("Data file", "Some saved values need checking.\n\n" + "\n\n".join(sections))
+refresh_portfolio_list()
 refresh_name_list()
+update_fx_light()
+refresh_auto_vscores()
+update_status_bar()
 update_manual_state()
 update_manual_load_state()
 update_market_state()
@@ -0,0 +1 @@
+"""Headless calculation core for the AI Seesaw Trading Calculator."""
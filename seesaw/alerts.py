@@ -0,0 +1,185 @@
+"""
+Trigger alerts for live polling.
+
+After each price update ``check_stocks`` matches the stocks' new prices
+against their live trigger levels, kept in the monitor's TriggerIndex
+(seesaw.triggers). A stock's levels are only recomputed through
+compute_state when its other inputs or the portfolio-wide ones changed, so
+a price tick costs a binary search. A condition fires once when it becomes
+true and re-arms only after it has cleared again, so a stock sitting below
+its LOAD line does not alert on every poll. Alerts are appended to a
+plain-text log and optionally shown as a desktop notification.
+
+Conditions (manual v1.4 section 6):
+    LOAD    load_status is ACTIVE: today's low (or the current price) is at
+            or below the LOAD trigger of a flat stock with room for a unit
+    RESCUE  today's low is at or below rescue_trigger (position held)
+    T1/T2   today's high is at or above the sell tier target
+"""
+
+import os
+import platform
+import shutil
+import subprocess
+from collections import namedtuple
+from datetime import datetime
+from importlib.util import find_spec
+
+from seesaw import portfolio
+from seesaw.display import fmt_money
+from seesaw.overview import portfolio_context
+from seesaw.state import compute_state, parse_record, read_market_fields
+from seesaw.triggers import TriggerIndex
+
+ALERT_LOG = "alerts.log"
+ALERT_KINDS = ("LOAD", "RESCUE", "T1", "T2")
+
+Alert = namedtuple("Alert", "time name kind message")
+PRICE_FIELDS = ("current_price", "low_today", "high_today")
+
+
+def price_signature(rec):
+    """The fields a price refresh changes; triggers are only re-evaluated when this moves."""
+    return tuple(rec.get(key) for key in PRICE_FIELDS)
+
+
+def level_signature(rec):
+    """Everything else the trigger levels depend on: the record's other fields and the portfolio-wide inputs."""
+    fields = tuple((key, value) for key, value in rec.items() if key not in PRICE_FIELDS and key != "last_update")
+    return fields, portfolio_context()
+
+
+def day_range(rec):
+    """Returns: (low, high) of today's range, falling back to the current price."""
+    prices = read_market_fields(rec)
+    current = prices["current_price"]
+    low = prices["low_today"] if prices["low_today"] > 0 else current
+    high = prices["high_today"] if prices["high_today"] > 0 else current
+    return low, high
+
+
+def touched_conditions(touched, low, high, market="KR"):
+    """Returns: {kind: message} for the levels TriggerIndex.touched() reported."""
+    fmt = lambda val: fmt_money(val, market)
+    out = {}
+    for kind, level in touched:
+        if kind == "LOAD":
+            out[kind] = f"LOAD active: low {fmt(low)} <= trigger {fmt(level)}"
+        elif kind == "RESCUE":
+            out[kind] = f"RESCUE: low {fmt(low)} <= trigger {fmt(level)}"
+        else:
+            out[kind] = f"Sell {kind}: high {fmt(high)} >= target {fmt(level)}"
+    return out
+
+
+class AlertMonitor:
+    """Remembers which conditions are active per stock so each cross alerts once."""
+
+    def __init__(self):
+        self.index = TriggerIndex()  # live levels per stock
+        self._signatures = {}  # name -> last price_signature evaluated
+        self._levels = {}  # name -> level_signature the index entry was computed from
+        self._active = {}  # name -> set of active kinds
+        self.recomputed = 0  # stocks whose levels the last check_stocks recomputed
+
+    def price_changed(self, name, rec):
+        return self._signatures.get(name) != price_signature(rec)
+
+    def levels_stale(self, name, rec):
+        return self._levels.get(name) != level_signature(rec)
+
+    def update_levels(self, name, rec):
+        """Recompute one stock's trigger levels from compute_state."""
+        parsed = parse_record(rec)
+        self.index.update_stock(name, compute_state(parsed, rec, name), parsed["avg_cost"], parsed["units_held"])
+        self._levels[name] = level_signature(rec)
+
+    def check(self, name, rec, conditions, now=None):
+        """
+        Record the conditions now true for ``name``.
+
+        Returns: list of Alert for conditions that were not active before.
+        """
+        self._signatures[name] = price_signature(rec)
+        previous = self._active.get(name, set())
+        self._active[name] = set(conditions)
+        now = now or datetime.now()
+        return [Alert(now, name, kind, conditions[kind]) for kind in ALERT_KINDS if kind in conditions and kind not in previous]
+
+    def forget(self, name):
+        self.index.remove(name)
+        self._signatures.pop(name, None)
+        self._levels.pop(name, None)
+        self._active.pop(name, None)
+
+
+def append_alert_log(alerts, path=ALERT_LOG):
+    """Append alerts as tab-separated lines (time, name, kind, message); never rewrites the file."""
+    if not alerts:
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        for a in alerts:
+            f.write(f"{a.time:%Y-%m-%d %H:%M:%S}\t{a.name}\t{a.kind}\t{a.message}\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def notify(title, message):
+    """
+    Best-effort desktop notification.
+
+    Uses plyer when installed, otherwise osascript (macOS) or notify-send
+    (Linux). Returns: True if a notification was handed to the OS.
+    """
+    if find_spec("plyer") is not None:
+        try:
+            from plyer import notification
+
+            notification.notify(title=title, message=message, app_name="AI Seesaw")
+            return True
+        except Exception:
+            pass
+    system = platform.system()
+    try:
+        if system == "Darwin" and shutil.which("osascript"):
+            script = f"display notification {_applescript_str(message)} with title {_applescript_str(title)}"
+            subprocess.Popen(["osascript", "-e", script])
+            return True
+        if system == "Linux" and shutil.which("notify-send"):
+            subprocess.Popen(["notify-send", title, message])
+            return True
+    except OSError:
+        pass
+    return False
+
+
+def _applescript_str(text):
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def check_stocks(monitor, names):
+    """
+    Re-evaluate alert conditions for the named stocks in ``portfolio.stock_data``.
+
+    Stocks whose price fields have not changed since their last check are
+    skipped; the rest are matched against their indexed levels, which are
+    recomputed first only if stale (see ``level_signature``).
+    Returns: list of new Alert.
+    """
+    alerts = []
+    monitor.recomputed = 0
+    for name in names:
+        rec = portfolio.stock_data.get(name)
+        if rec is None:
+            monitor.forget(name)
+            continue
+        if not monitor.price_changed(name, rec):
+            continue
+        if monitor.levels_stale(name, rec):
+            monitor.update_levels(name, rec)
+            monitor.recomputed += 1
+        low, high = day_range(rec)
+        touched = monitor.index.touched(name, low, high)
+        conditions = touched_conditions(touched, low, high, rec.get("market") or "KR")
+        alerts.extend(monitor.check(name, rec, conditions))
+    return alerts
@@ -0,0 +1,264 @@
+"""
+Headless backtester for the v1.4 LOAD/RESCUE/2-tier-sell rules.
+
+Daily OHLC bars are replayed through the manual's daily_execution_flow
+(section 6.1): sells first, then LOAD when the stock is flat, otherwise
+RESCUE, at most one buy per stock per day, capped at ceil(0.6*N) units per
+stock and N units overall. Trigger prices come from the same formulas the
+GUI uses, so a backtest fill happens exactly where the chart draws a line.
+
+Bars are aligned onto one date axis and kept as arrays; the day loop only
+reads floats out of those arrays and keeps per-stock state in lists.
+"""
+
+import csv
+from math import floor, isnan
+
+import numpy as np
+
+from seesaw import formulas
+
+BAR_FIELDS = ("open", "high", "low", "close")
+
+
+def load_bars_csv(path):
+    """
+    Read a Date,Open,High,Low,Close CSV (Yahoo export layout).
+
+    Returns: dict with "date" (str array) and float arrays for BAR_FIELDS.
+    """
+    dates, cols = [], {key: [] for key in BAR_FIELDS}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            row = {k.strip().lower(): v for k, v in row.items() if k}
+            try:
+                vals = [float(row[key]) for key in BAR_FIELDS]
+            except (KeyError, TypeError, ValueError):
+                continue
+            dates.append((row.get("date") or "")[:10])
+            for key, val in zip(BAR_FIELDS, vals):
+                cols[key].append(val)
+    order = np.argsort(np.asarray(dates), kind="stable")
+    bars = {"date": np.asarray(dates)[order]}
+    for key in BAR_FIELDS:
+        bars[key] = np.asarray(cols[key], dtype=float)[order]
+    return bars
+
+
+def align_bars(bars):
+    """
+    Put every ticker on one sorted date axis.
+
+    Returns: (dates, tickers, {field: (days, tickers) array}) with NaN where
+    a ticker has no bar for the day.
+    """
+    tickers = list(bars)
+    dates = np.unique(np.concatenate([np.asarray(bars[t]["date"]) for t in tickers])) if tickers else np.array([])
+    out = {key: np.full((len(dates), len(tickers)), np.nan) for key in BAR_FIELDS}
+    for j, t in enumerate(tickers):
+        idx = np.searchsorted(dates, np.asarray(bars[t]["date"]))
+        for key in BAR_FIELDS:
+            out[key][idx, j] = np.asarray(bars[t][key], dtype=float)
+    return dates, tickers, out
+
+
+def prior_high(high, days=None):
+    """
+    Highest high of the previous ``days`` completed bars (no look-ahead).
+
+    Missing bars are skipped; rows with no prior bar are 0.0 like an empty
+    ``high_10d`` in the GUI.
+    """
+    if days is None:
+        days = formulas.HIGH_CONTEXT_DAYS
+    n_days, n_tickers = high.shape
+    out = np.zeros_like(high)
+    for j in range(n_tickers):
+        valid = ~np.isnan(high[:, j])
+        col = high[valid, j]
+        if col.size < 2:
+            continue
+        padded = np.concatenate((np.full(days, -np.inf), col[:-1]))
+        windows = np.lib.stride_tricks.sliding_window_view(padded, days)
+        highs = windows.max(axis=1)
+        highs[np.isneginf(highs)] = 0.0
+        out[np.flatnonzero(valid), j] = highs
+    return out
+
+
+def run_backtest(bars, scores, N=None, max_volume_krw=100_000_000.0, fx_rate=1300.0, aligned=None):
+    """
+    Replay bars for a whole portfolio.
+
+    bars: {ticker: {"date", "open", "high", "low", "close"}} arrays.
+    scores: {ticker: {"g_score", "l_score", "v_score", "market"}}; missing
+            keys fall back to the default record (0/0/1, KR).
+    N: portfolio units, defaults to PORTFOLIO_N.
+    max_volume_krw: total capital; one unit is max_volume_krw / N.
+    fx_rate: constant ₩ per $ used for US tickers.
+    aligned: optional ``align_bars(bars)`` result to reuse across runs.
+
+    Returns: dict with "trades" (list of dicts), "dates", "equity" and
+    "units" arrays, and "stats".
+    """
+    if N is None:
+        N = formulas.PORTFOLIO_N
+    dates, tickers, aligned = aligned or align_bars(bars)
+    n_days, n_tickers = len(dates), len(tickers)
+    unit_size_krw = max_volume_krw / N if max_volume_krw and N else 0.0
+    max_units_stock = formulas.compute_max_units_per_stock(N)
+
+    fx = [fx_rate if (scores.get(t, {}).get("market") or "KR") == "US" else 1.0 for t in tickers]
+    g = [float(scores.get(t, {}).get("g_score", 0.0)) for t in tickers]
+    l = [float(scores.get(t, {}).get("l_score", 0.0)) for t in tickers]
+    v = [float(scores.get(t, {}).get("v_score", 1.0)) for t in tickers]
+    load_drop = [formulas.compute_load_trigger(formulas.compute_trend(g[j], l[j]), v[j]) for j in range(n_tickers)]
+    high_ref = prior_high(aligned["high"])
+    load_trigger = high_ref * (1 - np.asarray(load_drop) / 100)
+
+    opens, highs, lows = aligned["open"].tolist(), aligned["high"].tolist(), aligned["low"].tolist()
+    load_triggers = load_trigger.tolist()
+
+    shares = [0.0] * n_tickers
+    avg_cost = [0.0] * n_tickers
+    units = [0.0] * n_tickers
+    snapshot = [0.0] * n_tickers  # shares right after the last buy (manual's Q)
+    tiers_done = [0] * n_tickers
+    campaign_cost = [0.0] * n_tickers
+    campaign_pnl = [0.0] * n_tickers
+    total_units = 0.0
+    cash = max_volume_krw
+    trades, campaigns = [], []
+    cash_hist = np.empty(n_days)
+    shares_hist = np.zeros((n_days, n_tickers))
+    units_hist = np.empty(n_days)
+
+    def record(day, j, side, tag, price, qty, pnl=0.0):
+        trades.append(
+            {
+                "date": str(dates[day]),
+                "ticker": tickers[j],
+                "side": side,
+                "tag": tag,
+                "price": price,
+                "shares": qty,
+                "units_after": units[j],
+                "avg_cost": avg_cost[j],
+                "pnl_krw": pnl,
+            }
+        )
+
+    for day in range(n_days):
+        o_row, h_row, l_row, trig_row = opens[day], highs[day], lows[day], load_triggers[day]
+        for j in range(n_tickers):
+            high = h_row[j]
+            if isnan(high):
+                continue
+            open_, low = o_row[j], l_row[j]
+
+            # 1. Sells first
+            if shares[j] > 0:
+                gear = formulas.compute_auto_gear(g[j], l[j], total_units / N if N else 0.0)
+                tier1, tier2 = formulas.compute_sell_targets_v1_4(avg_cost[j], gear["base_step"])
+                for tier, target in ((1, tier1), (2, tier2)):
+                    if tiers_done[j] >= tier or high < target:
+                        continue
+                    qty = shares[j] if tier == 2 else min(shares[j], floor(snapshot[j] * 0.5))
+                    if qty <= 0:
+                        tiers_done[j] = tier
+                        continue
+                    price = max(open_, target)
+                    pnl = (price - avg_cost[j]) * qty * fx[j]
+                    cash += price * qty * fx[j]
+                    campaign_pnl[j] += pnl
+                    shares[j] -= qty
+                    tiers_done[j] = tier
+                    prev_units = units[j]
+                    units[j] = shares[j] * avg_cost[j] * fx[j] / unit_size_krw if shares[j] > 0 else 0.0
+                    total_units += units[j] - prev_units
+                    record(day, j, "SELL", f"T{tier}", price, qty, pnl)
+                    if shares[j] <= 0:
+                        campaigns.append({"ticker": tickers[j], "end": str(dates[day]), "cost_krw": campaign_cost[j], "pnl_krw": campaign_pnl[j]})
+                        shares[j] = avg_cost[j] = units[j] = 0.0
+                        campaign_cost[j] = campaign_pnl[j] = 0.0
+                        tiers_done[j] = 0
+                        break
+
+            # 2. Then at most one buy
+            if shares[j] <= 0:
+                trigger = trig_row[j]
+                remaining = N - total_units
+                if trigger <= 0 or low > trigger or remaining < 1.0 or max_units_stock < 1:
+                    continue
+                buy_units, tag = 1.0, "LOAD"
+            else:
+                trigger, buy_units, _, _, _ = formulas.compute_rescue_trigger(avg_cost[j], units[j], total_units, N)
+                buy_units = min(buy_units, max_units_stock - units[j])
+                if low > trigger or buy_units <= 0:
+                    continue
+                tag = "RESCUE"
+            price = min(open_, trigger)
+            unit_size_local = unit_size_krw / fx[j]
+            qty = max(1, formulas.round_half_up(buy_units * unit_size_local / price))
+            # Share rounding must never push the stock or the portfolio past its cap (6.4).
+            available = min(max_units_stock - units[j], N - total_units)
+            qty = min(qty, int(available * unit_size_local / price))
+            if qty < 1:
+                continue
+            cost = price * qty * fx[j]
+            new_shares = shares[j] + qty
+            avg_cost[j] = (avg_cost[j] * shares[j] + price * qty) / new_shares
+            shares[j] = snapshot[j] = new_shares
+            tiers_done[j] = 0
+            cash -= cost
+            campaign_cost[j] += cost
+            prev_units = units[j]
+            units[j] = shares[j] * avg_cost[j] * fx[j] / unit_size_krw
+            total_units += units[j] - prev_units
+            record(day, j, "BUY", tag, price, qty)
+
+        cash_hist[day] = cash
+        shares_hist[day] = shares
+        units_hist[day] = total_units
+
+    closes = aligned["close"]
+    if n_days:
+        # Forward-fill closes so holdings are marked on days a ticker did not trade.
+        idx = np.where(~np.isnan(closes), np.arange(n_days)[:, None], 0)
+        np.maximum.accumulate(idx, axis=0, out=idx)
+        closes = np.nan_to_num(closes[idx, np.arange(n_tickers)])
+    equity = cash_hist + (shares_hist * closes * np.asarray(fx)).sum(axis=1)
+
+    return {
+        "trades": trades,
+        "campaigns": campaigns,
+        "dates": dates,
+        "equity": equity,
+        "units": units_hist,
+        "stats": summarize(equity, units_hist, trades, campaigns, max_volume_krw, N),
+    }
+
+
+def summarize(equity, units, trades, campaigns, initial_equity, N):
+    """Summary statistics for an equity curve and its trade log."""
+    if not len(equity):
+        return {"days": 0, "trades": 0}
+    peaks = np.maximum.accumulate(equity)
+    drawdown = np.where(peaks > 0, equity / peaks - 1.0, 0.0)
+    years = len(equity) / 252.0
+    total_return = equity[-1] / initial_equity - 1.0 if initial_equity else 0.0
+    wins = sum(1 for c in campaigns if c["pnl_krw"] > 0)
+    return {
+        "days": len(equity),
+        "final_equity": float(equity[-1]),
+        "total_return": float(total_return),
+        "cagr": float((1.0 + total_return) ** (1.0 / years) - 1.0) if years and total_return > -1.0 else 0.0,
+        "max_drawdown": float(drawdown.min()),
+        "trades": len(trades),
+        "buys": sum(1 for t in trades if t["side"] == "BUY"),
+        "sells": sum(1 for t in trades if t["side"] == "SELL"),
+        "campaigns": len(campaigns),
+        "win_rate": wins / len(campaigns) if campaigns else 0.0,
+        "max_units": float(units.max()),
+        "days_at_capacity": int((units >= N - 1.0).sum()) if N else 0,
+    }
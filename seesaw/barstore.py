@@ -0,0 +1,136 @@
+"""
+On-disk daily bar cache.
+
+Bars live in one SQLite table keyed by (ticker, date). Refreshes only ask
+the provider for bars newer than the last cached date and read the highs
+window back from the cache; the backtester reads whole histories as arrays.
+Rows older than ``retention_days`` are evicted when a ticker is topped up.
+Values derived from the bars (the auto V score) are cached alongside,
+keyed by the last bar date they were computed from; a store written by an
+older VSCORE_VERSION has its cached scores dropped on open.
+"""
+
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+BARS_FILE = "bars.db"
+BAR_RETENTION_DAYS = 730  # calendar days kept per ticker; None keeps everything
+VSCORE_VERSION = 2  # bumped when the V score formula changes (2: simple returns)
+
+
+class BarStore:
+    def __init__(self, path=BARS_FILE, retention_days=BAR_RETENTION_DAYS):
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS bars ("
+                " ticker TEXT NOT NULL, date TEXT NOT NULL,"
+                " open REAL, high REAL, low REAL, close REAL,"
+                " PRIMARY KEY (ticker, date)) WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS vscores ("
+                " ticker TEXT PRIMARY KEY, bar_date TEXT NOT NULL, vol_pct REAL, v_score REAL)"
+            )
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < VSCORE_VERSION:
+                self._conn.execute("DELETE FROM vscores")
+                self._conn.execute(f"PRAGMA user_version = {VSCORE_VERSION}")
+
+    def close(self):
+        self._conn.close()
+
+    def tickers(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT ticker FROM bars ORDER BY ticker")]
+
+    def last_date(self, ticker):
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(date) FROM bars WHERE ticker = ?", (ticker,)).fetchone()
+        return row[0] if row else None
+
+    def last_dates(self):
+        """Returns: {ticker: last cached bar date} for every ticker."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT ticker, MAX(date) FROM bars GROUP BY ticker"))
+
+    def vscores(self):
+        """Returns: {ticker: (bar_date, vol_pct, v_score)} from the V score cache."""
+        with self._lock:
+            return {row[0]: row[1:] for row in self._conn.execute("SELECT ticker, bar_date, vol_pct, v_score FROM vscores")}
+
+    def put_vscores(self, rows):
+        """Insert or replace (ticker, bar_date, vol_pct, v_score) rows in one transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vscores (ticker, bar_date, vol_pct, v_score) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def upsert(self, ticker, bars):
+        """Insert or replace (date, open, high, low, close) bars, then evict."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO bars (ticker, date, open, high, low, close) VALUES (?, ?, ?, ?, ?, ?)",
+                ((ticker,) + tuple(bar) for bar in bars),
+            )
+            if self.retention_days:
+                cutoff = (date.today() - timedelta(days=self.retention_days)).isoformat()
+                self._conn.execute("DELETE FROM bars WHERE ticker = ? AND date < ?", (ticker, cutoff))
+
+    def recent(self, ticker, count):
+        """Returns: the last ``count`` bars for ticker, ascending."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, open, high, low, close FROM bars WHERE ticker = ? ORDER BY date DESC LIMIT ?",
+                (ticker, count),
+            ).fetchall()
+        rows.reverse()
+        return rows
+
+    def history(self, ticker, start=None, end=None):
+        """Returns: bars for ticker between start and end dates (inclusive), ascending."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT date, open, high, low, close FROM bars WHERE ticker = ? AND date >= ? AND date <= ? ORDER BY date",
+                (ticker, start or "", end or "9999-12-31"),
+            ).fetchall()
+
+    def arrays(self, ticker, start=None, end=None):
+        """Returns: backtester bar dict ("date" + OHLC arrays) for ticker."""
+        import numpy as np
+
+        rows = self.history(ticker, start, end)
+        cols = list(zip(*rows)) if rows else [(), (), (), (), ()]
+        return {
+            "date": np.asarray(cols[0], dtype=str),
+            "open": np.asarray(cols[1], dtype=float),
+            "high": np.asarray(cols[2], dtype=float),
+            "low": np.asarray(cols[3], dtype=float),
+            "close": np.asarray(cols[4], dtype=float),
+        }
+
+    def evict(self):
+        """Apply the retention policy to every ticker. Returns: rows removed."""
+        if not self.retention_days:
+            return 0
+        cutoff = (date.today() - timedelta(days=self.retention_days)).isoformat()
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM bars WHERE date < ?", (cutoff,)).rowcount
+
+
+def weekdays_since(last_date, today=None):
+    """Weekdays after ``last_date`` (YYYY-MM-DD) up to and including today."""
+    today = today or date.today()
+    start = date.fromisoformat(last_date)
+    if start >= today:
+        return 0
+    full_weeks, extra = divmod((today - start).days, 7)
+    count = full_weeks * 5
+    for offset in range(1, extra + 1):
+        if (start + timedelta(days=full_weeks * 7 + offset)).weekday() < 5:
+            count += 1
+    return count
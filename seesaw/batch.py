@@ -0,0 +1,316 @@
+"""
+Vectorized whole-portfolio evaluation.
+
+``compute_state_batch`` is the column-array twin of ``compute_state``: it
+takes every stock at once and returns the LOAD/RESCUE/sell signal sheet in
+one NumPy pass. The arithmetic mirrors the scalar formulas in
+``seesaw.formulas`` operation for operation, and the columns are parsed
+with ``parse_record``'s defaults, so both paths agree exactly.
+``batch_states`` unpacks a pass into per-stock dicts for the sheet and the
+overview.
+"""
+
+import numpy as np
+
+from seesaw import formulas
+
+COLUMNS = (
+    "avg_cost",
+    "num_shares",
+    "market",
+    "fx_rate",
+    "g_score",
+    "l_score",
+    "v_score",
+    "current_price",
+    "high_10d",
+    "low_today",
+    "manual_sell_mode",
+    "manual_sell_step",
+    "manual_load_mode",
+    "manual_load_drop",
+    "manual_rescue_mode",
+)
+
+
+def _to_float(val, default=0.0):
+    # Same rule as state.parse_record: blank or invalid -> default, 0 stays 0.
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return default
+
+
+def columns_from_records(records, order, fx_rate):
+    """
+    Parse ``stock_data``-style records into column arrays (one pass).
+
+    Blank fields take ``parse_record``'s defaults (v_score 1.0, fx_rate the
+    portfolio rate, everything else 0).
+
+    Returns: dict of NumPy arrays keyed by COLUMNS, plus "name".
+    """
+    cols = {key: [] for key in COLUMNS}
+    for name in order:
+        rec = records[name]
+        market = rec.get("market") or "KR"
+        cols["avg_cost"].append(_to_float(rec.get("avg_cost")))
+        cols["num_shares"].append(_to_float(rec.get("num_shares")))
+        cols["market"].append(market)
+        cols["fx_rate"].append(_to_float(rec.get("fx_rate"), fx_rate) or fx_rate)
+        cols["g_score"].append(_to_float(rec.get("g_score")))
+        cols["l_score"].append(_to_float(rec.get("l_score")))
+        cols["v_score"].append(_to_float(rec.get("v_score"), 1.0))
+        cols["current_price"].append(_to_float(rec.get("current_price")))
+        cols["high_10d"].append(_to_float(rec.get("high_10d")))
+        cols["low_today"].append(_to_float(rec.get("low_today")))
+        cols["manual_sell_mode"].append(bool(rec.get("manual_sell_mode", rec.get("manual_mode", 0))))
+        cols["manual_sell_step"].append(_to_float(rec.get("manual_sell_step", rec.get("manual_gear"))))
+        cols["manual_load_mode"].append(bool(rec.get("manual_load_mode", 0)))
+        cols["manual_load_drop"].append(_to_float(rec.get("manual_load_drop")))
+        # Unknown modes stay as they are: like compute_state, the batch reads them as DEFAULT.
+        cols["manual_rescue_mode"].append(str(rec.get("manual_rescue_mode") or "AUTO").strip().upper())
+    out = {}
+    for key, vals in cols.items():
+        if key in ("market", "manual_rescue_mode"):
+            out[key] = np.asarray(vals, dtype=object)
+        elif key in ("manual_sell_mode", "manual_load_mode"):
+            out[key] = np.asarray(vals, dtype=bool)
+        else:
+            out[key] = np.asarray(vals, dtype=float)
+    out["name"] = list(order)
+    return out
+
+
+def rescue_gear_batch(units_held, N):
+    """Vectorized ``get_rescue_gear``. Returns: (drop_pct, r, gear) arrays."""
+    u_sat = formulas.RESCUE_U_SAT
+    if N and N > 0:
+        u_sat = min(formulas.RESCUE_U_SAT, float(N))
+    units_held = np.asarray(units_held, dtype=float)
+    if u_sat <= 1.0:
+        t = np.ones_like(units_held)
+    else:
+        t = (units_held - 1.0) / (u_sat - 1.0)
+    t = np.clip(t, 0.0, 1.0)
+
+    drop_pct = formulas.RESCUE_DROP_MIN + formulas.RESCUE_DROP_SPAN * t
+    r = formulas.RESCUE_R_MIN + formulas.RESCUE_R_SPAN * t
+    gear = 1.0 + 2.0 * t
+    return drop_pct, r, gear
+
+
+def auto_gear_batch(trend, f):
+    """Vectorized quantized ``compute_auto_gear``. Returns: (gear, penalty, base_step) arrays."""
+    f = np.asarray(f, dtype=float)
+    penalty = np.where(f <= 0.4, 0.0, -3.0 * (f - 0.4) / 0.6)
+    gear = np.round(np.clip(trend + penalty, 0.0, 5.0) * 10.0) / 10.0
+    return gear, penalty, 1.0 + gear
+
+
+def compute_state_batch(cols, max_volume_krw, N=None):
+    """
+    Evaluate ``compute_state`` for every stock in one pass.
+
+    cols: dict of equal-length arrays keyed by COLUMNS (see
+          ``columns_from_records``). Manual-mode columns are optional.
+    max_volume_krw: global max volume (the GUI's GLOBAL_MAX_VOLUME_KRW).
+    N: portfolio units, defaults to PORTFOLIO_N.
+
+    Total deployment is summed once in portfolio order instead of once per
+    stock, which is what makes the sheet O(n).
+
+    Returns: dict of arrays using compute_state's keys; "sell_targets" is an
+    (n, 2) array and the auto sell gear is split into "gear", "penalty" and
+    "base_step". "total_u", "total_units" and "remaining_units" are scalars.
+    """
+    if N is None:
+        N = formulas.PORTFOLIO_N
+    avg_cost = np.asarray(cols["avg_cost"], dtype=float)
+    n = avg_cost.shape[0]
+    num_shares = np.asarray(cols["num_shares"], dtype=float)
+    is_us = np.asarray(cols["market"], dtype=object) == "US"
+    fx_rate = np.asarray(cols["fx_rate"], dtype=float)
+    g_score = np.asarray(cols["g_score"], dtype=float)
+    l_score = np.asarray(cols["l_score"], dtype=float)
+    v_score = np.asarray(cols["v_score"], dtype=float)
+    current_price = np.asarray(cols["current_price"], dtype=float)
+    high_10d = np.asarray(cols["high_10d"], dtype=float)
+    low_today = np.asarray(cols["low_today"], dtype=float)
+    manual_sell_mode = np.asarray(cols.get("manual_sell_mode", np.zeros(n)), dtype=bool)
+    manual_sell_step = np.asarray(cols.get("manual_sell_step", np.zeros(n)), dtype=float)
+    manual_load_mode = np.asarray(cols.get("manual_load_mode", np.zeros(n)), dtype=bool)
+    manual_load_drop = np.asarray(cols.get("manual_load_drop", np.zeros(n)), dtype=float)
+    rescue_mode = np.asarray(cols.get("manual_rescue_mode", np.full(n, "AUTO", dtype=object)), dtype=object)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Units (compute_units_held)
+        unit_size_krw = (max_volume_krw / N) if max_volume_krw and N else 0.0
+        position_krw = np.where(is_us, avg_cost * num_shares * fx_rate, avg_cost * num_shares)
+        units_held = position_krw / unit_size_krw if unit_size_krw else np.zeros(n)
+        unit_size_local = np.where(is_us & (fx_rate != 0), unit_size_krw / fx_rate, unit_size_krw)
+
+        # LOAD
+        trend = formulas.compute_trend(g_score, l_score)
+        auto_load_drop_pct = np.clip(
+            formulas.LOAD_DROP_BASE - formulas.LOAD_DROP_T_COEF * trend + formulas.LOAD_DROP_V_COEF * v_score,
+            3.0,
+            8.0,
+        )
+        manual_load = manual_load_mode & (manual_load_drop > 0)
+        load_drop_pct = np.where(manual_load, np.clip(manual_load_drop, 3.0, 7.0), auto_load_drop_pct)
+        high_ref = np.where(high_10d > 0, high_10d, 0.0)
+        load_trigger = np.where(high_ref != 0, high_ref * (1 - load_drop_pct / 100), 0.0)
+
+        # Deployment (compute_total_deployment, once for the whole sheet)
+        total_current = sum(position_krw.tolist())
+        total_u = total_current / max_volume_krw if max_volume_krw else 0.0
+        total_units = total_u * N if N else 0.0
+        remaining_units = max(0.0, N - total_units) if N else 0.0
+
+        price_check = np.where(low_today > 0, low_today, current_price)
+        triggered = (price_check > 0) & (load_trigger > 0) & (price_check <= load_trigger)
+        if remaining_units <= 0:
+            capacity_status = "Blocked (portfolio full)"
+        elif remaining_units < 1.0:
+            capacity_status = "Blocked (capacity<1u)"
+        else:
+            capacity_status = None
+        load_status = np.select(
+            [high_ref <= 0, units_held > 0, np.full(n, capacity_status is not None), triggered],
+            ["Waiting for high", "Blocked (units>0)", capacity_status or "", "ACTIVE"],
+            default="Watching",
+        ).astype(object)
+
+        # RESCUE
+        auto_drop, auto_r, auto_gear_r = rescue_gear_batch(units_held, N)
+        is_auto = rescue_mode == "AUTO"
+        preset_key = np.where(is_auto, "DEFAULT", np.where(np.isin(rescue_mode, list(formulas.RESCUE_PRESETS)), rescue_mode, "DEFAULT"))
+        preset_drop = np.array([formulas.RESCUE_PRESETS[k][0] for k in preset_key], dtype=float)
+        preset_r = np.array([formulas.RESCUE_PRESETS[k][1] for k in preset_key], dtype=float)
+        preset_gear = np.array([formulas.RESCUE_PRESETS[k][2] for k in preset_key], dtype=float)
+        held = units_held > 0
+        rescue_drop_pct = np.where(is_auto, np.where(held, auto_drop, 0.0), preset_drop)
+        rescue_r = np.where(is_auto, np.where(held, auto_r, 0.0), preset_r)
+        rescue_gear = np.where(is_auto, np.where(held, auto_gear_r, 0.0), preset_gear)
+        rescue_trigger = np.where(held, avg_cost * (1 - rescue_drop_pct / 100), avg_cost)
+        rescue_qty = units_held * rescue_r
+        if N and N > 0:
+            rescue_qty = np.minimum(rescue_qty, max(0.0, N - total_units))
+        rescue_qty = np.where(held, rescue_qty, 0.0)
+
+        # Sell (compute_auto_gear + compute_sell_targets_v1_4)
+        gear, penalty, base_step = auto_gear_batch(trend, total_u)
+        active_step = np.where(manual_sell_mode, 1.0 + np.maximum(manual_sell_step, 0.0), base_step)
+        sell_targets = np.column_stack(
+            (avg_cost * (1 + 1.0 * active_step / 100), avg_cost * (1 + 2.0 * active_step / 100))
+        )
+
+        # Next buy (LOAD when empty, RESCUE otherwise)
+        load_units = np.where((load_trigger > 0) & (remaining_units >= 1.0), 1.0, 0.0)
+        buy_units = np.where(held, rescue_qty, load_units)
+        buy_price = np.where(held, rescue_trigger, load_trigger)
+        buy_drop_pct = np.where(held, rescue_drop_pct, load_drop_pct)
+        buy_r = np.where(held, rescue_r, 0.0)
+        buy_gear = np.where(held, rescue_gear, 0.0)
+        buy_value_local = np.where(unit_size_local != 0, buy_units * unit_size_local, 0.0)
+        can_buy = (buy_price != 0) & (buy_units > 0) & (buy_value_local > 0)
+        buy_shares = np.where(can_buy, np.maximum(1.0, np.floor(buy_value_local / buy_price + 0.5)), 0.0)
+        total_shares = num_shares + buy_shares
+        projected_avg = np.where(
+            (buy_shares != 0) & (total_shares != 0),
+            (avg_cost * num_shares + buy_price * buy_shares) / total_shares,
+            0.0,
+        )
+
+    buy_label = np.array(
+        [
+            ("LOAD" if not h else f"Rescue {k.title()}" if not a else f"G{g:.1f}" if g else "RESCUE")
+            for h, a, k, g in zip(held.tolist(), is_auto.tolist(), preset_key.tolist(), rescue_gear.tolist())
+        ],
+        dtype=object,
+    )
+
+    return {
+        "units_held": units_held,
+        "unit_size_local": unit_size_local,
+        "position_krw": position_krw,
+        "trend": trend,
+        "load_drop_pct": load_drop_pct,
+        "load_mode": np.where(manual_load, "Manual", "Auto").astype(object),
+        "high_ref": high_ref,
+        "load_trigger": load_trigger,
+        "load_status": load_status,
+        "rescue_trigger": rescue_trigger,
+        "rescue_qty": rescue_qty,
+        "rescue_gear": rescue_gear,
+        "rescue_drop_pct": rescue_drop_pct,
+        "rescue_r": rescue_r,
+        "rescue_mode": np.where(is_auto, "Auto", np.char.title(preset_key.astype(str))).astype(object),
+        "buy_units": buy_units,
+        "buy_price": buy_price,
+        "buy_drop_pct": buy_drop_pct,
+        "buy_r": buy_r,
+        "buy_gear": buy_gear,
+        "buy_label": buy_label,
+        "buy_value_local": buy_value_local,
+        "buy_shares": buy_shares.astype(int),
+        "projected_avg": projected_avg,
+        "projected_units": units_held + buy_units,
+        "projected_shares": total_shares.astype(int),
+        "gear": gear,
+        "penalty": penalty.item(),
+        "base_step": base_step,
+        "sell_mode": np.where(manual_sell_mode, "Manual", "Auto").astype(object),
+        "active_step": active_step,
+        "sell_targets": sell_targets,
+        "total_u": total_u,
+        "total_units": total_units,
+        "remaining_units": remaining_units,
+    }
+
+
+def batch_states(records, order, fx_rate, max_volume_krw, N=None):
+    """
+    ``compute_state`` for every stock in ``order`` from one batch pass.
+
+    Returns: list of dicts in ``order`` with compute_state's keys, plus the
+    parsed inputs the sheet and the overview read ("market", "avg_cost",
+    "num_shares", "fx_rate", "g_score", "l_score", "v_score") and the
+    batch's own per-stock "units_held", "unit_size_local" and "position_krw".
+    """
+    if N is None:
+        N = formulas.PORTFOLIO_N
+    cols = columns_from_records(records, order, fx_rate)
+    out = compute_state_batch(cols, max_volume_krw, N)
+    per_stock = [key for key, val in out.items() if isinstance(val, np.ndarray) and key != "sell_targets"]
+    arrays = {key: out[key].tolist() for key in per_stock}
+    inputs = {key: cols[key].tolist() for key in ("market", "avg_cost", "num_shares", "fx_rate", "g_score", "l_score", "v_score")}
+    sell_targets = out["sell_targets"].tolist()
+    states = []
+    for i, name in enumerate(order):
+        rec = records[name]
+        state = {key: vals[i] for key, vals in inputs.items()}
+        state.update((key, vals[i]) for key, vals in arrays.items())
+        high_5d = _to_float(rec.get("high_5d"))
+        state.update(
+            high_5d=high_5d,
+            high_10d=cols["high_10d"][i].item(),
+            high_ref_label=formulas.select_load_reference(high_5d, cols["high_10d"][i])[1],
+            current_price=cols["current_price"][i].item(),
+            low_today=cols["low_today"][i].item(),
+            high_today=_to_float(rec.get("high_today")),
+            last_update=rec.get("last_update", ""),
+            auto_gear={
+                "gear": state.pop("gear"),
+                "trend": state["trend"],
+                "penalty": out["penalty"],
+                "base_step": state.pop("base_step"),
+                "f": out["total_u"],
+            },
+            sell_targets=sell_targets[i],
+            total_u=out["total_u"],
+            total_units=out["total_units"],
+        )
+        states.append(state)
+    return states
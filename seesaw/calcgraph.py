@@ -0,0 +1,339 @@
+"""
+Incremental calculator as a dependency graph.
+
+``compute_state`` is split into named nodes (trend, load_trigger,
+auto_gear, rescue, next buy, sell_targets, projected position, ...). The
+node functions are the same step functions compute_state chains together
+(seesaw.state), so the graph is a second schedule for one pipeline, not a
+second copy of it. ``CalcGraph`` evaluates nodes lazily and recomputes a node
+only when one of its inputs changed since its last evaluation. A node whose
+recomputed value comes out equal stops the change from spreading: a new
+price moves the LOAD status but leaves trend, gear and the sell targets
+untouched.
+
+Every recomputation records which of its inputs had changed, so
+``why(node)`` can trace an output back to the leaf inputs (G/L, price, FX,
+...) that drove its last change. ``inputs_of(node)`` lists every leaf the
+node depends on.
+
+The formulas read their tuning constants at call time; after changing
+those (see ``sweep.override_params``), start from a fresh graph.
+"""
+
+from seesaw import formulas, portfolio
+from seesaw.formulas import (
+    compute_auto_gear,
+    compute_load_trigger,
+    compute_position_value_krw,
+    compute_sell_targets_v1_4,
+    compute_trend,
+    compute_units_held,
+    select_load_reference,
+)
+from seesaw.state import (
+    compute_capacity,
+    compute_load_status,
+    compute_rescue,
+    load_trigger_price,
+    local_unit_size,
+    next_buy,
+    project_position,
+    read_market_fields,
+    rescue_override,
+    select_load_drop,
+    select_sell_step,
+    size_buy,
+)
+
+INPUTS = (
+    "avg_cost",
+    "num_shares",
+    "max_volume",
+    "market",
+    "fx_rate",
+    "g_score",
+    "l_score",
+    "v_score",
+    "manual_mode",
+    "manual_step",
+    "manual_load_mode",
+    "manual_load_drop",
+    "manual_rescue_mode",
+    "current_price",
+    "high_5d",
+    "high_10d",
+    "low_today",
+    "high_today",
+    "last_update",
+    "N",
+    "deployed_others",  # KRW deployed by every other stock
+    "total_max",  # KRW max volume used for utilisation
+)
+
+
+class CalcGraph:
+    def __init__(self, nodes, inputs=()):
+        """
+        nodes: {name: (func, (input names))}; names that are not nodes are
+        leaf inputs, set with ``set_inputs``. ``inputs`` declares extra
+        leaves no node reads (values that are only passed through).
+        """
+        self._nodes = nodes
+        self._values = {}
+        self._changed = {}  # name -> revision its value last changed
+        self._computed = {}  # node -> revision it was last evaluated at
+        self._triggers = {}  # node -> inputs that changed before its last recompute
+        self._stale = set(nodes)  # nodes downstream of an input change, not yet re-checked
+        self._revision = 0
+        self.evaluations = 0  # node function calls so far
+        self.leaves = frozenset(inputs) | frozenset(i for _, deps in nodes.values() for i in deps if i not in nodes)
+        self._dependents = {}
+        for name, (_, deps) in nodes.items():
+            for dep in deps:
+                self._dependents.setdefault(dep, []).append(name)
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == "done" or name not in self._nodes:
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for dep in self._nodes[name][1]:
+                visit(dep, path + [name])
+            state[name] = "done"
+
+        for name in self._nodes:
+            visit(name, [])
+
+    def set_inputs(self, values):
+        """
+        Update leaf inputs; equal values are ignored.
+
+        Returns: list of the input names that actually changed.
+        """
+        changed = []
+        for key, value in values.items():
+            if key not in self.leaves:
+                raise KeyError(f"{key!r} is not an input of this graph")
+            if key in self._values and self._values[key] == value:
+                continue
+            changed.append(key)
+        if changed:
+            self._revision += 1
+            for key in changed:
+                self._values[key] = values[key]
+                self._changed[key] = self._revision
+                self._mark_stale(key)
+        return changed
+
+    def _mark_stale(self, name):
+        for dep in self._dependents.get(name, ()):
+            if dep not in self._stale:
+                self._stale.add(dep)
+                self._mark_stale(dep)
+
+    def get(self, name):
+        """Returns: the value of ``name``, recomputing stale nodes upstream first."""
+        if name not in self._nodes:
+            if name not in self._values:
+                raise KeyError(f"input {name!r} has not been set")
+            return self._values[name]
+        if name not in self._stale:
+            return self._values[name]
+        func, inputs = self._nodes[name]
+        args = [self.get(i) for i in inputs]
+        last = self._computed.get(name)
+        # Stale only means "downstream of a change"; inputs that recomputed to equal values do not count.
+        triggers = list(inputs) if last is None else [i for i in inputs if self._changed[i] > last]
+        if triggers:
+            value = func(*args)
+            self.evaluations += 1
+            self._computed[name] = self._revision
+            self._triggers[name] = triggers
+            if name not in self._values or self._values[name] != value:
+                self._values[name] = value
+                self._changed[name] = self._revision
+        self._stale.discard(name)
+        return self._values[name]
+
+    def inputs_of(self, name):
+        """Returns: every leaf input ``name`` depends on."""
+        if name not in self._nodes:
+            return {name}
+        leaves = set()
+        for dep in self._nodes[name][1]:
+            leaves |= self.inputs_of(dep)
+        return leaves
+
+    def why(self, name):
+        """
+        Returns: the leaf inputs whose changes caused the last recomputation
+        of ``name`` (traced through the intermediate nodes' own triggers).
+        """
+        if name not in self._nodes:
+            return {name}
+        leaves = set()
+        for dep in self._triggers.get(name, ()):
+            leaves |= self.why(dep)
+        return leaves
+
+
+# ---- compute_state as nodes ----
+
+
+def _units(avg_cost, num_shares, max_volume, market, fx_rate, N):
+    # The unit size is max_volume / formulas.PORTFOLIO_N; N is an input so a change of N recomputes it.
+    return compute_units_held(avg_cost, num_shares, max_volume, market, fx_rate)
+
+
+def _pick(index):
+    return lambda value: value[index]
+
+
+STATE_NODES = {
+    "trend": (compute_trend, ("g_score", "l_score")),
+    "auto_load_drop_pct": (compute_load_trigger, ("trend", "v_score")),
+    "load_drop": (select_load_drop, ("auto_load_drop_pct", "manual_load_mode", "manual_load_drop")),
+    "load_drop_pct": (_pick(0), ("load_drop",)),
+    "load_mode": (_pick(1), ("load_drop",)),
+    "load_reference": (select_load_reference, ("high_5d", "high_10d")),
+    "high_ref": (_pick(0), ("load_reference",)),
+    "high_ref_label": (_pick(1), ("load_reference",)),
+    "load_trigger": (load_trigger_price, ("high_ref", "load_drop_pct")),
+    "units": (_units, ("avg_cost", "num_shares", "max_volume", "market", "fx_rate", "N")),
+    "units_held": (_pick(0), ("units",)),
+    "unit_size_krw": (_pick(1), ("units",)),
+    "unit_size_local": (local_unit_size, ("unit_size_krw", "market", "fx_rate")),
+    "position_krw": (compute_position_value_krw, ("avg_cost", "num_shares", "market", "fx_rate")),
+    "total_current": (lambda position, others: position + others, ("position_krw", "deployed_others")),
+    "capacity": (compute_capacity, ("total_current", "total_max", "N")),
+    "total_u": (_pick(0), ("capacity",)),
+    "total_units": (_pick(1), ("capacity",)),
+    "remaining_units": (_pick(2), ("capacity",)),
+    "load_status": (
+        compute_load_status,
+        ("high_ref", "units_held", "remaining_units", "low_today", "current_price", "load_trigger"),
+    ),
+    "rescue_preset": (rescue_override, ("manual_rescue_mode",)),
+    "rescue_override": (_pick(0), ("rescue_preset",)),
+    "rescue_mode": (_pick(1), ("rescue_preset",)),
+    "rescue": (compute_rescue, ("avg_cost", "units_held", "total_units", "N", "rescue_override")),
+    "rescue_trigger": (_pick(0), ("rescue",)),
+    "rescue_qty": (_pick(1), ("rescue",)),
+    "rescue_gear": (_pick(2), ("rescue",)),
+    "rescue_drop_pct": (_pick(3), ("rescue",)),
+    "rescue_r": (_pick(4), ("rescue",)),
+    "auto_gear": (compute_auto_gear, ("g_score", "l_score", "total_u")),
+    "base_step": (lambda gear: gear["base_step"], ("auto_gear",)),
+    "sell_step": (select_sell_step, ("manual_mode", "manual_step", "base_step")),
+    "active_step": (_pick(0), ("sell_step",)),
+    "sell_mode": (_pick(1), ("sell_step",)),
+    "sell_targets": (compute_sell_targets_v1_4, ("avg_cost", "active_step")),
+    "buy": (next_buy, ("units_held", "load_trigger", "remaining_units", "load_drop_pct", "rescue", "rescue_preset")),
+    "buy_units": (_pick(0), ("buy",)),
+    "buy_price": (_pick(1), ("buy",)),
+    "buy_drop_pct": (_pick(2), ("buy",)),
+    "buy_r": (_pick(3), ("buy",)),
+    "buy_gear": (_pick(4), ("buy",)),
+    "buy_label": (_pick(5), ("buy",)),
+    "buy_size": (size_buy, ("buy_units", "buy_price", "unit_size_local")),
+    "buy_value_local": (_pick(0), ("buy_size",)),
+    "buy_shares": (_pick(1), ("buy_size",)),
+    "projected": (project_position, ("avg_cost", "num_shares", "buy_price", "buy_shares")),
+    "projected_avg": (_pick(0), ("projected",)),
+    "projected_units": (lambda units, buy_units: units + buy_units, ("units_held", "buy_units")),
+    "projected_shares": (_pick(1), ("projected",)),
+}
+
+# compute_state()'s result keys; inputs among them are passed through.
+STATE_KEYS = (
+    "trend",
+    "load_drop_pct",
+    "load_mode",
+    "high_5d",
+    "high_10d",
+    "high_ref",
+    "high_ref_label",
+    "load_trigger",
+    "load_status",
+    "current_price",
+    "low_today",
+    "high_today",
+    "last_update",
+    "rescue_trigger",
+    "rescue_qty",
+    "rescue_gear",
+    "rescue_drop_pct",
+    "rescue_r",
+    "rescue_mode",
+    "buy_units",
+    "buy_price",
+    "buy_drop_pct",
+    "buy_r",
+    "buy_gear",
+    "buy_label",
+    "buy_value_local",
+    "buy_shares",
+    "projected_avg",
+    "projected_units",
+    "projected_shares",
+    "auto_gear",
+    "sell_mode",
+    "active_step",
+    "sell_targets",
+    "total_u",
+    "total_units",
+)
+
+
+def state_graph():
+    """Returns: a CalcGraph computing compute_state() for one stock."""
+    return CalcGraph(STATE_NODES, INPUTS)
+
+
+def graph_inputs(parsed, rec, current_name):
+    """Returns: {INPUTS: value} for the same arguments compute_state() takes."""
+    values = read_market_fields(rec)
+    values.update({key: parsed[key] for key in INPUTS if key in parsed})
+    values.update(
+        last_update=rec.get("last_update", ""),
+        N=formulas.PORTFOLIO_N,
+        deployed_others=portfolio.deployment.total_excluding(current_name),
+        total_max=portfolio.GLOBAL_MAX_VOLUME_KRW or parsed["max_volume"],
+    )
+    return values
+
+
+def graph_state(graph):
+    """Returns: compute_state()-shaped dict read from ``graph``."""
+    return {key: graph.get(key) for key in STATE_KEYS}
+
+
+class StateGraphs:
+    """One state graph per stock, fed with fresh inputs on every compute."""
+
+    def __init__(self):
+        self.graphs = {}
+
+    def compute(self, parsed, rec, current_name):
+        """Drop-in for compute_state(); only nodes downstream of changed inputs are recomputed."""
+        graph = self.graphs.get(current_name)
+        if graph is None:
+            graph = self.graphs[current_name] = state_graph()
+        graph.set_inputs(graph_inputs(parsed, rec, current_name))
+        return graph_state(graph)
+
+    def why(self, current_name, node):
+        """Returns: the inputs that drove the last change of ``node`` for one stock."""
+        graph = self.graphs.get(current_name)
+        return graph.why(node) if graph is not None else set()
+
+    def discard(self, current_name=None):
+        if current_name is None:
+            self.graphs.clear()
+        else:
+            self.graphs.pop(current_name, None)
@@ -0,0 +1,160 @@
+"""
+Price-level chart.
+
+The axes, one line plus two labels per level slot and one line plus label
+per gap annotation are created once. Each update only moves those artists
+(y-data, label text/position/colour), hides the slots it does not need and
+asks the canvas for an idle redraw, instead of clearing and rebuilding the
+figure. Works with any matplotlib canvas (TkAgg in the GUI, Agg headless).
+"""
+
+from seesaw.display import fmt_compact, fmt_or_na
+
+RESCUE_GEAR_COLORS = {
+    1: "#ff9800",  # orange
+    2: "#d32f2f",  # red
+    3: "#8b5a2b",  # brown
+}
+
+# High context, current, avg cost, buy, projected avg, sell T1, sell T2
+LEVEL_SLOTS = 7
+# Buy gap, projected gap, two sell gaps
+GAP_SLOTS = 4
+
+X_START, X_END = 0.0, 1.0
+TEXT_STYLE = {"va": "center", "fontsize": 9}
+
+
+class LevelChart:
+    def __init__(self, fig, canvas=None):
+        self.fig = fig
+        self.canvas = canvas or fig.canvas
+        fig.clear()
+        ax = self.ax = fig.add_subplot(111)
+        self.levels = []
+        for _ in range(LEVEL_SLOTS):
+            line, = ax.plot([X_START, X_END], [0.0, 0.0], visible=False)
+            left = ax.text(X_START + 0.01, 0.0, "", ha="left", backgroundcolor="white", visible=False, **TEXT_STYLE)
+            right = ax.text(X_END - 0.01, 0.0, "", ha="right", backgroundcolor="white", visible=False, **TEXT_STYLE)
+            self.levels.append((line, left, right))
+        self.gaps = []
+        for _ in range(GAP_SLOTS):
+            line, = ax.plot([0.0, 0.0], [0.0, 0.0], linestyle="--", linewidth=1.0, visible=False)
+            text = ax.text(0.0, 0.0, "", ha="left", visible=False, **TEXT_STYLE)
+            self.gaps.append((line, text))
+
+        ax.set_xlim(X_START, X_END)
+        ax.set_xticks([])
+        ax.set_ylabel("Price")
+        ax.grid(False)
+        ax.spines["top"].set_visible(False)
+        ax.spines["right"].set_visible(False)
+        ax.spines["bottom"].set_visible(False)
+
+    def plot_levels(
+        self,
+        name,
+        market,
+        avg_cost,
+        units_held,
+        current_price,
+        high_context,
+        high_context_label,
+        rescue_gear,
+        rescue_r,
+        buy_price,
+        buy_label,
+        buy_drop_pct,
+        buy_units,
+        buy_shares,
+        projected_avg,
+        projected_units,
+        projected_shares,
+        sell_targets,
+        sell_step,
+    ):
+        fmt_val = lambda val: fmt_or_na(val, market)
+        levels = []
+
+        if high_context and high_context > 0:
+            levels.append((high_context_label, high_context, "#777777", ":", "", fmt_val(high_context), 1.4))
+        if current_price and current_price > 0:
+            levels.append(("Current", current_price, "#333333", "--", "", fmt_val(current_price), 2.0))
+        if avg_cost and avg_cost > 0:
+            levels.append(("Avg cost", avg_cost, "black", "-", f"units {units_held:.2f}", fmt_val(avg_cost), 3.0))
+        if buy_price and buy_price > 0 and buy_units > 0:
+            if units_held <= 0:
+                color = "#c62828"
+                left_text = f"-{buy_drop_pct:.1f}% {buy_units:.2f}u ~ {buy_shares} sh"
+                label = "LOAD"
+            else:
+                gear_key = int(round(rescue_gear)) if rescue_gear else 0
+                color = RESCUE_GEAR_COLORS.get(gear_key, "#d32f2f")
+                rescue_text = buy_label.replace("Rescue ", "")
+                left_text = (
+                    f"{rescue_text} (-{fmt_compact(buy_drop_pct)}%, r={fmt_compact(rescue_r)}) "
+                    f"{buy_units:.2f}u ~ {buy_shares} sh"
+                )
+                label = f"Buy {buy_label}"
+            levels.append((label, buy_price, color, "-", left_text, fmt_val(buy_price), 2.6))
+        if projected_avg and projected_avg > 0 and avg_cost and avg_cost > 0:
+            proj_text = f"units {projected_units:.2f}, sh {projected_shares}" if projected_shares else ""
+            levels.append(("Projected avg", projected_avg, "#999999", "--", proj_text, fmt_val(projected_avg), 1.6))
+        if avg_cost and avg_cost > 0 and sell_targets:
+            levels.append(("Sell T1 (50%)", sell_targets[0], "#0a8f08", "-", f"+{sell_step:.1f}%", fmt_val(sell_targets[0]), 2.6))
+            levels.append(("Sell T2 (50%)", sell_targets[1], "#0066cc", "-.", f"+{2*sell_step:.1f}%", fmt_val(sell_targets[1]), 2.2))
+
+        gaps = []
+        if avg_cost and avg_cost > 0 and buy_price and buy_price > 0:
+            gaps.append((0.5, buy_price, avg_cost, f"-{buy_drop_pct:.1f}%", "#c62828"))
+        if buy_price and projected_avg and projected_avg > 0 and buy_price != projected_avg:
+            proj_gap_pct = ((projected_avg - buy_price) / buy_price * 100) if buy_price else 0.0
+            gaps.append((0.72, buy_price, projected_avg, f"+{proj_gap_pct:.1f}%", "#777777"))
+        if avg_cost and avg_cost > 0 and sell_targets:
+            gaps.append((0.85, avg_cost, sell_targets[0], f"+{sell_step:.1f}%", "#0066cc"))
+            gaps.append((0.85, sell_targets[0], sell_targets[1], f"+{sell_step:.1f}%", "#0066cc"))
+
+        for i, (line, left, right) in enumerate(self.levels):
+            if i >= len(levels):
+                line.set_visible(False)
+                left.set_visible(False)
+                right.set_visible(False)
+                continue
+            label, y, color, style, left_text, right_text, lw = levels[i]
+            line.set_ydata([y, y])
+            line.set_color(color)
+            line.set_linestyle(style)
+            line.set_linewidth(lw)
+            left.set_y(y)
+            left.set_text(f"{label} ({left_text})" if left_text else label)
+            left.set_color(color)
+            right.set_y(y)
+            right.set_text(right_text)
+            right.set_color(color)
+            for artist in (line, left, right):
+                artist.set_visible(True)
+
+        for i, (line, text) in enumerate(self.gaps):
+            if i >= len(gaps):
+                line.set_visible(False)
+                text.set_visible(False)
+                continue
+            x, y0, y1, label, color = gaps[i]
+            line.set_data([x, x], [y0, y1])
+            line.set_color(color)
+            text.set_position((x + 0.01, (y0 + y1) / 2))
+            text.set_text(label)
+            text.set_color(color)
+            line.set_visible(True)
+            text.set_visible(True)
+
+        if levels:
+            prices = [lvl[1] for lvl in levels]
+            ymin = min(prices)
+            ymax = max(prices)
+            pad = (ymax - ymin) * 0.1 if ymax != ymin else max(1, ymax * 0.1)
+            self.ax.set_ylim(ymin - pad, ymax + pad)
+        else:
+            self.ax.set_ylim(0.0, 1.0)
+        self.ax.set_title(name or "")
+        self.canvas.draw_idle()
@@ -0,0 +1,89 @@
+"""
+Running portfolio deployment aggregate.
+
+``compute_total_deployment`` used to walk every record and re-parse
+avg_cost/num_shares/fx_rate on each display refresh. The aggregate keeps
+one parsed cost value per stock plus a KR subtotal (KRW) and a US subtotal
+(USD), so saves, deletes and FX changes are O(1) and the total is read
+without touching the other records.
+"""
+
+
+def _to_float(val):
+    try:
+        return float(val or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def position_cost_local(rec):
+    """Cost basis of one record in its own currency (avg_cost * num_shares)."""
+    return _to_float(rec.get("avg_cost")) * _to_float(rec.get("num_shares"))
+
+
+class DeploymentAggregate:
+    """
+    Deployed capital per division, updated incrementally.
+
+    US positions are held in USD and converted with the single portfolio FX
+    rate on read, so an FX change does not need to revisit any record.
+    """
+
+    def __init__(self, fx_rate=1.0):
+        self.fx_rate = fx_rate
+        self._positions = {}  # name -> (market, cost in local currency)
+        self._subtotals = {"KR": 0.0, "US": 0.0}
+
+    def rebuild(self, records, fx_rate=None):
+        if fx_rate is not None:
+            self.fx_rate = fx_rate
+        self._positions = {}
+        self._subtotals = {"KR": 0.0, "US": 0.0}
+        for name, rec in records.items():
+            self.update(name, rec)
+
+    def update(self, name, rec):
+        market = "US" if rec.get("market", "KR") == "US" else "KR"
+        self._discard(name)
+        cost = position_cost_local(rec)
+        self._positions[name] = (market, cost)
+        self._subtotals[market] += cost
+
+    def remove(self, name):
+        self._discard(name)
+        self._positions.pop(name, None)
+
+    def set_fx(self, fx_rate):
+        self.fx_rate = fx_rate
+
+    def _discard(self, name):
+        prev = self._positions.get(name)
+        if prev is None:
+            return
+        market, cost = prev
+        self._subtotals[market] -= cost
+        if len(self._positions) == 1:
+            # Reset accumulated rounding once the book is empty again.
+            self._subtotals = {"KR": 0.0, "US": 0.0}
+
+    def position_krw(self, name):
+        market, cost = self._positions.get(name, ("KR", 0.0))
+        return cost * self.fx_rate if market == "US" else cost
+
+    def division_totals(self):
+        """Returns: {"KR": krw, "US": krw, "US_USD": usd} subtotals."""
+        us_usd = self._subtotals["US"]
+        return {"KR": self._subtotals["KR"], "US": us_usd * self.fx_rate, "US_USD": us_usd}
+
+    def total_krw(self):
+        return self._subtotals["KR"] + self._subtotals["US"] * self.fx_rate
+
+    def total_excluding(self, name):
+        return self.total_krw() - self.position_krw(name)
+
+    def total_units(self, max_volume_krw, N):
+        total_u = self.total_krw() / max_volume_krw if max_volume_krw else 0.0
+        return total_u * N if N else 0.0
+
+    def __len__(self):
+        return len(self._positions)
@@ -0,0 +1,36 @@
+"""Number formatting shared by the GUI, chart and reports."""
+
+
+def fmt_money(val, market="KR"):
+    try:
+        val = float(val)
+        if market == "US":
+            return f"${val:,.2f}"
+        return f"₩{val:,.0f}"
+    except (TypeError, ValueError):
+        return ""
+
+
+def fmt_or_na(val, market="KR"):
+    formatted = fmt_money(val, market)
+    return formatted if formatted else "N/A"
+
+
+def fmt_compact(val):
+    try:
+        text = f"{float(val):.2f}"
+        return text.rstrip("0").rstrip(".")
+    except (TypeError, ValueError):
+        return ""
+
+
+def format_input(val, market="KR", is_money=True, decimals=2):
+    try:
+        val = float(val)
+        if is_money:
+            if market == "US":
+                return f"{val:,.{decimals}f}"
+            return f"{val:,.0f}"
+        return f"{val:,.{decimals}f}"
+    except (TypeError, ValueError):
+        return ""
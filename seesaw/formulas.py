@@ -0,0 +1,217 @@
+"""
+Pure v1.4 formulas shared by the GUI and the batch tools.
+
+Nothing in here imports Tk, matplotlib or numpy, so scripts and worker
+processes can use the formulas without paying GUI startup cost.
+"""
+
+from math import ceil
+
+PORTFOLIO_N = 25  # Total units across all stocks
+LOAD_REF_DAYS = 5
+HIGH_CONTEXT_DAYS = 10
+
+# LOAD drop% = LOAD_DROP_BASE - LOAD_DROP_T_COEF*T + LOAD_DROP_V_COEF*V
+LOAD_DROP_BASE = 6.0
+LOAD_DROP_T_COEF = 0.6
+LOAD_DROP_V_COEF = 0.5
+
+RESCUE_U_SAT = 10.0
+RESCUE_DROP_MIN = 4.0
+RESCUE_DROP_SPAN = 2.0
+RESCUE_R_MIN = 0.5
+RESCUE_R_SPAN = 0.2
+MAX_STOCK_SHARE = 0.6  # Per-stock concentration limit (fraction of N)
+
+# V score, Method B (manual 3.3): annualized volatility of the last
+# VOL_WINDOW_DAYS daily simple returns, banded as (upper bound %, V)
+VOL_WINDOW_DAYS = 60
+V_SCORE_BANDS = ((25.0, 0.0), (30.0, 0.5), (35.0, 1.0), (40.0, 1.5))
+V_SCORE_MAX = 2.0
+
+# Module constants a parameter sweep may override (see seesaw.sweep)
+TUNABLE_PARAMS = (
+    "PORTFOLIO_N",
+    "LOAD_DROP_BASE",
+    "LOAD_DROP_T_COEF",
+    "LOAD_DROP_V_COEF",
+    "RESCUE_U_SAT",
+    "RESCUE_DROP_MIN",
+    "RESCUE_DROP_SPAN",
+    "RESCUE_R_MIN",
+    "RESCUE_R_SPAN",
+)
+
+# Manual rescue presets: mode -> (drop_pct, r, gear)
+RESCUE_PRESETS = {
+    "LIGHT": (4.0, 0.5, 1),
+    "DEFAULT": (5.0, 0.6, 2),
+    "HEAVY": (6.0, 0.7, 3),
+}
+RESCUE_MODES = ("AUTO", "DEFAULT", "HEAVY", "LIGHT")
+
+
+def compute_unit_size_krw(max_volume_krw):
+    return (max_volume_krw / PORTFOLIO_N) if max_volume_krw and PORTFOLIO_N else 0.0
+
+
+def compute_max_units_per_stock(N):
+    return ceil(MAX_STOCK_SHARE * N) if N and N > 0 else 0
+
+
+def compute_position_value_krw(avg_cost, num_shares, market, fx_rate):
+    if market == "US":
+        return avg_cost * num_shares * fx_rate
+    return avg_cost * num_shares
+
+
+def compute_units_held(avg_cost, num_shares, max_volume_krw, market, fx_rate):
+    unit_size_krw = compute_unit_size_krw(max_volume_krw)
+    position_krw = compute_position_value_krw(avg_cost, num_shares, market, fx_rate)
+    units = position_krw / unit_size_krw if unit_size_krw else 0.0
+    return units, unit_size_krw, position_krw
+
+
+# ===== v1.4 CALCULATION FUNCTIONS =====
+
+def compute_load_trigger(T, V):
+    """
+    LOAD entry threshold based on trend and volatility (v1.4).
+
+    T = (3*L + 2*G) / 5 (Trend score)
+    Drop% = 6.0 - 0.6*T + 0.5*V  [clamped to 3-8%]
+
+    Returns: drop percentage (float)
+    """
+    drop_pct = LOAD_DROP_BASE - LOAD_DROP_T_COEF * T + LOAD_DROP_V_COEF * V
+    drop_pct = max(3.0, min(8.0, drop_pct))
+    return drop_pct
+
+
+def compute_load_entry_price(high_5d, T, V):
+    """
+    Calculate LOAD entry price from 5-day high.
+
+    Entry price = high_5d * (1 - drop_pct/100)
+
+    Returns: entry trigger price (float)
+    """
+    drop_pct = compute_load_trigger(T, V)
+    return high_5d * (1 - drop_pct / 100)
+
+
+def round_half_up(val):
+    return int(val + 0.5)
+
+
+def get_rescue_gear(units_held, N):
+    """
+    Determine RESCUE gear based on position size (v1.3.7 smooth transmission).
+
+    Smooth ramp based on deployed units:
+      - U_sat=10.0 (or N if smaller)
+      - drop_pct = 4.0 + 2.0 * t
+      - r = 0.5 + 0.2 * t
+      - gear = 1.0 + 2.0 * t
+      - t = clamp(0, (units-1)/(U_sat-1), 1)
+
+    Returns: (drop_pct, r, gear) tuple
+    """
+    u_sat = RESCUE_U_SAT
+    if N and N > 0:
+        u_sat = min(RESCUE_U_SAT, float(N))
+    if u_sat <= 1.0:
+        t = 1.0
+    else:
+        t = (units_held - 1.0) / (u_sat - 1.0)
+    t = max(0.0, min(1.0, t))
+
+    drop_pct = RESCUE_DROP_MIN + RESCUE_DROP_SPAN * t
+    r = RESCUE_R_MIN + RESCUE_R_SPAN * t
+    gear = 1.0 + 2.0 * t
+    return drop_pct, r, gear
+
+
+def compute_rescue_trigger(avg_cost, units_held, total_units, N, drop_pct=None, r=None, gear=None):
+    """
+    RESCUE trigger price and buy quantity (v1.4).
+
+    Returns: (trigger_price, buy_units, gear, drop_pct, r) tuple
+    """
+    if units_held <= 0:
+        return avg_cost, 0, 0, 0.0, 0.0  # LOAD only when empty
+
+    if drop_pct is None or r is None:
+        drop_pct, r, gear = get_rescue_gear(units_held, N)
+    trigger_price = avg_cost * (1 - drop_pct / 100)
+
+    buy_units = units_held * r
+    if N and N > 0:
+        remaining_units = max(0.0, N - total_units)
+        buy_units = min(buy_units, remaining_units)
+
+    return trigger_price, buy_units, gear, drop_pct, r
+
+
+def compute_sell_targets_v1_4(avg_cost, s):
+    """
+    Unified 2-tier sell system (v1.4).
+
+    Tier 1: avg_cost * (1 + 1*s/100) - Sell 50%
+    Tier 2: avg_cost * (1 + 2*s/100) - Sell 50%
+
+    Returns: list of [tier1_price, tier2_price]
+    """
+    tier1 = avg_cost * (1 + 1.0 * s / 100)
+    tier2 = avg_cost * (1 + 2.0 * s / 100)
+    return [tier1, tier2]
+
+
+# ===== END v1.4 FUNCTIONS =====
+
+
+def v_score_from_vol(vol_pct):
+    """
+    V score from annualized volatility (Method B, manual 3.3).
+
+    <25% -> 0, <30% -> 0.5, <35% -> 1.0, <40% -> 1.5, otherwise 2.0
+
+    Returns: V score (float)
+    """
+    for upper, score in V_SCORE_BANDS:
+        if vol_pct < upper:
+            return score
+    return V_SCORE_MAX
+
+
+def compute_penalty(f):
+    if f <= 0.4:
+        return 0.0
+    return -3.0 * (f - 0.4) / 0.6
+
+
+def compute_trend(g_score, l_score):
+    return (3.0 * l_score + 2.0 * g_score) / 5.0
+
+
+def compute_auto_gear(g_score, l_score, f, quantize=True):
+    trend = compute_trend(g_score, l_score)
+    penalty = compute_penalty(f)
+    raw_gear = trend + penalty
+    gear = max(0.0, min(5.0, raw_gear))
+    if quantize:
+        gear = round(gear * 10.0) / 10.0
+    base_step = 1.0 + gear  # percent step for 2-tier ladder
+    return {
+        "gear": gear,
+        "trend": trend,
+        "penalty": penalty,
+        "base_step": base_step,
+        "f": f,
+    }
+
+
+def select_load_reference(high_5d, high_10d):
+    if high_10d and high_10d > 0:
+        return high_10d, "High 10d"
+    return 0.0, "High 10d"
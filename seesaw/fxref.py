@@ -0,0 +1,76 @@
+"""
+FX reference rate and Traffic Light (manual section 7).
+
+R_ref is the KRW-cost-weighted average FX of the USD holdings:
+total KRW paid / total USD cost. Each US position is a lot whose USD and
+KRW cost come from the trade ledger (every buy at its own fill FX, sells
+relieving cost at the average). The aggregate keeps one (usd, krw) pair per
+lot plus running totals, so a fill or a sale converted back to KRW updates
+R_ref in O(1), and reading it never revisits the holdings.
+
+The Traffic Light compares the current FX with R_ref: more than
+TRAFFIC_BAND_PCT above is GREEN for repatriating (US -> KR) and RED for
+reinforcing (KR -> US), within the band both are YELLOW, below it the
+colours swap.
+"""
+
+TRAFFIC_BAND_PCT = 2.0
+GREEN, YELLOW, RED = "GREEN", "YELLOW", "RED"
+
+
+class FxReference:
+    def __init__(self):
+        self._lots = {}  # name -> (usd cost, krw cost)
+        self.usd_cost = 0.0
+        self.krw_cost = 0.0
+
+    def set_lot(self, name, usd_cost, krw_cost):
+        """Replace one position's cost; a zero USD cost drops the lot."""
+        prev = self._lots.pop(name, None)
+        if prev is not None:
+            self.usd_cost -= prev[0]
+            self.krw_cost -= prev[1]
+        if usd_cost > 0:
+            self._lots[name] = (usd_cost, krw_cost)
+            self.usd_cost += usd_cost
+            self.krw_cost += krw_cost
+        if not self._lots:
+            # Reset accumulated rounding once no USD is held.
+            self.usd_cost = self.krw_cost = 0.0
+
+    def set_position(self, name, pos):
+        """Mirror a ledger Position (shares, avg_cost in USD, avg_cost_krw)."""
+        self.set_lot(name, pos.shares * pos.avg_cost, pos.shares * pos.avg_cost_krw)
+
+    def remove(self, name):
+        self.set_lot(name, 0.0, 0.0)
+
+    def clear(self):
+        self._lots.clear()
+        self.usd_cost = self.krw_cost = 0.0
+
+    def rate(self, spot=None):
+        """Returns: R_ref, or ``spot`` when no USD is held (as the manual does)."""
+        return self.krw_cost / self.usd_cost if self.usd_cost > 0 else spot
+
+    def __len__(self):
+        return len(self._lots)
+
+
+def traffic_light(fx, r_ref, band_pct=TRAFFIC_BAND_PCT):
+    """
+    Returns: {"deviation_pct", "repatriate", "reinforce"} for the current
+    FX against R_ref, or None without both rates.
+    """
+    if not fx or not r_ref:
+        return None
+    deviation = (fx / r_ref - 1) * 100
+    # Compare in KRW so a rate exactly on the band edge stays YELLOW (|FX - R_ref| <= 2%).
+    edge = r_ref * band_pct / 100
+    if fx - r_ref > edge:
+        repatriate, reinforce = GREEN, RED
+    elif r_ref - fx > edge:
+        repatriate, reinforce = RED, GREEN
+    else:
+        repatriate = reinforce = YELLOW
+    return {"deviation_pct": deviation, "repatriate": repatriate, "reinforce": reinforce}
@@ -0,0 +1,148 @@
+"""
+Event-sourced trade ledger.
+
+Every buy and sell is appended to the store's ``fills`` table with its date,
+price, quantity, FX rate and tag (LOAD/RESCUE for buys, T1/T2 for sells) and
+never rewritten. A stock's position (shares, average cost in local currency
+and in KRW, realized P&L and the sell-tier snapshot Q) is folded from its
+fills in O(1) per fill.
+
+Q follows the manual (5.3): the share count right after the last buy, kept
+through the tier sells and reset on a full exit.
+
+The folded positions are snapshotted every SNAPSHOT_EVERY fills, so startup
+reads the snapshot and replays only the fills recorded after it.
+"""
+
+import json
+from datetime import date as _date
+
+BUY_TAGS = ("LOAD", "RESCUE")
+SELL_TAGS = ("T1", "T2")
+SIDES = ("BUY", "SELL")
+SNAPSHOT_EVERY = 200  # fills between snapshots
+QTY_EPS = 1e-9  # shares below this count as a full exit
+
+
+class Position:
+    """One stock's running state; ``apply`` folds in a single fill."""
+
+    FIELDS = ("shares", "avg_cost", "avg_cost_krw", "realized_pnl", "realized_pnl_krw", "q", "fills", "last_date")
+
+    def __init__(self):
+        self.shares = 0.0
+        self.avg_cost = 0.0  # local currency per share
+        self.avg_cost_krw = 0.0  # KRW per share at the FX of each buy
+        self.realized_pnl = 0.0  # local currency
+        self.realized_pnl_krw = 0.0  # KRW, including the FX move since the buys
+        self.q = 0.0
+        self.fills = 0
+        self.last_date = ""
+
+    def apply(self, side, price, qty, fx):
+        if side == "BUY":
+            total = self.shares + qty
+            self.avg_cost = (self.avg_cost * self.shares + price * qty) / total
+            self.avg_cost_krw = (self.avg_cost_krw * self.shares + price * fx * qty) / total
+            self.shares = total
+            self.q = total
+        else:
+            if qty > self.shares + QTY_EPS:
+                raise ValueError(f"cannot sell {qty:g} shares, only {self.shares:g} held")
+            self.realized_pnl += (price - self.avg_cost) * qty
+            self.realized_pnl_krw += (price * fx - self.avg_cost_krw) * qty
+            self.shares -= qty
+            if self.shares <= QTY_EPS:
+                self.shares = 0.0
+                self.avg_cost = self.avg_cost_krw = 0.0
+                self.q = 0.0
+        self.fills += 1
+
+    def to_json(self):
+        return json.dumps({field: getattr(self, field) for field in self.FIELDS})
+
+    @classmethod
+    def from_json(cls, text):
+        pos = cls()
+        for field, value in json.loads(text).items():
+            if field in cls.FIELDS:
+                setattr(pos, field, value)
+        return pos
+
+
+def validate_fill(side, price, qty, fx, tag):
+    """Raises ValueError for a fill the ledger cannot accept."""
+    if side not in SIDES:
+        raise ValueError(f"side must be one of {', '.join(SIDES)}")
+    allowed = BUY_TAGS if side == "BUY" else SELL_TAGS
+    if tag not in allowed:
+        raise ValueError(f"a {side.lower()} must be tagged {' or '.join(allowed)}")
+    if not price > 0 or not qty > 0:
+        raise ValueError("price and quantity must be above 0")
+    if not fx > 0:
+        raise ValueError("FX must be above 0 (1 for KRW stocks)")
+
+
+class Ledger:
+    def __init__(self, store):
+        self.store = store
+        self.positions = {}  # name -> Position
+        self.seq = 0  # last fill folded in
+        self.replayed = 0  # fills replayed by the last load()
+        self._snapshot_seq = 0
+
+    def load(self):
+        """Read the last snapshot and replay the fills recorded after it."""
+        self._snapshot_seq, states = self.store.ledger_snapshot()
+        self.positions = {name: Position.from_json(state) for name, state in states.items()}
+        self.seq = self._snapshot_seq
+        self.replayed = 0
+        for seq, name, fill_date, side, price, qty, fx, _tag in self.store.fills(after_seq=self._snapshot_seq):
+            self._fold(name, side, price, qty, fx, fill_date)
+            self.seq = seq
+            self.replayed += 1
+        if self.replayed >= SNAPSHOT_EVERY:
+            self.snapshot()
+
+    def _fold(self, name, side, price, qty, fx, date_str):
+        pos = self.positions.get(name)
+        if pos is None:
+            pos = self.positions[name] = Position()
+        pos.apply(side, price, qty, fx)
+        pos.last_date = date_str or pos.last_date
+        return pos
+
+    def record(self, name, side, price, qty, fx=1.0, tag="LOAD", date=None):
+        """
+        Validate and append one fill, then fold it into the position.
+
+        Returns: the fill as (seq, name, date, side, price, qty, fx, tag), like ``fills``.
+        """
+        side = side.upper()
+        tag = tag.upper()
+        validate_fill(side, price, qty, fx, tag)
+        held = self.positions[name].shares if name in self.positions else 0.0
+        if side == "SELL" and qty > held + QTY_EPS:
+            raise ValueError(f"cannot sell {qty:g} shares of {name}, only {held:g} held")
+        date_str = date or _date.today().isoformat()
+        self.seq = self.store.append_fill(name, date_str, side, price, qty, fx, tag)
+        self._fold(name, side, price, qty, fx, date_str)
+        if self.seq - self._snapshot_seq >= SNAPSHOT_EVERY:
+            self.snapshot()
+        return self.seq, name, date_str, side, price, qty, fx, tag
+
+    def snapshot(self):
+        self.store.put_ledger_snapshot(self.seq, {name: pos.to_json() for name, pos in self.positions.items()})
+        self._snapshot_seq = self.seq
+
+    def position(self, name):
+        """Returns: the stock's Position, or None if it has no fills."""
+        return self.positions.get(name)
+
+    def fills(self, name):
+        """Returns: the stock's fills as (seq, name, date, side, price, qty, fx, tag), oldest first."""
+        return self.store.fills(name=name)
+
+    def remove(self, name):
+        # The store drops the fills with the stock row (RecordStore.delete).
+        self.positions.pop(name, None)
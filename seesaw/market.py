@@ -0,0 +1,349 @@
+"""
+Market data fetching.
+
+Prices come from a provider object with one method:
+
+    history(ticker, days, timeout) -> [(date, open, high, low, close), ...]
+
+returning the most recent ``days`` daily bars in ascending date order, the
+last one being today's (possibly partial) bar. ``YahooProvider`` wraps
+yfinance; ``StubProvider`` serves canned bars so refreshes can be exercised
+without a network.
+"""
+
+import math
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from importlib.util import find_spec
+
+from seesaw.barstore import weekdays_since
+from seesaw.formulas import HIGH_CONTEXT_DAYS, LOAD_REF_DAYS, VOL_WINDOW_DAYS
+from seesaw.timing import timed, timings
+
+# yfinance pulls in pandas; it is only imported on the first real fetch.
+YFINANCE_AVAILABLE = find_spec("yfinance") is not None
+if not YFINANCE_AVAILABLE:
+    print("Warning: yfinance not installed. Price fetching disabled.")
+
+FX_TICKER = "KRW=X"
+FETCH_TIMEOUT = 15.0  # seconds per ticker
+FETCH_WORKERS = 8
+CANCEL_POLL_S = 0.1  # how often a waiting refresh checks for cancellation
+
+# Ticker mappings for Yahoo Finance
+TICKER_MAP = {
+    "Samsung": "005930.KS",      # Samsung Electronics on KRX
+    "SK hynix": "000660.KS",     # SK hynix on KRX
+    "NVIDIA": "NVDA",            # NVIDIA on NASDAQ
+    "Alphabet": "GOOGL"          # Alphabet on NASDAQ
+}
+
+
+class YahooProvider:
+    def history(self, ticker, days, timeout=FETCH_TIMEOUT):
+        import yfinance as yf
+
+        hist = yf.Ticker(ticker).history(period=f"{days}d", timeout=timeout)
+        if hist.empty:
+            return []
+        return list(
+            zip(
+                (ts.strftime("%Y-%m-%d") for ts in hist.index),
+                hist["Open"].tolist(),
+                hist["High"].tolist(),
+                hist["Low"].tolist(),
+                hist["Close"].tolist(),
+            )
+        )
+
+
+class StubProvider:
+    """
+    Offline provider for tests.
+
+    bars: {ticker: [(date, open, high, low, close), ...]} ascending.
+    errors: {ticker: exception} raised instead of returning bars.
+    delay: seconds to sleep per call, to exercise timeouts.
+    delays: {ticker: seconds} overriding ``delay`` for single tickers.
+    """
+
+    def __init__(self, bars, errors=None, delay=0.0, delays=None):
+        self.bars = bars
+        self.errors = errors or {}
+        self.delay = delay
+        self.delays = delays or {}
+        self.calls = []
+
+    def history(self, ticker, days, timeout=FETCH_TIMEOUT):
+        self.calls.append((ticker, days))
+        delay = self.delays.get(ticker, self.delay)
+        if delay:
+            time.sleep(delay)
+        if ticker in self.errors:
+            raise self.errors[ticker]
+        return list(self.bars.get(ticker, []))[-days:]
+
+
+def default_provider():
+    return YahooProvider() if YFINANCE_AVAILABLE else None
+
+
+def snapshot_from_bars(bars):
+    """
+    Derive the price fields the calculator stores from one bar history.
+
+    Returns: dict with 'current', 'high_5d' (excluding today when possible),
+    'high_10d', 'low_today', 'high_today' and 'timestamp', or None.
+    """
+    if not bars:
+        return None
+    completed = bars[:-1] if len(bars) > 1 else bars
+    _, _, high_today, low_today, close = bars[-1]
+    return {
+        'current': close,
+        'high_5d': max(bar[2] for bar in completed[-LOAD_REF_DAYS:]),
+        'high_10d': max(bar[2] for bar in bars[-HIGH_CONTEXT_DAYS:]),
+        'low_today': low_today,
+        'high_today': high_today,
+        'timestamp': datetime.now()
+    }
+
+
+def top_up_bars(ticker, provider, store, timeout=FETCH_TIMEOUT):
+    """
+    Fetch only bars newer than the last cached one into ``store``.
+
+    The last cached bar is requested again because it may have been a
+    partial intraday bar. A short cache is backfilled to the volatility
+    window used for the auto V score. Returns: the cached highs window,
+    ascending.
+    """
+    window = HIGH_CONTEXT_DAYS + 1
+    keep = max(window, VOL_WINDOW_DAYS + 1)
+    last = store.last_date(ticker)
+    days = keep
+    if last and len(store.recent(ticker, keep)) >= keep:
+        days = min(keep, weekdays_since(last) + 1)
+    store.upsert(ticker, provider.history(ticker, days, timeout))
+    return store.recent(ticker, window)
+
+
+def _fetch_snapshot(ticker, provider, timeout, store=None):
+    # One request covers the highs window and today's bar.
+    with timings.timer("fetch_ticker", ticker=ticker):
+        if store is not None:
+            bars = top_up_bars(ticker, provider, store, timeout)
+        else:
+            bars = provider.history(ticker, HIGH_CONTEXT_DAYS + 1, timeout)
+    snap = snapshot_from_bars(bars)
+    if snap is None:
+        raise ValueError("no bars returned")
+    return snap
+
+
+def _fetch_fx(provider, timeout):
+    with timings.timer("fetch_fx", ticker=FX_TICKER):
+        bars = provider.history(FX_TICKER, 1, timeout)
+    if not bars:
+        raise ValueError("no bars returned")
+    return bars[-1][4]
+
+
+@timed("fetch_current_price")
+def fetch_current_price(stock_name, provider=None, store=None):
+    """
+    Fetch current price and recent highs for stock from Yahoo Finance.
+
+    Returns: dict with keys:
+        'current': float - current/close price
+        'high_5d': float - highest high of past 5 days (excluding today when possible)
+        'high_10d': float - highest high of past 10 days (excluding today when possible)
+        'low_today': float - today's low
+        'high_today': float - today's high
+        'timestamp': datetime - fetch time
+    Returns None if fetch fails or yfinance not available.
+
+    With a BarStore, only bars newer than the cache are downloaded and the
+    highs are computed from the cache.
+    """
+    provider = provider or default_provider()
+    ticker = TICKER_MAP.get(stock_name)
+    if provider is None or not ticker:
+        return None
+    try:
+        return _fetch_snapshot(ticker, provider, FETCH_TIMEOUT, store)
+    except Exception as e:
+        print(f"Error fetching {stock_name}: {e}")
+        return None
+
+
+def fetch_fx_rate(provider=None):
+    """
+    Fetch USD/KRW exchange rate from Yahoo Finance.
+
+    Returns: float or None
+    """
+    provider = provider or default_provider()
+    if provider is None:
+        return None
+    try:
+        return _fetch_fx(provider, FETCH_TIMEOUT)
+    except Exception as e:
+        print(f"Error fetching FX rate: {e}")
+    return None
+
+
+def _stamped(stamp, fn, *args):
+    # Record when a worker picks the request up; the ticker's timeout runs from here.
+    stamp.append(time.monotonic())
+    return fn(*args)
+
+
+def iter_market_snapshot(
+    names, provider=None, store=None, timeout=FETCH_TIMEOUT, max_workers=FETCH_WORKERS, cancel=None
+):
+    """
+    Fetch every stock and the FX rate concurrently, yielding each as it lands.
+
+    Each ticker gets its own request on a thread pool and is reported as
+    timed out once it has run for ``timeout`` seconds; time spent queued
+    behind other tickers does not count. A request that never gets a
+    worker (all of them stuck on hung requests) is given up on after the
+    time the whole batch needs at ``timeout`` per round of workers, plus
+    one more round. ``cancel`` is an optional threading.Event; once set,
+    outstanding requests are dropped and reported as cancelled. With a
+    BarStore each ticker is topped up incrementally (see ``top_up_bars``).
+
+    Yields: (name, result, error) with name "FX" for the exchange rate;
+    result is a snapshot dict (or the FX float) and error a short message,
+    exactly one of them None.
+    """
+    provider = provider or default_provider()
+    if provider is None:
+        yield "FX", None, "yfinance not installed"
+        return
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {}
+        stamps = {}  # future -> [start time] once a worker runs it
+
+        def submit(name, fn, *args):
+            stamp = []
+            fut = pool.submit(_stamped, stamp, fn, *args)
+            futures[fut] = name
+            stamps[fut] = stamp
+
+        submit("FX", _fetch_fx, provider, timeout)
+        for name in names:
+            ticker = TICKER_MAP.get(name)
+            if not ticker:
+                yield name, None, "no ticker mapping"
+                continue
+            submit(name, _fetch_snapshot, ticker, provider, timeout, store)
+        cap = timeout * (math.ceil(len(futures) / max_workers) + 1)
+        deadline = time.monotonic() + cap
+        pending = set(futures)
+        while pending:
+            if cancel is not None and cancel.is_set():
+                break
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            done, pending = wait(pending, timeout=min(deadline - now, CANCEL_POLL_S), return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    yield futures[fut], fut.result(), None
+                except Exception as e:
+                    yield futures[fut], None, str(e) or type(e).__name__
+            now = time.monotonic()
+            expired = [fut for fut in pending if stamps[fut] and now - stamps[fut][0] >= timeout]
+            for fut in expired:
+                pending.discard(fut)
+                yield futures[fut], None, f"timed out after {timeout:g}s"
+        reason = "cancelled" if cancel is not None and cancel.is_set() else f"batch limit of {cap:g}s reached"
+        for fut in pending:
+            fut.cancel()
+            yield futures[fut], None, reason
+    finally:
+        # Don't block on stragglers; their results are discarded.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_market_snapshot(names, provider=None, store=None, timeout=FETCH_TIMEOUT, max_workers=FETCH_WORKERS):
+    """
+    Fetch every stock and the FX rate concurrently (see iter_market_snapshot).
+
+    Returns: (prices, fx_rate, errors) where prices maps name -> snapshot
+    dict, fx_rate is a float or None, and errors maps name (or "FX") to a
+    short message for every ticker that failed or was skipped.
+    """
+    prices, errors, fx_rate = {}, {}, None
+    for name, result, error in iter_market_snapshot(names, provider, store, timeout, max_workers):
+        if error is not None:
+            errors[name] = error
+        elif name == "FX":
+            fx_rate = result
+        else:
+            prices[name] = result
+    return prices, fx_rate, errors
+
+
+class MarketRefresh:
+    """
+    Background market refresh for a UI event loop.
+
+    ``start`` runs iter_market_snapshot on a daemon thread that puts each
+    (name, result, error) on a queue; the UI thread calls ``poll`` (e.g.
+    from Tk's ``after``) to drain it, so record updates stay on the UI
+    thread. ``cancel`` stops waiting for outstanding tickers.
+    """
+
+    def __init__(self, names, provider=None, store=None, timeout=FETCH_TIMEOUT, max_workers=FETCH_WORKERS):
+        self.names = list(names)
+        self.total = len(self.names) + 1  # stocks + FX
+        self.received = 0
+        self.finished = False
+        self._args = (self.names, provider, store, timeout, max_workers)
+        self._events = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="market-refresh", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for item in iter_market_snapshot(*self._args, cancel=self._cancel):
+                self._events.put(item)
+        except Exception as e:
+            self._events.put(("refresh", None, str(e) or type(e).__name__))
+        finally:
+            self._events.put(None)
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def poll(self):
+        """Returns: the (name, result, error) items queued since the last poll."""
+        items = []
+        while True:
+            try:
+                item = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.finished = True
+                break
+            items.append(item)
+        self.received += len(items)
+        return items
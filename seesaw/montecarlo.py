@@ -0,0 +1,389 @@
+"""
+Monte Carlo campaign simulator.
+
+Starting from one stock's saved state, simulate thousands of daily OHLC
+paths and run the v1.4 rules on all of them at once: sells first (T1 half
+of the post-buy snapshot, T2 the rest), then LOAD when flat or RESCUE when
+held, with the same per-stock and portfolio caps as the backtester. A path
+stops at the day its campaign exits (T2 or a T1 that empties it).
+
+Paths come from geometric Brownian motion or from block-bootstrapped
+historical bars. The day loop runs over arrays of paths, and paths are
+processed in chunks so memory stays bounded regardless of the path count.
+
+The other stocks' deployment is held at its current level, and the stock's
+own G/L/V scores and manual overrides stay fixed for the whole horizon.
+
+``SimulationJob`` runs a simulation on a worker thread for a UI event loop,
+reporting progress through a queue the way market.MarketRefresh does.
+"""
+
+import queue
+import threading
+from math import sqrt
+
+import numpy as np
+
+from seesaw import formulas, portfolio
+from seesaw.batch import auto_gear_batch, rescue_gear_batch
+from seesaw.state import compute_state, parse_record, rescue_override
+
+MC_PATHS = 5000
+MC_HORIZON_DAYS = 120
+MC_CHUNK_PATHS = 2000  # paths simulated per chunk; one chunk holds 4 x days x chunk floats
+MC_BLOCK_DAYS = 5  # bootstrap block length
+MC_MIN_BOOTSTRAP_BARS = 60
+GBM_SIGMA = 0.30  # annual volatility when there is no history to estimate from
+GBM_RANGE_SCALE = 0.5  # intraday high/low excursion in daily-sigma units
+TRADING_DAYS = 252
+METHODS = ("gbm", "bootstrap")
+
+
+def campaign_inputs(name):
+    """
+    Returns: the starting state of one saved stock for simulate_campaign(),
+    taken from compute_state() so it matches what the GUI shows.
+    """
+    rec = portfolio.stock_data[name]
+    parsed = parse_record(rec)
+    data = compute_state(parsed, rec, name)
+    market = parsed["market"]
+    rescue_mode = parsed["manual_rescue_mode"]
+    price = data["current_price"] or parsed["avg_cost"]
+    return {
+        "name": name,
+        "price": price,
+        "avg_cost": parsed["avg_cost"],
+        "shares": parsed["num_shares"],
+        "high_ref": data["high_ref"],
+        "g_score": parsed["g_score"],
+        "l_score": parsed["l_score"],
+        "load_drop_pct": data["load_drop_pct"],
+        "rescue_override": rescue_override(rescue_mode)[0],
+        "sell_step": data["active_step"] if parsed["manual_mode"] else None,
+        "fx": parsed["fx_rate"] if market == "US" else 1.0,
+        "unit_size_krw": parsed["unit_size_krw"],
+        "other_units": data["total_units"] - parsed["units_held"],
+        "N": formulas.PORTFOLIO_N,
+    }
+
+
+def estimate_drift_vol(closes):
+    """Returns: (annual drift, annual volatility) of log returns, or None with fewer than 2 returns."""
+    closes = np.asarray(closes, dtype=float)
+    closes = closes[closes > 0]
+    if closes.size < 3:
+        return None
+    rets = np.diff(np.log(closes))
+    sigma = float(rets.std(ddof=1)) * sqrt(TRADING_DAYS)
+    mu = float(rets.mean()) * TRADING_DAYS + 0.5 * sigma * sigma
+    return mu, sigma
+
+
+def gbm_paths(rng, start, days, paths, mu=0.0, sigma=GBM_SIGMA):
+    """
+    Returns: (open, high, low, close) arrays of shape (days, paths).
+
+    Closes follow GBM; each day opens at the previous close and its
+    high/low extend past the open/close by a half-normal excursion.
+    """
+    dt = 1.0 / TRADING_DAYS
+    sd = sigma * sqrt(dt)
+    steps = (mu - 0.5 * sigma * sigma) * dt + sd * rng.standard_normal((days, paths))
+    close = start * np.exp(np.cumsum(steps, axis=0))
+    open_ = np.empty_like(close)
+    open_[0] = start
+    open_[1:] = close[:-1]
+    high = np.maximum(open_, close) * np.exp(GBM_RANGE_SCALE * sd * np.abs(rng.standard_normal((days, paths))))
+    low = np.minimum(open_, close) * np.exp(-GBM_RANGE_SCALE * sd * np.abs(rng.standard_normal((days, paths))))
+    return open_, high, low, close
+
+
+def bootstrap_paths(rng, start, days, paths, bars, block=MC_BLOCK_DAYS):
+    """
+    Returns: (open, high, low, close) arrays of shape (days, paths) built
+    from blocks of historical days.
+
+    Each historical day is kept as its open/high/low/close relative to the
+    previous close, so a sampled block keeps its intraday shape and its
+    day-to-day autocorrelation.
+    """
+    closes = np.asarray(bars["close"], dtype=float)
+    prev = closes[:-1]
+    ok = (prev > 0) & np.all([np.isfinite(np.asarray(bars[k], dtype=float)[1:]) for k in ("open", "high", "low", "close")], axis=0)
+    ratios = np.stack([np.asarray(bars[k], dtype=float)[1:][ok] / prev[ok] for k in ("open", "high", "low", "close")])
+    n = ratios.shape[1]
+    if n < 2:
+        raise ValueError("not enough history to bootstrap")
+    block = max(1, min(block, n))
+    n_blocks = -(-days // block)
+    starts = rng.integers(0, n - block + 1, size=(n_blocks, paths))
+    idx = (starts[:, None, :] + np.arange(block)[None, :, None]).reshape(n_blocks * block, paths)[:days]
+    o_r, h_r, l_r, c_r = ratios[:, idx]
+    close = start * np.cumprod(c_r, axis=0)
+    prev_close = np.empty_like(close)
+    prev_close[0] = start
+    prev_close[1:] = close[:-1]
+    return prev_close * o_r, prev_close * h_r, prev_close * l_r, close
+
+
+def run_campaigns(inputs, open_, high, low, close, seed_highs=None):
+    """
+    Apply the v1.4 rules to a batch of paths.
+
+    open_/high/low/close: (days, paths) arrays. seed_highs: highs of the
+    days before the first simulated day, oldest first (defaults to the
+    stock's current high reference).
+
+    Returns: dict of per-path arrays "days_to_exit" (NaN if still open at
+    the horizon), "max_units", "hit_capacity" and "final_pnl_krw".
+    """
+    days, paths = close.shape
+    N = inputs["N"]
+    fx = inputs["fx"]
+    unit_krw = inputs["unit_size_krw"]
+    other = inputs["other_units"]
+    max_units_stock = formulas.compute_max_units_per_stock(N)
+    unit_local = unit_krw / fx if fx else 0.0
+    load_factor = 1 - inputs["load_drop_pct"] / 100
+    trend = formulas.compute_trend(inputs["g_score"], inputs["l_score"])
+
+    def to_units(sh, avg):
+        return sh * avg * fx / unit_krw if unit_krw else np.zeros_like(sh)
+
+    shares = np.full(paths, float(inputs["shares"]))
+    avg = np.full(paths, float(inputs["avg_cost"]) if inputs["shares"] > 0 else 0.0)
+    units = to_units(shares, avg)
+    snapshot = shares.copy()
+    tiers_done = np.zeros(paths, dtype=np.int8)
+    realized = np.zeros(paths)
+    exit_day = np.full(paths, np.nan)
+    max_units = units.copy()
+    hit_cap = other + units >= N - 1.0 if N else np.zeros(paths, dtype=bool)
+
+    window = formulas.HIGH_CONTEXT_DAYS
+    if seed_highs is None:
+        seed_highs = [inputs["high_ref"]] if inputs["high_ref"] > 0 else []
+    seed = np.zeros(window)
+    tail = np.asarray(seed_highs, dtype=float)[-window:]
+    if tail.size:
+        seed[-tail.size:] = tail
+    # Ring buffer of the last ``window`` highs per path; the LOAD reference is its max (no look-ahead).
+    highs_ring = np.repeat(seed[:, None], paths, axis=1)
+
+    for day in range(days):
+        active = np.isnan(exit_day)
+        if not active.any():
+            break
+        o, h, lo = open_[day], high[day], low[day]
+
+        # 1. Sells first
+        held = active & (shares > 0)
+        if held.any():
+            step = inputs["sell_step"]
+            if step is None:
+                step = auto_gear_batch(trend, (other + units) / N if N else np.zeros(paths))[2]
+            t1 = avg * (1 + step / 100)
+            t2 = avg * (1 + 2 * step / 100)
+            for tier, target in ((1, t1), (2, t2)):
+                hit = held & (shares > 0) & (tiers_done < tier) & (h >= target)
+                if not hit.any():
+                    continue
+                qty = shares if tier == 2 else np.minimum(shares, np.floor(snapshot * 0.5))
+                qty = np.where(hit, qty, 0.0)
+                price = np.maximum(o, target)
+                realized += (price - avg) * qty * fx
+                shares = shares - qty
+                tiers_done[hit] = tier
+                units = np.where(shares > 0, to_units(shares, avg), 0.0)
+            closed = held & (shares <= 0)
+            exit_day[closed] = day + 1
+            avg[closed] = 0.0
+            active &= ~closed
+
+        # 2. Then at most one buy
+        total = other + units
+        flat = active & (shares <= 0)
+        if N:
+            remaining = N - total
+        else:
+            remaining = np.full(paths, np.inf)
+        buy_units = np.zeros(paths)
+        trigger = np.zeros(paths)
+        if flat.any() and max_units_stock >= 1:
+            load_trigger = highs_ring.max(axis=0) * load_factor
+            go = flat & (load_trigger > 0) & (lo <= load_trigger) & (remaining >= 1.0)
+            buy_units[go] = 1.0
+            trigger[go] = load_trigger[go]
+        holding = active & (shares > 0)
+        if holding.any():
+            if inputs["rescue_override"]:
+                drop, r, _ = inputs["rescue_override"]
+            else:
+                drop, r, _ = rescue_gear_batch(units, N)
+            rescue_trigger = avg * (1 - drop / 100)
+            qty_units = np.minimum(units * r, np.maximum(0.0, remaining)) if N else units * r
+            qty_units = np.minimum(qty_units, max_units_stock - units)
+            go = holding & (lo <= rescue_trigger) & (qty_units > 0)
+            buy_units[go] = qty_units[go]
+            trigger[go] = rescue_trigger[go]
+        buying = buy_units > 0
+        if buying.any() and unit_local:
+            price = np.where(buying, np.minimum(o, trigger), 1.0)
+            qty = np.maximum(1.0, np.floor(buy_units * unit_local / price + 0.5))
+            # Share rounding must never push the stock or the portfolio past its cap (6.4).
+            available = np.minimum(max_units_stock - units, remaining)
+            qty = np.minimum(qty, np.floor(available * unit_local / price))
+            buying &= qty >= 1
+            qty = np.where(buying, qty, 0.0)
+            new_shares = shares + qty
+            avg = np.where(buying, (avg * shares + price * qty) / np.where(buying, new_shares, 1.0), avg)
+            shares = new_shares
+            snapshot = np.where(buying, shares, snapshot)
+            tiers_done[buying] = 0
+            units = to_units(shares, avg)
+
+        np.maximum(max_units, units, out=max_units)
+        if N:
+            hit_cap |= active & (other + units >= N - 1.0)
+        highs_ring[day % window] = h
+
+    final_close = close[-1] if days else np.full(paths, inputs["price"])
+    open_pnl = np.where(np.isnan(exit_day) & (shares > 0), (final_close - avg) * shares * fx, 0.0)
+    return {
+        "days_to_exit": exit_day,
+        "max_units": max_units,
+        "hit_capacity": hit_cap,
+        "final_pnl_krw": realized + open_pnl,
+    }
+
+
+def simulate_campaign(
+    inputs,
+    paths=MC_PATHS,
+    days=MC_HORIZON_DAYS,
+    method="gbm",
+    bars=None,
+    mu=0.0,
+    sigma=GBM_SIGMA,
+    block=MC_BLOCK_DAYS,
+    chunk=MC_CHUNK_PATHS,
+    seed=None,
+    progress=None,
+):
+    """
+    Simulate ``paths`` campaigns of up to ``days`` trading days.
+
+    method: "gbm" (mu/sigma annual) or "bootstrap" (needs ``bars``, a
+    BarStore.arrays()-style dict). progress(done, total) is called after
+    each chunk.
+
+    Returns: run_campaigns() outputs concatenated over all paths.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}; expected one of {', '.join(METHODS)}")
+    if inputs["price"] <= 0:
+        raise ValueError("no current price or average cost to start from")
+    rng = np.random.default_rng(seed)
+    seed_highs = None
+    if bars is not None and len(bars["high"]):
+        seed_highs = np.asarray(bars["high"], dtype=float)[-formulas.HIGH_CONTEXT_DAYS:]
+    parts = []
+    done = 0
+    while done < paths:
+        n = min(chunk, paths - done)
+        if method == "bootstrap":
+            ohlc = bootstrap_paths(rng, inputs["price"], days, n, bars, block)
+        else:
+            ohlc = gbm_paths(rng, inputs["price"], days, n, mu, sigma)
+        parts.append(run_campaigns(inputs, *ohlc, seed_highs=seed_highs))
+        done += n
+        if progress:
+            progress(done, paths)
+    return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+
+def summarize_outcomes(result):
+    """Summary statistics for simulate_campaign() output."""
+    exit_days = result["days_to_exit"]
+    exited = ~np.isnan(exit_days)
+    pnl = result["final_pnl_krw"]
+    paths = len(pnl)
+    return {
+        "paths": paths,
+        "exit_rate": float(exited.mean()) if paths else 0.0,
+        "median_days_to_exit": float(np.median(exit_days[exited])) if exited.any() else float("nan"),
+        "mean_max_units": float(result["max_units"].mean()) if paths else 0.0,
+        "capacity_rate": float(result["hit_capacity"].mean()) if paths else 0.0,
+        "mean_pnl_krw": float(pnl.mean()) if paths else 0.0,
+        "pnl_p5_krw": float(np.percentile(pnl, 5)) if paths else 0.0,
+        "pnl_p95_krw": float(np.percentile(pnl, 95)) if paths else 0.0,
+        "loss_rate": float((pnl < 0).mean()) if paths else 0.0,
+    }
+
+
+class SimulationCancelled(Exception):
+    pass
+
+
+class SimulationJob:
+    """
+    Background simulate_campaign for a UI event loop.
+
+    ``start`` runs the simulation on a daemon thread that puts
+    ("progress", (done, total)) after every chunk and finally ("result",
+    outputs) or ("error", message) on a queue; the UI thread calls ``poll``
+    (e.g. from Tk's ``after``) to drain it. ``cancel`` stops the run after
+    the current chunk.
+    """
+
+    def __init__(self, inputs, *args, **kwargs):
+        self._args = (inputs,) + args
+        self._kwargs = kwargs
+        self.finished = False
+        self._events = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="monte-carlo", daemon=True)
+        self._thread.start()
+        return self
+
+    def _progress(self, done, total):
+        self._events.put(("progress", (done, total)))
+        if self._cancel.is_set():
+            raise SimulationCancelled()
+
+    def _run(self):
+        try:
+            result = simulate_campaign(*self._args, progress=self._progress, **self._kwargs)
+        except SimulationCancelled:
+            pass
+        except Exception as e:
+            self._events.put(("error", str(e) or type(e).__name__))
+        else:
+            self._events.put(("result", result))
+        finally:
+            self._events.put(None)
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def poll(self):
+        """Returns: the (kind, value) events queued since the last poll."""
+        items = []
+        while True:
+            try:
+                item = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.finished = True
+                break
+            items.append(item)
+        return items
@@ -0,0 +1,125 @@
+"""
+Whole-portfolio overview rows with per-row dirty flags.
+
+Each stock's row (LOAD status, next buy, RESCUE trigger, sell tiers and
+their distance from the current price) is cached and recomputed only after
+``invalidate`` marks that stock dirty, e.g. when a save or a price refresh
+touched its record. Rows also depend on portfolio-wide inputs: FX, N, max
+volume and total deployment (through utilisation). Those are compared on
+every ``refresh``, and a change recomputes every row from one
+``batch_states`` pass (the vectorized compute_state) instead of stock by
+stock.
+"""
+
+from seesaw import formulas, portfolio
+from seesaw.batch import batch_states
+from seesaw.state import compute_state, parse_record
+
+OVERVIEW_COLUMNS = (
+    "market",
+    "units",
+    "current_price",
+    "load_status",
+    "buy_label",
+    "buy_price",
+    "buy_shares",
+    "buy_distance",
+    "rescue_trigger",
+    "sell_t1",
+    "sell_t2",
+    "t1_distance",
+)
+
+
+def _pct_from(price, level):
+    # Percent move from ``price`` to ``level`` (negative = below), None without both.
+    return (level / price - 1) * 100 if price > 0 and level > 0 else None
+
+
+def overview_row(name, data=None):
+    """
+    Returns: {OVERVIEW_COLUMNS: value} for one stock in ``portfolio.stock_data``.
+
+    ``data`` is the stock's entry from ``batch_states``; without it the
+    stock is computed on its own.
+    """
+    if data is None:
+        rec = portfolio.stock_data[name]
+        parsed = parse_record(rec)
+        data = dict(parsed, **compute_state(parsed, rec, name))
+    held = data["units_held"] > 0
+    t1, t2 = data["sell_targets"] if data["avg_cost"] > 0 else (0.0, 0.0)
+    price = data["current_price"]
+    return {
+        "market": data["market"],
+        "units": data["units_held"],
+        "current_price": price,
+        "load_status": data["load_status"] if not held else "Held",
+        "buy_label": data["buy_label"],
+        "buy_price": data["buy_price"],
+        "buy_shares": data["buy_shares"],
+        "buy_distance": _pct_from(price, data["buy_price"]),
+        "rescue_trigger": data["rescue_trigger"] if held else 0.0,
+        "sell_t1": t1,
+        "sell_t2": t2,
+        "t1_distance": _pct_from(price, t1),
+    }
+
+
+def portfolio_context():
+    """Returns: the portfolio-wide inputs every row depends on."""
+    return (
+        formulas.PORTFOLIO_N,
+        portfolio.GLOBAL_MAX_VOLUME_KRW,
+        portfolio.GLOBAL_FX_RATE,
+        portfolio.deployment.total_krw(),
+    )
+
+
+class OverviewCache:
+    def __init__(self):
+        self.rows = {}  # name -> overview_row(name)
+        self._dirty = set()
+        self._context = None
+        self.recomputed = 0  # rows computed by the last refresh()
+
+    def invalidate(self, names=None):
+        """Mark ``names`` (default: every stock) for recomputation on the next refresh."""
+        self._dirty.update(portfolio.stock_order if names is None else names)
+
+    @property
+    def dirty(self):
+        return frozenset(self._dirty)
+
+    def refresh(self):
+        """
+        Recompute the dirty rows in one pass; after a change in the
+        portfolio-wide inputs every row comes from a single batch pass.
+
+        Returns: names whose row changed or was dropped, in portfolio order
+        (dropped names last), so a view can update just those items.
+        """
+        order = portfolio.stock_order
+        context = portfolio_context()
+        states = {}
+        if context != self._context:
+            self._context = context
+            self._dirty.update(order)
+            batch = batch_states(portfolio.stock_data, order, portfolio.GLOBAL_FX_RATE, portfolio.GLOBAL_MAX_VOLUME_KRW)
+            states = dict(zip(order, batch))
+        self._dirty.update(name for name in order if name not in self.rows)
+        changed = []
+        self.recomputed = 0
+        for name in order:
+            if name not in self._dirty:
+                continue
+            row = overview_row(name, states.get(name))
+            self.recomputed += 1
+            if self.rows.get(name) != row:
+                self.rows[name] = row
+                changed.append(name)
+        for name in [name for name in self.rows if name not in portfolio.stock_data]:
+            del self.rows[name]
+            changed.append(name)
+        self._dirty.clear()
+        return changed
@@ -0,0 +1,451 @@
+"""
+Portfolio records and their persistence.
+
+The stock list lives in module-level ``stock_data``/``stock_order`` together
+with the portfolio-wide FX rate and max volume, exactly as the GUI used to
+hold them. Both containers are mutated in place, so front ends can import
+them once and keep their references across reloads.
+
+Records are stored in a SQLite RecordStore and saved per stock with
+``save_records``; an existing data.csv is imported once on first load and
+is not written after that, so it only ever holds the pre-migration
+records.
+
+Each named portfolio (account) is its own store with its own N, max volume
+and stock list. Only the active one is held in memory; switching loads
+another. Every save also caches the portfolio's deployment totals in its
+store's meta table, so ``portfolio_summaries`` can report on all
+portfolios without reading their records.
+
+Stocks with fills in the trade ledger (seesaw.ledger) take their average
+cost and share count from it; ``record_fill`` appends a fill and updates
+the record. Their US positions also feed ``fx_reference``, the running FX
+reference rate R_ref behind ``fx_light``.
+"""
+
+import json
+import os
+
+from seesaw import formulas, schema
+from seesaw.deployment import DeploymentAggregate
+from seesaw.fxref import FxReference, traffic_light
+from seesaw.ledger import Ledger
+from seesaw.recordstore import STORE_FILE, RecordStore, read_meta
+from seesaw.schema import BUY_MODELS
+from seesaw.timing import timed
+
+DATA_FILE = "data.csv"  # legacy CSV, migrated once and never written again
+DEFAULT_NAMES = [
+    ("Samsung", "KR"),
+    ("SK hynix", "KR"),
+    ("NVIDIA", "US"),
+    ("Alphabet", "US"),
+]
+GLOBAL_FX_RATE = 1300.0  # ₩ per $
+DEFAULT_PORTFOLIO = "Main"  # stored in STORE_FILE, next to the legacy data.csv
+PORTFOLIO_DIR = "portfolios"  # every other portfolio: PORTFOLIO_DIR/<slug>.db
+DEFAULT_N = formulas.PORTFOLIO_N
+
+stock_data = {}
+stock_order = []
+GLOBAL_MAX_VOLUME_KRW = 0.0
+deployment = DeploymentAggregate(GLOBAL_FX_RATE)
+store = None  # RecordStore opened by load_data
+ledger = None  # Ledger over ``store``, loaded by load_data
+fx_reference = FxReference()  # USD cost of the ledger's US positions
+_positions = {}  # name -> stored display position
+load_errors = []  # (source, schema.FieldError) from the last load_data
+active_portfolio = DEFAULT_PORTFOLIO
+
+
+def default_record(market="KR"):
+    rec = schema.default_record()
+    rec["market"] = market
+    rec["fx_rate"] = GLOBAL_FX_RATE if market == "US" else 1.0
+    return rec
+
+
+def migrate_csv(csv_path, record_store):
+    """
+    One-time import of a legacy data.csv into the record store.
+
+    Deprecated columns (buy_model, manual_mode, manual_gear incl. "gearN"
+    values) are normalised by the schema. The CSV is left untouched; the
+    store remembers the import so it never runs twice.
+
+    Returns: (number of records imported, list of schema.FieldError).
+    """
+    if record_store.get_meta("csv_migrated") or not os.path.exists(csv_path):
+        return 0, []
+    records, errors = schema.read_csv(csv_path)
+    items = {}
+    for _, name, rec in records:
+        pos = items[name][0] if name in items else len(items)
+        items[name] = (pos, rec)
+    record_store.put_many((name, pos, schema.to_row(name, rec)) for name, (pos, rec) in items.items())
+    record_store.set_meta("csv_migrated", os.path.abspath(csv_path))
+    return len(items), errors
+
+
+def open_store(path=None):
+    """
+    Open (or reuse) the record store at ``path``.
+
+    Raises ValueError if the store was written by a newer schema version.
+    """
+    global store
+    path = path or STORE_FILE
+    if store is not None and store.path == path:
+        return store
+    if store is not None:
+        store.close()
+    store = RecordStore(path, schema.FIELDNAMES)
+    version = int(store.get_meta("schema_version", 0))
+    if version > schema.SCHEMA_VERSION:
+        store.close()
+        store = None
+        raise ValueError(f"{path} uses record schema v{version}; this version reads up to v{schema.SCHEMA_VERSION}.")
+    if version < schema.SCHEMA_VERSION:
+        store.set_meta("schema_version", schema.SCHEMA_VERSION)
+    return store
+
+
+@timed("load_data")
+def load_data(path=None, legacy_csv=None):
+    """
+    Open the record store and read it into ``stock_data``/``stock_order`` (in place).
+
+    path: SQLite file, defaults to STORE_FILE. legacy_csv: data.csv to
+    migrate on first open, defaults to DATA_FILE next to the store.
+    Falls back to DEFAULT_NAMES when the store is empty. Cells that fail
+    validation are listed in ``load_errors`` (prefixed with their source).
+    The store's portfolio name and N become the active ones.
+    """
+    global GLOBAL_FX_RATE, GLOBAL_MAX_VOLUME_KRW, active_portfolio, ledger
+    path = path or STORE_FILE
+    open_store(path)
+    ledger = Ledger(store)
+    ledger.load()
+    active_portfolio = store.get_meta("portfolio_name") or DEFAULT_PORTFOLIO
+    formulas.PORTFOLIO_N = int(store.get_meta("portfolio_n") or DEFAULT_N)
+    load_errors.clear()
+    legacy_csv = legacy_csv or os.path.join(os.path.dirname(path), DATA_FILE)
+    _, csv_errors = migrate_csv(legacy_csv, store)
+    load_errors.extend((legacy_csv, err) for err in csv_errors)
+
+    header, rows = store.table()
+    records, errors = schema.read_table(header, rows)
+    load_errors.extend((path, err) for err in errors)
+
+    stock_data.clear()
+    stock_order.clear()
+    _positions.clear()
+    GLOBAL_MAX_VOLUME_KRW = 0.0
+    for i, name, rec in records:
+        if name not in stock_data:
+            stock_order.append(name)
+            _positions[name] = rows[i][0]
+        stock_data[name] = rec
+        fx_rate = rec["fx_rate"]
+        max_volume = rec["max_volume"]
+        # Allow FX to be set from any row if a realistic value is present (>10 avoids overwriting with 1)
+        if fx_rate and fx_rate > 10:
+            GLOBAL_FX_RATE = fx_rate
+        if max_volume and max_volume > 0:
+            GLOBAL_MAX_VOLUME_KRW = max_volume
+    if not GLOBAL_MAX_VOLUME_KRW:
+        GLOBAL_MAX_VOLUME_KRW = float(store.get_meta("max_volume_krw") or 0.0)
+    ensure_defaults()
+
+    # After loading, propagate global FX to all records
+    for rec in stock_data.values():
+        rec["fx_rate"] = GLOBAL_FX_RATE
+    fx_reference.clear()
+    for name, pos in ledger.positions.items():
+        if name in stock_data:
+            _apply_position(stock_data[name], pos)
+            if stock_data[name].get("market") == "US":
+                fx_reference.set_position(name, pos)
+    deployment.rebuild(stock_data, GLOBAL_FX_RATE)
+    _write_summary()
+
+
+def save_records(names=None):
+    """
+    Persist the given stocks (default: all) in one transaction.
+
+    Only these rows are rewritten, plus any stock that has never been
+    stored (seeded defaults, new additions), which is appended after the
+    last stored position.
+    """
+    unsaved = [name for name in stock_order if name not in _positions]
+    for name in unsaved:
+        _positions[name] = max(_positions.values(), default=-1) + 1
+    targets = stock_order if names is None else dict.fromkeys(list(names) + unsaved)
+    items = [(name, _positions[name], schema.to_row(name, stock_data[name])) for name in targets if name in stock_data]
+    if items:
+        store.put_many(items)
+    _write_summary()
+
+
+def apply_price_snapshot(name, price_data):
+    """Store one market snapshot (see market.snapshot_from_bars) on a stock's record."""
+    rec = stock_data.get(name, default_record())
+    rec["current_price"] = price_data["current"]
+    rec["high_5d"] = price_data["high_5d"]
+    rec["high_10d"] = price_data["high_10d"]
+    rec["low_today"] = price_data["low_today"]
+    rec["high_today"] = price_data["high_today"]
+    rec["last_update"] = price_data["timestamp"].strftime("%Y-%m-%d %H:%M")
+    rec["fx_rate"] = GLOBAL_FX_RATE
+    stock_data[name] = rec
+
+
+def ensure_defaults():
+    """Seed DEFAULT_NAMES when the stock list is empty."""
+    if stock_order:
+        return
+    for nm, mk in DEFAULT_NAMES:
+        stock_order.append(nm)
+        stock_data[nm] = default_record(mk)
+        deployment.update(nm, stock_data[nm])
+
+
+def set_fx_rate(fx_rate):
+    """
+    Set the portfolio FX rate and propagate it to every record.
+
+    Returns: True if the rate changed (every record then needs saving).
+    """
+    global GLOBAL_FX_RATE
+    changed = fx_rate != GLOBAL_FX_RATE
+    GLOBAL_FX_RATE = fx_rate
+    for rec in stock_data.values():
+        rec["fx_rate"] = GLOBAL_FX_RATE
+    deployment.set_fx(GLOBAL_FX_RATE)
+    return changed
+
+
+def set_max_volume(max_volume_krw):
+    """Set the portfolio max volume (KRW) and propagate it to every record. Returns: True if changed."""
+    global GLOBAL_MAX_VOLUME_KRW
+    changed = max_volume_krw != GLOBAL_MAX_VOLUME_KRW
+    GLOBAL_MAX_VOLUME_KRW = max_volume_krw
+    for rec in stock_data.values():
+        rec["max_volume"] = GLOBAL_MAX_VOLUME_KRW
+    return changed
+
+
+def add_stock(name, market="KR"):
+    stock_data[name] = default_record(market)
+    if name not in stock_order:
+        stock_order.append(name)
+    deployment.update(name, stock_data[name])
+    return stock_data[name]
+
+
+def remove_stock(name):
+    if name in stock_order:
+        stock_order.remove(name)
+    stock_data.pop(name, None)
+    deployment.remove(name)
+    _positions.pop(name, None)
+    if ledger is not None:
+        ledger.remove(name)
+    fx_reference.remove(name)
+    if store is not None:
+        store.delete(name)
+        _write_summary()
+
+
+def _apply_position(rec, pos):
+    # A flat ledger position reads as a blank form, like a stock never bought.
+    rec["avg_cost"] = pos.avg_cost if pos.shares else ""
+    rec["num_shares"] = pos.shares if pos.shares else ""
+
+
+def apply_ledger_position(name):
+    """
+    Overwrite a stock's cost basis with its ledger position (form edits
+    round the average cost). Returns: True if the stock has fills.
+    """
+    pos = ledger.position(name) if ledger is not None else None
+    if pos is None or not pos.fills:
+        return False
+    _apply_position(stock_data[name], pos)
+    # The market may have been switched on the form.
+    if stock_data[name].get("market") == "US":
+        fx_reference.set_position(name, pos)
+    else:
+        fx_reference.remove(name)
+    return True
+
+
+def record_fill(name, side, price, qty, tag, fx=None, date=None):
+    """
+    Append a fill to the ledger and save the stock's updated cost basis.
+
+    fx defaults to the portfolio rate for US stocks and 1 otherwise.
+    Raises ValueError for an invalid fill (see ledger.validate_fill).
+    Returns: the recorded fill (see Ledger.record).
+    """
+    rec = stock_data[name]
+    if fx is None:
+        fx = GLOBAL_FX_RATE if rec.get("market") == "US" else 1.0
+    fill = ledger.record(name, side, price, qty, fx, tag, date)
+    pos = ledger.position(name)
+    _apply_position(rec, pos)
+    if rec.get("market") == "US":
+        fx_reference.set_position(name, pos)
+    deployment.update(name, rec)
+    save_records([name])
+    return fill
+
+
+def fx_light(fx_rate=None):
+    """
+    Traffic Light for ``fx_rate`` (default: the portfolio rate) against R_ref.
+
+    Returns: traffic_light() dict plus "r_ref", or None without USD holdings in the ledger.
+    """
+    r_ref = fx_reference.rate()
+    light = traffic_light(fx_rate or GLOBAL_FX_RATE, r_ref)
+    if light is not None:
+        light["r_ref"] = r_ref
+    return light
+
+
+def set_portfolio_n(n):
+    """Set the active portfolio's N and store it. Returns: True if it changed."""
+    n = int(n)
+    changed = n != formulas.PORTFOLIO_N
+    formulas.PORTFOLIO_N = n
+    if store is not None:
+        store.set_meta("portfolio_n", n)
+        _write_summary()
+    return changed
+
+
+def current_summary():
+    """Returns: the cached-aggregate summary of the active portfolio (O(1), from ``deployment``)."""
+    totals = deployment.division_totals()
+    return {
+        "name": active_portfolio,
+        "N": formulas.PORTFOLIO_N,
+        "max_volume_krw": GLOBAL_MAX_VOLUME_KRW,
+        "fx_rate": GLOBAL_FX_RATE,
+        "stocks": len(stock_order),
+        "deployed_kr_krw": totals["KR"],
+        "deployed_us_usd": totals["US_USD"],
+    }
+
+
+def _write_summary():
+    if store is not None:
+        store.set_meta("summary", json.dumps(current_summary()))
+        store.set_meta("max_volume_krw", GLOBAL_MAX_VOLUME_KRW)
+
+
+def read_summary(path):
+    """Returns: the summary cached in the store at ``path``, or None if it has none yet."""
+    raw = read_meta(path, "summary")
+    try:
+        return json.loads(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def _slug(name):
+    return "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in name.strip()).lower() or "portfolio"
+
+
+def portfolio_path(name, base_dir=""):
+    if name == DEFAULT_PORTFOLIO:
+        return os.path.join(base_dir, STORE_FILE)
+    return os.path.join(base_dir, PORTFOLIO_DIR, _slug(name) + ".db")
+
+
+def list_portfolios(base_dir=""):
+    """Returns: {name: store path} for the default portfolio and every store in PORTFOLIO_DIR."""
+    out = {DEFAULT_PORTFOLIO: portfolio_path(DEFAULT_PORTFOLIO, base_dir)}
+    folder = os.path.join(base_dir, PORTFOLIO_DIR)
+    if os.path.isdir(folder):
+        for fname in sorted(os.listdir(folder)):
+            stem, ext = os.path.splitext(fname)
+            if ext == ".db":
+                path = os.path.join(folder, fname)
+                out[read_meta(path, "portfolio_name") or stem] = path
+    return out
+
+
+def create_portfolio(name, n=None, max_volume_krw=0.0, base_dir=""):
+    """
+    Create an empty named portfolio store (not loaded).
+
+    Raises ValueError if the name is blank or already taken. Returns: its path.
+    """
+    name = name.strip()
+    if not name or name in list_portfolios(base_dir):
+        raise ValueError(f"Portfolio '{name}' already exists." if name else "Portfolio name is empty.")
+    path = portfolio_path(name, base_dir)
+    if os.path.exists(path):
+        raise ValueError(f"{path} already exists.")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    new_store = RecordStore(path, schema.FIELDNAMES)
+    try:
+        new_store.set_meta("schema_version", schema.SCHEMA_VERSION)
+        new_store.set_meta("portfolio_name", name)
+        new_store.set_meta("portfolio_n", int(n or DEFAULT_N))
+        new_store.set_meta("max_volume_krw", float(max_volume_krw or 0.0))
+        # Nothing to migrate: a data.csv only ever belongs to the default portfolio.
+        new_store.set_meta("csv_migrated", "n/a")
+    finally:
+        new_store.close()
+    return path
+
+
+def switch_portfolio(name, base_dir=""):
+    """Load portfolio ``name`` in place of the active one (its records are already saved)."""
+    paths = list_portfolios(base_dir)
+    if name not in paths:
+        raise ValueError(f"Unknown portfolio '{name}'.")
+    load_data(paths[name])
+
+
+def portfolio_summaries(base_dir=""):
+    """
+    Summaries of every portfolio from their cached aggregates.
+
+    The active portfolio is taken from memory, the others from the summary
+    stored at their last save; no records are read. US holdings are valued
+    at the current FX rate. Returns: (rows, total) where each row adds
+    deployed_krw, units and utilisation to the cached fields (None where
+    a portfolio has no summary yet).
+    """
+    active_path = os.path.abspath(store.path) if store is not None else None
+    rows = []
+    for name, path in list_portfolios(base_dir).items():
+        if os.path.abspath(path) == active_path:
+            summary = current_summary()
+        else:
+            summary = read_summary(path) or {}
+        row = dict(summary, name=name, path=path, active=os.path.abspath(path) == active_path)
+        if summary:
+            deployed = summary["deployed_kr_krw"] + summary["deployed_us_usd"] * GLOBAL_FX_RATE
+            max_volume = summary["max_volume_krw"]
+            row["deployed_krw"] = deployed
+            row["utilisation"] = deployed / max_volume if max_volume else 0.0
+            row["units"] = row["utilisation"] * summary["N"]
+        rows.append(row)
+    known = [r for r in rows if "deployed_krw" in r]
+    deployed = sum(r["deployed_krw"] for r in known)
+    max_volume = sum(r["max_volume_krw"] for r in known)
+    total = {
+        "portfolios": len(rows),
+        "stocks": sum(r["stocks"] for r in known),
+        "deployed_krw": deployed,
+        "max_volume_krw": max_volume,
+        "utilisation": deployed / max_volume if max_volume else 0.0,
+    }
+    return rows, total
+
@@ -0,0 +1,147 @@
+"""
+On-disk portfolio records.
+
+One SQLite row per stock, keyed by name, with a position column for display
+order. Saves touch only the rows that changed and every write is a single
+transaction, so a crash leaves either the old or the new record, never a
+half-written file. The database runs in WAL mode like the bar cache.
+
+The same file holds the trade ledger (see seesaw.ledger): an append-only
+``fills`` table and the latest per-stock position snapshot.
+"""
+
+import os
+import sqlite3
+import threading
+
+STORE_FILE = "portfolio.db"
+
+
+class RecordStore:
+    def __init__(self, path=STORE_FILE, fieldnames=()):
+        self.path = path
+        self.fieldnames = [f for f in fieldnames if f != "name"]
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS stocks (name TEXT PRIMARY KEY, position INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fills (seq INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, "
+                "date TEXT, side TEXT NOT NULL, price REAL NOT NULL, qty REAL NOT NULL, fx REAL NOT NULL, tag TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS fills_name ON fills (name, seq)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS ledger_snapshots (name TEXT PRIMARY KEY, state TEXT NOT NULL)")
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(stocks)")}
+            for field in self.fieldnames:
+                if field not in existing:
+                    # Fields added by newer versions start out NULL and fall back to defaults on load.
+                    self._conn.execute(f'ALTER TABLE stocks ADD COLUMN "{field}"')
+
+    def close(self):
+        self._conn.close()
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def table(self):
+        """
+        Returns: (header, rows) in display order; header is ["position",
+        "name", fields...] and rows are tuples of stored values (NULL as None).
+        """
+        cols = ", ".join(f'"{f}"' for f in self.fieldnames)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT position, name, {cols} FROM stocks ORDER BY position, name").fetchall()
+        return ["position", "name"] + self.fieldnames, rows
+
+    def put_many(self, items):
+        """
+        Insert or replace records in one transaction.
+
+        items: iterable of (name, position, record) tuples.
+        """
+        cols = ", ".join(f'"{f}"' for f in self.fieldnames)
+        marks = ", ".join("?" for _ in self.fieldnames)
+        sql = f"INSERT OR REPLACE INTO stocks (name, position, {cols}) VALUES (?, ?, {marks})"
+        with self._lock, self._conn:
+            self._conn.executemany(
+                sql,
+                ((name, pos) + tuple(rec.get(f) for f in self.fieldnames) for name, pos, rec in items),
+            )
+
+    def put(self, name, position, rec):
+        self.put_many([(name, position, rec)])
+
+    def delete(self, name):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM stocks WHERE name = ?", (name,))
+            self._conn.execute("DELETE FROM fills WHERE name = ?", (name,))
+            self._conn.execute("DELETE FROM ledger_snapshots WHERE name = ?", (name,))
+
+    def append_fill(self, name, date, side, price, qty, fx, tag):
+        """Returns: the new fill's sequence number."""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO fills (name, date, side, price, qty, fx, tag) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, date, side, price, qty, fx, tag),
+            )
+        return cur.lastrowid
+
+    def fills(self, name=None, after_seq=0):
+        """Returns: [(seq, name, date, side, price, qty, fx, tag)] in sequence order."""
+        sql = "SELECT seq, name, date, side, price, qty, fx, tag FROM fills WHERE seq > ?"
+        args = [after_seq]
+        if name is not None:
+            sql += " AND name = ?"
+            args.append(name)
+        with self._lock:
+            return self._conn.execute(sql + " ORDER BY seq", args).fetchall()
+
+    def ledger_snapshot(self):
+        """Returns: (seq, {name: state JSON}) of the last snapshot, seq 0 if none."""
+        with self._lock:
+            rows = self._conn.execute("SELECT name, state FROM ledger_snapshots").fetchall()
+            seq = self._conn.execute("SELECT value FROM meta WHERE key = 'ledger_snapshot_seq'").fetchone()
+        return (int(seq[0]) if seq else 0), dict(rows)
+
+    def put_ledger_snapshot(self, seq, states):
+        """Replace the snapshot with ``states`` ({name: state JSON}) covering fills up to ``seq``."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM ledger_snapshots")
+            self._conn.executemany("INSERT INTO ledger_snapshots (name, state) VALUES (?, ?)", states.items())
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('ledger_snapshot_seq', ?)", (str(seq),)
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM stocks").fetchone()[0]
+
+
+def read_meta(path, key, default=None):
+    """
+    Read one meta value from a store without opening it for writing.
+
+    Returns: the value, or ``default`` when the file, table or key is missing.
+    """
+    if not os.path.exists(path):
+        return default
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return default
+    return row[0] if row else default
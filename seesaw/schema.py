@@ -0,0 +1,256 @@
+"""
+Declarative portfolio record schema.
+
+FIELDS lists every stored column once, with its kind, default and valid
+range. Loading, defaults and writing are all driven from it, so a new
+field is one line here.
+
+Loading works column by column: each column is converted by one function
+for its kind, and the converted columns are zipped back into records.
+Cells that cannot be converted are reported as FieldError(row, field,
+value, message, action) and replaced by the field default (action RESET).
+Numbers outside their field's range are reported but kept as they are
+(KEPT), and rows without a name are dropped (SKIPPED). Rows are numbered
+from 1 in source order.
+"""
+
+import csv
+import gc
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import repeat
+
+from seesaw.formulas import RESCUE_MODES
+
+# 1: v1.0-v1.3 CSV (no units_held/market fields/manual_* v1.4 overrides)
+# 2: v1.4 fields, stored in the SQLite record store
+SCHEMA_VERSION = 2
+
+# Buy models (gear_drop %, r) - DEPRECATED, kept for backward compatibility
+# v1.4 uses dynamic LOAD/RESCUE formulas instead
+BUY_MODELS = {
+    "Agile (-5%,0.6)": {"gear_drop": 5.0, "r": 0.6},
+    "Heavy (-6%,0.7)": {"gear_drop": 6.0, "r": 0.7},
+    "Greedy (-4%,0.7)": {"gear_drop": 4.0, "r": 0.7},
+    "Cautious (-7%,0.65)": {"gear_drop": 7.0, "r": 0.65},
+}
+
+Field = namedtuple("Field", "name kind default bounds choices")
+RESET, KEPT, SKIPPED = "reset", "kept", "skipped"  # what loading did with a FieldError's cell
+FieldError = namedtuple("FieldError", "row field value message action", defaults=(RESET,))
+
+
+def _field(name, kind, default, bounds=None, choices=None):
+    return Field(name, kind, default, bounds, choices)
+
+
+# kinds: number (float, blank -> default), flag (0/1 int), text (stripped),
+# raw (kept verbatim), choice (upper-cased, one of choices), gear (float or "gearN")
+FIELDS = (
+    _field("avg_cost", "number", "", bounds=(0.0, None)),
+    _field("num_shares", "number", "", bounds=(0.0, None)),
+    _field("max_volume", "number", "", bounds=(0.0, None)),
+    _field("g_score", "number", 0.0, bounds=(0.0, 5.0)),
+    _field("l_score", "number", 0.0, bounds=(0.0, 5.0)),
+    _field("v_score", "number", 1.0, bounds=(0.0, 2.0)),
+    _field("g_date", "text", ""),
+    _field("l_date", "text", ""),
+    _field("market", "choice", "KR", choices=("KR", "US")),
+    _field("fx_rate", "number", "", bounds=(0.0, None)),
+    # v1.4 fields
+    _field("units_held", "number", 0, bounds=(0.0, None)),
+    _field("current_price", "number", ""),
+    _field("high_5d", "number", ""),
+    _field("high_10d", "number", ""),
+    _field("low_today", "number", ""),
+    _field("high_today", "number", ""),
+    _field("last_update", "text", ""),
+    _field("manual_sell_mode", "flag", 0),
+    _field("manual_sell_step", "number", 0.0, bounds=(0.0, None)),
+    _field("manual_load_mode", "flag", 0),
+    _field("manual_load_drop", "number", 0.0),
+    _field("manual_rescue_mode", "choice", "AUTO", choices=RESCUE_MODES),
+    # Deprecated (backward compatibility)
+    _field("buy_model", "raw", next(iter(BUY_MODELS))),
+    _field("manual_mode", "flag", 0),
+    _field("manual_gear", "gear", 0.0),
+)
+FIELDNAMES = ["name"] + [f.name for f in FIELDS]
+
+
+def _blank(val):
+    return val is None or not str(val).strip()
+
+
+def _number_column(values, field, errors):
+    lo, hi = field.bounds or (None, None)
+    try:
+        # Fast path: a clean column converts in one C-level pass.
+        out = list(map(float, values))
+    except (TypeError, ValueError):
+        pass
+    else:
+        if not out or ((lo is None or min(out) >= lo) and (hi is None or max(out) <= hi)):
+            return out
+    out = []
+    append = out.append
+    default = field.default
+    for i, val in enumerate(values):
+        try:
+            num = float(val)
+        except (TypeError, ValueError):
+            if not _blank(val):
+                errors.append(FieldError(i + 1, field.name, val, "not a number"))
+            append(default)
+            continue
+        if (lo is not None and num < lo) or (hi is not None and num > hi):
+            errors.append(FieldError(i + 1, field.name, val, f"out of range {lo}..{hi if hi is not None else ''}", KEPT))
+        append(num)
+    return out
+
+
+def _by_value(values, field, errors, convert):
+    # Low-cardinality columns: convert each distinct cell once, then map.
+    table = {val: convert(val, field) for val in set(values)}
+    if any(msg for _, msg in table.values()):
+        errors.extend(
+            FieldError(i + 1, field.name, val, table[val][1]) for i, val in enumerate(values) if table[val][1]
+        )
+    return [table[val][0] for val in values]
+
+
+def _flag_cell(val, field):
+    text = str(val).strip() if val is not None else ""
+    if text.isdigit():
+        return int(text), None
+    return field.default, "expected 0 or 1" if text else None
+
+
+def _choice_cell(val, field):
+    text = (val or field.default).strip().upper()
+    if text in field.choices:
+        return text, None
+    return field.default, f"expected one of {', '.join(field.choices)}" if text else None
+
+
+def _gear_cell(val, field):
+    try:
+        return float(val), None
+    except (TypeError, ValueError):
+        pass
+    # Pre-v1.4 files store the gear name ("gear2") instead of a step value.
+    if isinstance(val, str) and val.lower().startswith("gear"):
+        digits = "".join(ch for ch in val if ch.isdigit())
+        if digits:
+            return float(int(digits)), None
+    return field.default, None if _blank(val) else "not a number or gearN"
+
+
+def _flag_column(values, field, errors):
+    return _by_value(values, field, errors, _flag_cell)
+
+
+def _text_column(values, field, errors):
+    return [field.default if val is None else str(val).strip() for val in values]
+
+
+def _raw_column(values, field, errors):
+    return [field.default if val is None else val for val in values]
+
+
+def _choice_column(values, field, errors):
+    return _by_value(values, field, errors, _choice_cell)
+
+
+def _gear_column(values, field, errors):
+    return _by_value(values, field, errors, _gear_cell)
+
+
+CONVERTERS = {
+    "number": _number_column,
+    "flag": _flag_column,
+    "text": _text_column,
+    "raw": _raw_column,
+    "choice": _choice_column,
+    "gear": _gear_column,
+}
+
+
+def default_record():
+    """Returns: a record with every field at its schema default."""
+    return {f.name: f.default for f in FIELDS}
+
+
+def to_row(name, rec):
+    """Returns: the stored/exported row for one record, with defaults for missing fields."""
+    row = {"name": name}
+    for f in FIELDS:
+        row[f.name] = rec.get(f.name, f.default)
+    return row
+
+
+@contextmanager
+def _gc_paused():
+    # Bulk loads allocate hundreds of thousands of acyclic containers; the
+    # cyclic collector would otherwise rescan them many times over.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def read_table(header, rows):
+    """
+    Convert a table of raw cells into records, one column at a time.
+
+    header: column names (unknown columns are ignored, missing fields get
+            their default). rows: sequences of cells (CSV strings or SQLite
+            values); short rows are padded with blanks.
+
+    Returns: (records, errors) where records is a list of (row_index, name,
+    record) for every row with a name, row_index being 0-based into
+    ``rows``, and errors is a list of FieldError.
+    """
+    with _gc_paused():
+        return _read_table(header, rows)
+
+
+def _read_table(header, rows):
+    errors = []
+    width = len(header)
+    # Blank lines are dropped; ``kept`` maps table positions back to source rows.
+    kept = [i for i, row in enumerate(rows) if any(row)]
+    if not kept:
+        return [], errors
+    padded = [rows[i] if len(rows[i]) >= width else tuple(rows[i]) + ("",) * (width - len(rows[i])) for i in kept]
+    columns = dict(zip(header, zip(*padded)))
+
+    names = [("" if val is None else str(val).strip()) for val in columns["name"]] if "name" in columns else [""] * len(kept)
+    keys, converted = [], []
+    for f in FIELDS:
+        keys.append(f.name)
+        if f.name in columns:
+            converted.append(CONVERTERS[f.kind](columns[f.name], f, errors))
+        else:
+            converted.append((f.default,) * len(kept))
+
+    dicts = map(dict, map(zip, repeat(keys), zip(*converted)))
+    records = [(i, name, rec) for i, name, rec in zip(kept, names, dicts) if name]
+    errors.extend(FieldError(pos + 1, "name", "", "missing name; row skipped", SKIPPED) for pos, name in enumerate(names) if not name)
+    errors = sorted((e._replace(row=kept[e.row - 1] + 1) for e in errors), key=lambda e: e.row)
+    return records, errors
+
+
+def read_csv(path):
+    """Returns: read_table() of a portfolio CSV file."""
+    with open(path, newline="", encoding="utf-8") as f, _gc_paused():
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        return _read_table(header, list(reader))
+
+
+def format_error(err):
+    return f"row {err.row}, {err.field}: {err.message} ({err.value!r})"
@@ -0,0 +1,194 @@
+"""
+Headless signal sheet.
+
+Loads the portfolio, optionally refreshes prices, evaluates every stock in
+one batch pass (seesaw.batch, the vectorized compute_state) and writes the
+numbers the GUI result panel shows as JSON or CSV. Nothing here imports Tk
+or matplotlib, and the market module (and yfinance) is only imported for
+--refresh, so the sheet is cheap to run from cron.
+
+Usage:
+    python -m seesaw.sheet [--data portfolio.db | data.csv | --portfolio NAME] [--refresh]
+                           [--format json|csv] [-o out]
+
+A .csv data file is read into an in-memory store and never written back.
+Exit status: 0 on success, 1 if any stored value failed validation or the
+data file is missing, 3 if a --refresh left stocks without fresh prices.
+The sheet is still written in the last two cases.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+from importlib.util import find_spec
+
+from seesaw import formulas, portfolio
+from seesaw.batch import batch_states
+from seesaw.recordstore import STORE_FILE
+from seesaw.schema import format_error
+
+EXIT_DATA_ERROR = 1
+EXIT_REFRESH_FAILED = 3
+
+SHEET_FIELDS = (
+    "name",
+    "market",
+    "fx_rate",
+    "avg_cost",
+    "num_shares",
+    "units_held",
+    "total_units",
+    "deployed_pct",
+    "current_price",
+    "low_today",
+    "high_today",
+    "last_update",
+    "g_score",
+    "l_score",
+    "v_score",
+    "trend",
+    "high_ref_label",
+    "high_ref",
+    "load_mode",
+    "load_drop_pct",
+    "load_trigger",
+    "load_status",
+    "rescue_mode",
+    "rescue_gear",
+    "rescue_drop_pct",
+    "rescue_r",
+    "rescue_trigger",
+    "rescue_qty",
+    "buy_label",
+    "buy_price",
+    "buy_units",
+    "buy_shares",
+    "projected_avg",
+    "projected_units",
+    "projected_shares",
+    "sell_mode",
+    "gear",
+    "gear_penalty",
+    "sell_step_pct",
+    "sell_t1",
+    "sell_t2",
+)
+
+
+def sheet_row(name, data):
+    """Returns: {SHEET_FIELDS: value} for one stock from its state (see batch.batch_states)."""
+    gear = data["auto_gear"]
+    t1, t2 = data["sell_targets"] if data["avg_cost"] > 0 else (0.0, 0.0)
+    derived = {
+        "name": name,
+        "deployed_pct": data["total_u"] * 100,
+        "gear": gear["gear"],
+        "gear_penalty": gear["penalty"],
+        "sell_step_pct": data["active_step"],
+        "sell_t1": t1,
+        "sell_t2": t2,
+    }
+    return {key: derived[key] if key in derived else data[key] for key in SHEET_FIELDS}
+
+
+def sheet_rows():
+    """Returns: sheet_row() for every stock in ``portfolio.stock_order``, from one batch pass."""
+    order = portfolio.stock_order
+    states = batch_states(portfolio.stock_data, order, portfolio.GLOBAL_FX_RATE, portfolio.GLOBAL_MAX_VOLUME_KRW)
+    return [sheet_row(name, data) for name, data in zip(order, states)]
+
+
+def refresh_prices(names, store_path):
+    """
+    Fetch prices and FX for ``names`` and apply them to the records.
+
+    Returns: {name: message} for every ticker that was not updated.
+    """
+    if find_spec("yfinance") is None:
+        return {"*": "yfinance is not installed"}
+    from seesaw.barstore import BARS_FILE, BarStore
+    from seesaw.market import default_provider, fetch_market_snapshot
+
+    provider = default_provider()
+    bar_store = BarStore(os.path.join(os.path.dirname(store_path), BARS_FILE))
+    try:
+        prices, fx_rate, errors = fetch_market_snapshot(names, provider, bar_store)
+    finally:
+        bar_store.close()
+    fx_changed = bool(fx_rate and fx_rate > 10 and portfolio.set_fx_rate(fx_rate))
+    for name, snap in prices.items():
+        portfolio.apply_price_snapshot(name, snap)
+    portfolio.save_records(None if fx_changed else list(prices))
+    return errors
+
+
+def write_sheet(rows, out, fmt, meta):
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=SHEET_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        json.dump(dict(meta, stocks=rows), out, indent=2, ensure_ascii=False)
+        out.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the seesaw signal sheet for every stock.")
+    parser.add_argument("--data", default=STORE_FILE, help=f"record store or legacy data CSV (default {STORE_FILE})")
+    parser.add_argument("--portfolio", help="named portfolio to use instead of --data")
+    parser.add_argument("--refresh", action="store_true", help="fetch current prices and FX first")
+    parser.add_argument("--format", choices=("json", "csv"), default="json")
+    parser.add_argument("-o", "--output", help="output file (default stdout)")
+    args = parser.parse_args(argv)
+
+    if args.portfolio:
+        paths = portfolio.list_portfolios()
+        if args.portfolio not in paths:
+            print(f"error: unknown portfolio {args.portfolio!r} (have: {', '.join(paths)})", file=sys.stderr)
+            return EXIT_DATA_ERROR
+        args.data = paths[args.portfolio]
+    if not os.path.exists(args.data):
+        print(f"error: {args.data} not found", file=sys.stderr)
+        return EXIT_DATA_ERROR
+    try:
+        if args.data.lower().endswith(".csv"):
+            portfolio.load_data(":memory:", legacy_csv=args.data)
+        else:
+            portfolio.load_data(args.data)
+    except (OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return EXIT_DATA_ERROR
+    status = 0
+    for source, err in portfolio.load_errors:
+        print(f"{source}: {format_error(err)}", file=sys.stderr)
+        status = EXIT_DATA_ERROR
+
+    if args.refresh:
+        errors = refresh_prices(list(portfolio.stock_order), os.path.abspath(args.data))
+        for name, msg in errors.items():
+            print(f"refresh {name}: {msg}", file=sys.stderr)
+        if errors and not status:
+            status = EXIT_REFRESH_FAILED
+
+    rows = sheet_rows()
+    meta = {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "fx_rate": portfolio.GLOBAL_FX_RATE,
+        "max_volume_krw": portfolio.GLOBAL_MAX_VOLUME_KRW,
+        "portfolio": portfolio.active_portfolio,
+        "portfolio_n": formulas.PORTFOLIO_N,
+        "fx_light": portfolio.fx_light(),
+    }
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            write_sheet(rows, out, args.format, meta)
+    else:
+        write_sheet(rows, sys.stdout, args.format, meta)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
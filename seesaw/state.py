@@ -0,0 +1,285 @@
+"""
+Per-stock calculator state.
+
+``compute_state`` turns one stock's inputs plus its stored market fields
+into every number the GUI shows: LOAD/RESCUE triggers, the next buy, sell
+targets and portfolio utilisation. ``parse_record`` builds the same input
+dict from a stored record, so scripts can run the calculator without the
+form.
+
+compute_state is a chain of small step functions (select_load_drop,
+compute_capacity, compute_load_status, compute_rescue, next_buy, ...).
+The dependency-graph calculator (seesaw.calcgraph) uses the same steps as
+its nodes, so the two cannot drift apart.
+"""
+
+from seesaw import formulas, portfolio
+from seesaw.formulas import (
+    RESCUE_PRESETS,
+    compute_auto_gear,
+    compute_load_trigger,
+    compute_position_value_krw,
+    compute_rescue_trigger,
+    compute_sell_targets_v1_4,
+    compute_trend,
+    compute_units_held,
+    round_half_up,
+    select_load_reference,
+)
+
+MARKET_FIELDS = ("current_price", "high_5d", "high_10d", "low_today", "high_today")
+
+
+def compute_total_deployment(current_name, cur_avg_cost, cur_num_shares, cur_max_volume_krw, cur_market, cur_fx_rate):
+    # Current stock comes from the (possibly unsaved) form; the rest from the running aggregate.
+    total_current = compute_position_value_krw(cur_avg_cost, cur_num_shares, cur_market, cur_fx_rate)
+    total_current += portfolio.deployment.total_excluding(current_name)
+
+    global_max = portfolio.GLOBAL_MAX_VOLUME_KRW or cur_max_volume_krw
+    return total_current, global_max
+
+
+# ---- pipeline steps, shared with the dependency-graph calculator (seesaw.calcgraph) ----
+
+
+def read_market_fields(rec):
+    """Returns: {MARKET_FIELDS: float}; all are 0 when any one is unreadable."""
+    try:
+        return {key: float(rec.get(key, 0) or 0) for key in MARKET_FIELDS}
+    except (TypeError, ValueError):
+        return dict.fromkeys(MARKET_FIELDS, 0.0)
+
+
+def select_load_drop(auto_drop_pct, manual_load_mode, manual_load_drop):
+    """Returns: (LOAD drop %, "Manual" or "Auto"); a manual drop is held to 3-7%."""
+    if manual_load_mode and manual_load_drop > 0:
+        return max(3.0, min(7.0, manual_load_drop)), "Manual"
+    return auto_drop_pct, "Auto"
+
+
+def load_trigger_price(high_ref, load_drop_pct):
+    return high_ref * (1 - load_drop_pct / 100) if high_ref else 0.0
+
+
+def local_unit_size(unit_size_krw, market, fx_rate):
+    return (unit_size_krw / fx_rate) if market == "US" and fx_rate else unit_size_krw
+
+
+def compute_capacity(total_current, total_max, N):
+    """Returns: (total_u, total_units, remaining_units) for ``total_current`` KRW deployed."""
+    total_u = total_current / total_max if total_max else 0.0
+    total_units = total_u * N if N else 0.0
+    remaining_units = max(0.0, N - total_units) if N else 0.0
+    return total_u, total_units, remaining_units
+
+
+def compute_load_status(high_ref, units_held, remaining_units, low_today, current_price, load_trigger):
+    if high_ref <= 0:
+        return "Waiting for high"
+    if units_held > 0:
+        return "Blocked (units>0)"
+    if remaining_units <= 0:
+        return "Blocked (portfolio full)"
+    if remaining_units < 1.0:
+        return "Blocked (capacity<1u)"
+    price_check = low_today if low_today > 0 else current_price
+    if price_check > 0 and load_trigger > 0 and price_check <= load_trigger:
+        return "ACTIVE"
+    return "Watching"
+
+
+def rescue_override(manual_rescue_mode):
+    """Returns: (RESCUE_PRESETS entry, or None for AUTO, label); unknown modes read as DEFAULT."""
+    if manual_rescue_mode == "AUTO":
+        return None, "Auto"
+    preset = manual_rescue_mode if manual_rescue_mode in RESCUE_PRESETS else "DEFAULT"
+    return RESCUE_PRESETS[preset], preset.title()
+
+
+def compute_rescue(avg_cost, units_held, total_units, N, override):
+    """Returns: (trigger, qty, gear, drop_pct, r); a preset ``override`` supplies gear, drop and r."""
+    if override:
+        rescue_drop_pct, rescue_r, rescue_gear = override
+        trigger, qty, _, _, _ = compute_rescue_trigger(
+            avg_cost, units_held, total_units, N, rescue_drop_pct, rescue_r, rescue_gear
+        )
+        return trigger, qty, rescue_gear, rescue_drop_pct, rescue_r
+    return compute_rescue_trigger(avg_cost, units_held, total_units, N)
+
+
+def select_sell_step(manual_mode, manual_step, base_step):
+    """Returns: (sell step %, "Manual" or "Auto")."""
+    if manual_mode:
+        return 1.0 + max(manual_step, 0.0), "Manual"
+    return base_step, "Auto"
+
+
+def next_buy(units_held, load_trigger, remaining_units, load_drop_pct, rescue, rescue_mode):
+    """
+    The next buy: LOAD while flat, RESCUE once held.
+
+    rescue: compute_rescue() result. rescue_mode: rescue_override() result.
+    Returns: (units, price, drop_pct, r, gear, label).
+    """
+    if units_held <= 0:
+        units = 1 if load_trigger > 0 and remaining_units >= 1.0 else 0
+        return units, load_trigger, load_drop_pct, 0.0, 0, "LOAD"
+    trigger, qty, gear, drop_pct, r = rescue
+    override, label = rescue_mode
+    if override:
+        buy_label = f"Rescue {label}"
+    else:
+        buy_label = f"G{gear:.1f}" if gear else "RESCUE"
+    return qty, trigger, drop_pct, r, gear, buy_label
+
+
+def size_buy(buy_units, buy_price, unit_size_local):
+    """Returns: (buy value in local currency, whole shares to buy)."""
+    buy_value_local = buy_units * unit_size_local if unit_size_local else 0.0
+    if buy_price and buy_units > 0 and buy_value_local > 0:
+        return buy_value_local, max(1, round_half_up(buy_value_local / buy_price))
+    return buy_value_local, 0
+
+
+def project_position(avg_cost, num_shares, buy_price, buy_shares):
+    """Returns: (average cost, share count) after the next buy fills; 0.0 average without a buy."""
+    total_shares = num_shares + buy_shares
+    projected_avg = (
+        (avg_cost * num_shares + buy_price * buy_shares) / total_shares if buy_shares and total_shares else 0.0
+    )
+    return projected_avg, int(total_shares) if total_shares else 0
+
+
+def compute_state(parsed, rec, current_name):
+    avg_cost = parsed["avg_cost"]
+    num_shares = parsed["num_shares"]
+    max_volume_krw = parsed["max_volume"]
+    market = parsed["market"]
+    fx_rate = parsed["fx_rate"]
+    g_score = parsed["g_score"]
+    l_score = parsed["l_score"]
+    v_score = parsed["v_score"]
+    units_held = parsed["units_held"]
+    unit_size_local = parsed["unit_size_local"]
+
+    prices = read_market_fields(rec)
+    current_price = prices["current_price"]
+    low_today = prices["low_today"]
+
+    trend = compute_trend(g_score, l_score)
+    load_drop_pct, load_mode = select_load_drop(
+        compute_load_trigger(trend, v_score), parsed["manual_load_mode"], parsed["manual_load_drop"]
+    )
+    high_ref, high_ref_label = select_load_reference(prices["high_5d"], prices["high_10d"])
+    load_trigger = load_trigger_price(high_ref, load_drop_pct)
+
+    total_current, total_max = compute_total_deployment(
+        current_name, avg_cost, num_shares, max_volume_krw, market, fx_rate
+    )
+    # N is read at call time: each portfolio sets its own (see portfolio.load_data).
+    N = formulas.PORTFOLIO_N
+    total_u, total_units, remaining_units = compute_capacity(total_current, total_max, N)
+    load_status = compute_load_status(high_ref, units_held, remaining_units, low_today, current_price, load_trigger)
+
+    rescue_mode = rescue_override(parsed["manual_rescue_mode"])
+    rescue = compute_rescue(avg_cost, units_held, total_units, N, rescue_mode[0])
+    rescue_trigger, rescue_qty, rescue_gear, rescue_drop_pct, rescue_r = rescue
+
+    auto_gear = compute_auto_gear(g_score, l_score, total_u)
+    active_step_pct, sell_mode = select_sell_step(parsed["manual_mode"], parsed["manual_step"], auto_gear["base_step"])
+    sell_targets = compute_sell_targets_v1_4(avg_cost, active_step_pct)
+
+    buy_units, buy_price, buy_drop_pct, buy_r, buy_gear, buy_label = next_buy(
+        units_held, load_trigger, remaining_units, load_drop_pct, rescue, rescue_mode
+    )
+    buy_value_local, buy_shares = size_buy(buy_units, buy_price, unit_size_local)
+    projected_avg, projected_shares = project_position(avg_cost, num_shares, buy_price, buy_shares)
+
+    return {
+        "trend": trend,
+        "load_drop_pct": load_drop_pct,
+        "load_mode": load_mode,
+        "high_5d": prices["high_5d"],
+        "high_10d": prices["high_10d"],
+        "high_ref": high_ref,
+        "high_ref_label": high_ref_label,
+        "load_trigger": load_trigger,
+        "load_status": load_status,
+        "current_price": current_price,
+        "low_today": low_today,
+        "high_today": prices["high_today"],
+        "last_update": rec.get("last_update", ""),
+        "rescue_trigger": rescue_trigger,
+        "rescue_qty": rescue_qty,
+        "rescue_gear": rescue_gear,
+        "rescue_drop_pct": rescue_drop_pct,
+        "rescue_r": rescue_r,
+        "rescue_mode": rescue_mode[1],
+        "buy_units": buy_units,
+        "buy_price": buy_price,
+        "buy_drop_pct": buy_drop_pct,
+        "buy_r": buy_r,
+        "buy_gear": buy_gear,
+        "buy_label": buy_label,
+        "buy_value_local": buy_value_local,
+        "buy_shares": buy_shares,
+        "projected_avg": projected_avg,
+        "projected_units": units_held + buy_units,
+        "projected_shares": projected_shares,
+        "auto_gear": auto_gear,
+        "sell_mode": sell_mode,
+        "active_step": active_step_pct,
+        "sell_targets": sell_targets,
+        "total_u": total_u,
+        "total_units": total_units,
+    }
+
+
+def _to_float(val, default=0.0):
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_record(rec):
+    """
+    Build ``compute_state`` inputs from a stored record.
+
+    Mirrors the form parser: blank numbers are 0, the portfolio-wide FX and
+    max volume apply when set. Returns: dict shaped like parse_form_inputs().
+    """
+    market = rec.get("market") or "KR"
+    avg_cost = _to_float(rec.get("avg_cost"))
+    num_shares = _to_float(rec.get("num_shares"))
+    max_volume = portfolio.GLOBAL_MAX_VOLUME_KRW or _to_float(rec.get("max_volume"))
+    fx_rate = _to_float(rec.get("fx_rate"), portfolio.GLOBAL_FX_RATE) or portfolio.GLOBAL_FX_RATE
+    units_held, unit_size_krw, position_krw = compute_units_held(avg_cost, num_shares, max_volume, market, fx_rate)
+    unit_size_local = local_unit_size(unit_size_krw, market, fx_rate)
+    return {
+        "avg_cost": avg_cost,
+        "num_shares": num_shares,
+        "max_volume": max_volume,
+        "market": market,
+        "fx_rate": fx_rate,
+        "manual_mode": bool(rec.get("manual_sell_mode")),
+        "manual_step": _to_float(rec.get("manual_sell_step")),
+        "manual_load_mode": bool(rec.get("manual_load_mode")),
+        "manual_load_drop": _to_float(rec.get("manual_load_drop")),
+        "manual_rescue_mode": str(rec.get("manual_rescue_mode") or "AUTO").strip().upper(),
+        "g_score": _to_float(rec.get("g_score")),
+        "l_score": _to_float(rec.get("l_score")),
+        "v_score": _to_float(rec.get("v_score"), 1.0),
+        "units_held": units_held,
+        "unit_size_krw": unit_size_krw,
+        "unit_size_local": unit_size_local,
+        "position_krw": position_krw,
+        "g_date": rec.get("g_date", ""),
+        "l_date": rec.get("l_date", ""),
+    }
+
+
+def compute_record_state(name):
+    """Returns: compute_state() for a saved stock in ``portfolio.stock_data``."""
+    rec = portfolio.stock_data[name]
+    return compute_state(parse_record(rec), rec, name)
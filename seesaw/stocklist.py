@@ -0,0 +1,111 @@
+"""
+Rows for the stock selector list.
+
+One row per stock with the columns the list shows and sorts by: market,
+units held, LOAD status and the distance from the current price down to the
+next buy level (LOAD when flat, RESCUE when held). Rows are cached per name
+and only the stocks whose records changed are recomputed, so the list can
+be updated in place after a save or a market refresh. Like the overview
+(seesaw.overview), rows also depend on the portfolio-wide inputs: when those
+changed since the last update, every row is recomputed.
+"""
+
+from seesaw import portfolio
+from seesaw.overview import portfolio_context
+from seesaw.state import compute_record_state, parse_record
+
+LIST_COLUMNS = ("market", "units", "load_status", "distance")
+SORT_KEYS = ("name",) + LIST_COLUMNS
+
+
+def list_row(name):
+    """
+    Returns: {"name", "market", "units", "load_status", "buy_label", "distance"}.
+
+    ``distance`` is the drop in percent from the current price to the buy
+    level, negative once the price is through it, or None without a price
+    or level.
+    """
+    rec = portfolio.stock_data[name]
+    parsed = parse_record(rec)
+    data = compute_record_state(name)
+    price, level = data["current_price"], data["buy_price"]
+    distance = (1 - level / price) * 100 if price > 0 and level > 0 else None
+    return {
+        "name": name,
+        "market": parsed["market"],
+        "units": parsed["units_held"],
+        "load_status": data["load_status"] if parsed["units_held"] <= 0 else "Held",
+        "buy_label": data["buy_label"],
+        "distance": distance,
+    }
+
+
+def _sort_value(row, key):
+    value = row[key]
+    if isinstance(value, str):
+        return value.lower()
+    return value
+
+
+class StockList:
+    def __init__(self):
+        self.rows = {}  # name -> list_row(name)
+        self._context = None
+
+    def update(self, names=None):
+        """
+        Recompute rows for ``names`` (default: every stock); unknown names are dropped.
+
+        A change in the portfolio-wide inputs (e.g. a fill that uses up the
+        last units) recomputes every row, whatever ``names`` says.
+
+        Returns: list of names whose row was recomputed or dropped.
+        """
+        context = portfolio_context()
+        if context != self._context:
+            self._context = context
+            names = None
+        if names is None:
+            names = list(portfolio.stock_order)
+            for stale in set(self.rows) - set(names):
+                del self.rows[stale]
+        changed = []
+        for name in names:
+            if name in portfolio.stock_data:
+                self.rows[name] = list_row(name)
+            else:
+                self.rows.pop(name, None)
+            changed.append(name)
+        return changed
+
+    def remove(self, name):
+        self.rows.pop(name, None)
+
+    def clear(self):
+        self.rows.clear()
+        self._context = None
+
+    def visible(self, query="", sort_by="name", descending=False):
+        """
+        Returns: names matching ``query`` (case-insensitive: a substring of
+        the name, or the whole market code, so "u" finds names but not every
+        US stock), ordered by ``sort_by``; "name" keeps the saved stock order
+        when ascending.
+        """
+        query = query.strip().lower()
+        names = [
+            name
+            for name in portfolio.stock_order
+            if name in self.rows and (not query or query in name.lower() or query == self.rows[name]["market"].lower())
+        ]
+        if sort_by == "name" and not descending:
+            return names
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"unknown sort column {sort_by!r}")
+        if sort_by == "distance":
+            # Missing distances stay last even when the rest is reversed.
+            known = [n for n in names if self.rows[n]["distance"] is not None]
+            known.sort(key=lambda n: self.rows[n]["distance"], reverse=descending)
+            return known + [n for n in names if self.rows[n]["distance"] is None]
+        return sorted(names, key=lambda n: _sort_value(self.rows[n], sort_by), reverse=descending)
@@ -0,0 +1,232 @@
+"""
+Parallel parameter sweep over the tunable strategy constants.
+
+Each grid point overrides constants in ``seesaw.formulas`` (see
+TUNABLE_PARAMS) inside a worker process and runs the backtester on the
+same bars. Results are appended to a CSV table as they finish, so an
+interrupted sweep resumes where it stopped, retrying any combination that
+raised an error.
+
+Usage:
+    python -m seesaw.sweep grid.json bars_dir results.csv [--scores scores.json] [--workers 8]
+
+grid.json maps parameter names to lists of values, e.g.
+    {"RESCUE_U_SAT": [8, 10, 12], "PORTFOLIO_N": [20, 25, 30]}
+bars_dir holds one Date,Open,High,Low,Close CSV per ticker (file stem = ticker).
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+from contextlib import contextmanager
+from multiprocessing import Pool
+
+from seesaw import formulas
+from seesaw.backtest import align_bars, load_bars_csv, run_backtest
+
+STAT_COLUMNS = (
+    "final_equity",
+    "total_return",
+    "cagr",
+    "max_drawdown",
+    "trades",
+    "campaigns",
+    "win_rate",
+    "max_units",
+    "days_at_capacity",
+)
+
+_worker = {}
+
+
+def expand_grid(grid):
+    """Returns: list of {param: value} dicts, one per grid combination."""
+    unknown = sorted(set(grid) - set(formulas.TUNABLE_PARAMS))
+    if unknown:
+        raise ValueError(f"Unknown sweep parameter(s): {', '.join(unknown)}")
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def param_key(params):
+    return ";".join(f"{name}={float(params[name])!r}" for name in sorted(params))
+
+
+@contextmanager
+def override_params(params):
+    """Temporarily replace module constants in seesaw.formulas."""
+    saved = {name: getattr(formulas, name) for name in params}
+    try:
+        for name, value in params.items():
+            if name == "PORTFOLIO_N":
+                value = int(value)
+            setattr(formulas, name, value)
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(formulas, name, value)
+
+
+def _init_worker(bars, scores, backtest_kwargs):
+    _worker["bars"] = bars
+    _worker["aligned"] = align_bars(bars)
+    _worker["scores"] = scores
+    _worker["kwargs"] = backtest_kwargs
+
+
+def _evaluate(params):
+    with override_params(params):
+        try:
+            result = run_backtest(_worker["bars"], _worker["scores"], aligned=_worker["aligned"], **_worker["kwargs"])
+        except Exception as e:
+            return params, None, str(e)
+    return params, result["stats"], ""
+
+
+def _finished_rows(out_path, fieldnames):
+    # Returns: ({param key: last finished row}, number of rows not kept).
+    rows, dropped = {}, 0
+    if not os.path.exists(out_path) or os.path.getsize(out_path) == 0:
+        return rows, dropped
+    with open(out_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames != fieldnames:
+            raise ValueError(f"{out_path} was written for a different grid; use a new results file.")
+        for row in reader:
+            if None in row or None in row.values() or row["error"]:
+                dropped += 1
+                continue
+            params = {k: row[k] for k in row if k in formulas.TUNABLE_PARAMS}
+            try:
+                key = param_key(params)
+            except ValueError:
+                dropped += 1
+                continue
+            if key in rows:
+                dropped += 1
+            rows[key] = row
+    return rows, dropped
+
+
+def read_checkpoint(out_path, fieldnames):
+    """
+    Returns: set of param keys with a finished result in the results table.
+
+    Rows cut short (e.g. by a kill mid-write) or with unreadable parameters
+    are skipped, and so are rows recorded with an error, so those
+    combinations run again on resume.
+    """
+    return set(_finished_rows(out_path, fieldnames)[0])
+
+
+def compact_results(out_path, fieldnames):
+    """
+    Rewrite the results table with one finished row per combination.
+
+    Errored, cut-short and unreadable rows are dropped and a repeated
+    combination keeps its last row, so a resumed sweep appends each retry
+    as that combination's only row. The file is left alone when there is
+    nothing to drop; otherwise the new table is written next to it and
+    swapped in with os.replace.
+
+    Returns: set of param keys with a finished result (as read_checkpoint).
+    """
+    rows, dropped = _finished_rows(out_path, fieldnames)
+    if dropped:
+        tmp_path = out_path + ".tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows.values())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, out_path)
+    return set(rows)
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) in (b"\n", b"\r")
+
+
+def run_sweep(grid, bars, scores, out_path, workers=None, chunksize=4, progress=None, **backtest_kwargs):
+    """
+    Evaluate every grid combination not already in ``out_path``.
+
+    The table is compacted first (see compact_results), so it ends with one
+    row per evaluated combination: its result, or the error it raised.
+
+    bars/scores: as for ``run_backtest``; shipped to each worker once.
+    workers: process count, defaults to all cores.
+    progress: optional callback(done, total) after each result.
+    backtest_kwargs: forwarded to ``run_backtest`` (max_volume_krw, fx_rate).
+
+    Returns: number of combinations evaluated in this call.
+    """
+    combos = expand_grid(grid)
+    fieldnames = sorted(grid) + list(STAT_COLUMNS) + ["error"]
+    done = compact_results(out_path, fieldnames)
+    pending = [p for p in combos if param_key(p) not in done]
+    if not pending:
+        return 0
+
+    new_file = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+    finished = 0
+    with open(out_path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        if new_file:
+            writer.writeheader()
+        elif not _ends_with_newline(out_path):
+            # Close off a row cut short by an interrupted run.
+            f.write("\n")
+        with Pool(workers or os.cpu_count(), initializer=_init_worker, initargs=(bars, scores, backtest_kwargs)) as pool:
+            for params, stats, error in pool.imap_unordered(_evaluate, pending, chunksize=chunksize):
+                row = dict(params)
+                row.update(stats or {})
+                row["error"] = error
+                writer.writerow(row)
+                f.flush()
+                finished += 1
+                if progress:
+                    progress(len(combos) - len(pending) + finished, len(combos))
+    return finished
+
+
+def load_bars_dir(path):
+    bars = {}
+    for fname in sorted(os.listdir(path)):
+        stem, ext = os.path.splitext(fname)
+        if ext.lower() == ".csv":
+            bars[stem] = load_bars_csv(os.path.join(path, fname))
+    return bars
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep seesaw strategy constants over historical bars.")
+    parser.add_argument("grid", help="JSON file mapping parameter names to value lists")
+    parser.add_argument("bars_dir", help="directory of per-ticker OHLC CSV files")
+    parser.add_argument("out", help="results CSV (appended to and resumed from)")
+    parser.add_argument("--scores", help="JSON file mapping ticker to g_score/l_score/v_score/market")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with open(args.grid, encoding="utf-8") as f:
+        grid = json.load(f)
+    scores = {}
+    if args.scores:
+        with open(args.scores, encoding="utf-8") as f:
+            scores = json.load(f)
+    bars = load_bars_dir(args.bars_dir)
+
+    def report(done, total):
+        print(f"\r{done}/{total}", end="", flush=True)
+
+    count = run_sweep(grid, bars, scores, args.out, workers=args.workers, progress=report)
+    print(f"\nEvaluated {count} combination(s) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
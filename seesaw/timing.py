@@ -0,0 +1,130 @@
+"""
+Lightweight timing instrumentation.
+
+Timed sections are recorded into a fixed-size ring buffer per name, so the
+cost is one perf_counter pair and a deque append; p50/p95/max are computed
+only when someone asks. Each event can carry details (e.g. the ticker) so
+the slowest item of the last refresh can be picked out. Events can also be
+appended to a JSON-lines trace file for offline analysis.
+
+Recording is thread-safe: market fetches report from worker threads.
+"""
+
+import json
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from functools import wraps
+from math import ceil
+
+RING_SIZE = 512  # events kept per name
+TRACE_FILE = "timings.jsonl"
+
+Event = namedtuple("Event", "time seconds detail")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class Timings:
+    def __init__(self, size=RING_SIZE):
+        self.size = size
+        self._rings = {}  # name -> deque of Event
+        self._lock = threading.Lock()
+        self._trace = None
+
+    def record(self, name, seconds, **detail):
+        event = Event(time.time(), seconds, detail)
+        with self._lock:
+            ring = self._rings.get(name)
+            if ring is None:
+                ring = self._rings[name] = deque(maxlen=self.size)
+            ring.append(event)
+            if self._trace is not None:
+                self._trace.write(json.dumps({"t": event.time, "name": name, "ms": seconds * 1000.0, **detail}) + "\n")
+                self._trace.flush()
+
+    @contextmanager
+    def timer(self, name, **detail):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0, **detail)
+
+    def wrap(self, name, func):
+        """Returns: ``func`` with every call recorded under ``name``."""
+
+        @wraps(func)
+        def timed_call(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - t0)
+
+        return timed_call
+
+    def events(self, name, since=None):
+        """Returns: recorded Events for ``name``, oldest first, optionally only those after ``since`` (epoch)."""
+        with self._lock:
+            ring = list(self._rings.get(name, ()))
+        return ring if since is None else [e for e in ring if e.time >= since]
+
+    def stats(self, name):
+        """Returns: dict with count, last, p50, p95 and max (seconds) over the ring, or None."""
+        ring = self.events(name)
+        if not ring:
+            return None
+        values = sorted(e.seconds for e in ring)
+        return {
+            "count": len(values),
+            "last": ring[-1].seconds,
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "max": values[-1],
+        }
+
+    def summary(self):
+        """Returns: {name: stats(name)} for every name recorded so far, sorted by name."""
+        with self._lock:
+            names = sorted(self._rings)
+        return {name: self.stats(name) for name in names}
+
+    def clear(self):
+        with self._lock:
+            self._rings.clear()
+
+    @property
+    def tracing(self):
+        return self._trace is not None
+
+    def start_trace(self, path=TRACE_FILE):
+        """Append every following event to ``path`` as one JSON object per line."""
+        with self._lock:
+            if self._trace is None:
+                self._trace = open(path, "a", encoding="utf-8")
+
+    def stop_trace(self):
+        with self._lock:
+            if self._trace is not None:
+                self._trace.close()
+                self._trace = None
+
+
+timings = Timings()
+
+
+def timed(name):
+    """Decorator recording every call of the function into ``timings`` under ``name``."""
+
+    def decorate(func):
+        return timings.wrap(name, func)
+
+    return decorate
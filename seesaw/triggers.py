@@ -0,0 +1,83 @@
+"""
+Sorted trigger-level index.
+
+Each ticker's live levels (LOAD, RESCUE, sell T1/T2) are kept as a sorted
+tuple with their kinds alongside. ``touched`` matches a day's low/high
+range against them by binary search, so "which levels did today's range
+reach" costs O(log k) per ticker instead of re-running compute_state or
+testing every level; this is what the live alerts (seesaw.alerts) ask.
+
+Buy levels (LOAD, RESCUE) are reached when the low is at or below them,
+sell tiers when the high is at or above them. Levels are replaced per
+ticker whenever its inputs change (avg cost, G/L/V, units) via
+``set_levels`` or ``update_stock``.
+"""
+
+from bisect import bisect_left, bisect_right
+
+BUY_KINDS = ("LOAD", "RESCUE")
+SELL_KINDS = ("T1", "T2")
+
+
+def levels_from_state(data, avg_cost, units_held):
+    """
+    Returns: {kind: price} for the levels a compute_state() result makes live.
+
+    LOAD applies to a flat stock with room for a unit, RESCUE to a held one
+    (also when a full portfolio caps its size at 0); sell tiers need a cost
+    basis.
+    """
+    levels = {}
+    if units_held <= 0:
+        if data["load_trigger"] > 0 and data["buy_units"] > 0:
+            levels["LOAD"] = data["load_trigger"]
+    elif data["rescue_trigger"] > 0:
+        levels["RESCUE"] = data["rescue_trigger"]
+    if avg_cost > 0:
+        t1, t2 = data["sell_targets"]
+        if t1 > 0:
+            levels["T1"] = t1
+        if t2 > 0:
+            levels["T2"] = t2
+    return levels
+
+
+class TriggerIndex:
+    def __init__(self):
+        self._prices = {}  # name -> sorted tuple of level prices
+        self._kinds = {}  # name -> kinds in the same order
+
+    def set_levels(self, name, levels):
+        """Replace one ticker's levels ({kind: price})."""
+        pairs = sorted((price, kind) for kind, price in levels.items())
+        self._prices[name] = tuple(p for p, _ in pairs)
+        self._kinds[name] = tuple(k for _, k in pairs)
+
+    def update_stock(self, name, data, avg_cost, units_held):
+        self.set_levels(name, levels_from_state(data, avg_cost, units_held))
+
+    def remove(self, name):
+        self._prices.pop(name, None)
+        self._kinds.pop(name, None)
+
+    def levels(self, name):
+        return dict(zip(self._kinds.get(name, ()), self._prices.get(name, ())))
+
+    def touched(self, name, low, high):
+        """
+        Returns: (kind, level) for every buy level at or above ``low`` and
+        every sell level at or below ``high``, i.e. the levels a day's range
+        reached. A bound that is not above 0 matches nothing.
+        """
+        prices = self._prices.get(name, ())
+        kinds = self._kinds.get(name, ())
+        out = []
+        if low > 0:
+            out.extend((kinds[i], prices[i]) for i in range(bisect_left(prices, low), len(prices)) if kinds[i] in BUY_KINDS)
+        if high > 0:
+            out.extend((kinds[i], prices[i]) for i in range(bisect_right(prices, high)) if kinds[i] in SELL_KINDS)
+        return out
+
+    def __len__(self):
+        return len(self._prices)
+
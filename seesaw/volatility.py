@@ -0,0 +1,83 @@
+"""
+Automatic V score from cached daily bars (manual 3.3, Method B).
+
+V comes from the annualized volatility of the last VOL_WINDOW_DAYS daily
+simple returns (close / previous close - 1, the manual's pct_change). The
+closes of every stale ticker are stacked right-aligned into one (tickers,
+days) matrix and the rolling volatility is taken over it in one NumPy
+pass. Results are cached in the bar store with the date of the last bar
+they used, so a ticker is only recomputed once a newer bar has been
+cached.
+
+The auto value is a proposal: it is shown next to the manual ``v_score``
+and never written into the record.
+"""
+
+from math import sqrt
+
+import numpy as np
+
+from seesaw import formulas
+
+TRADING_DAYS = 252
+
+
+def rolling_volatility(closes, window=None):
+    """
+    Annualized rolling volatility (%) of daily simple returns.
+
+    closes: (tickers, days) array, NaN where a ticker has no bar.
+    Returns: (tickers, days - window) array; entry [i, k] uses the
+    ``window`` returns ending at close k + window. NaN where any close in
+    the window is missing.
+    """
+    if window is None:
+        window = formulas.VOL_WINDOW_DAYS
+    closes = np.asarray(closes, dtype=float)
+    closes = np.where(closes > 0, closes, np.nan)
+    rets = closes[:, 1:] / closes[:, :-1] - 1
+    if rets.shape[1] < window:
+        return np.empty((closes.shape[0], 0))
+    windows = np.lib.stride_tricks.sliding_window_view(rets, window, axis=1)
+    return windows.std(axis=2, ddof=1) * sqrt(TRADING_DAYS) * 100.0
+
+
+def stack_closes(histories, days):
+    """
+    Right-align close histories into one matrix.
+
+    histories: list of bar lists [(date, open, high, low, close), ...].
+    Returns: (len(histories), days) array padded with NaN on the left.
+    """
+    out = np.full((len(histories), days), np.nan)
+    for i, bars in enumerate(histories):
+        tail = [bar[4] for bar in bars[-days:]]
+        if tail:
+            out[i, days - len(tail):] = tail
+    return out
+
+
+def update_vscores(store, tickers=None):
+    """
+    Bring the V score cache up to date for ``tickers`` (default: all cached).
+
+    Only tickers whose last cached bar is newer than their cached score are
+    recomputed. Tickers without VOL_WINDOW_DAYS + 1 closes get no score.
+
+    Returns: {ticker: (bar_date, vol_pct, v_score)} for every ticker with a score.
+    """
+    last = store.last_dates()
+    cached = store.vscores()
+    if tickers is None:
+        tickers = list(last)
+    stale = [t for t in tickers if t in last and (t not in cached or cached[t][0] != last[t])]
+    if stale:
+        days = formulas.VOL_WINDOW_DAYS + 1
+        vols = rolling_volatility(stack_closes([store.recent(t, days) for t in stale], days))
+        rows = []
+        for ticker, vol in zip(stale, vols[:, -1] if vols.shape[1] else [np.nan] * len(stale)):
+            if np.isfinite(vol):
+                rows.append((ticker, last[ticker], float(vol), formulas.v_score_from_vol(float(vol))))
+        store.put_vscores(rows)
+        cached.update((row[0], row[1:]) for row in rows)
+    return {t: cached[t] for t in tickers if t in cached}
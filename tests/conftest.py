@@ -0,0 +1,78 @@
+import pytest
+
+from seesaw import formulas, portfolio
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    """An empty portfolio store loaded as the active one (seeded with DEFAULT_NAMES)."""
+    path = str(tmp_path / "seesaw.db")
+    n, fx = formulas.PORTFOLIO_N, portfolio.GLOBAL_FX_RATE
+    portfolio.load_data(path)
+    yield path
+    portfolio.store.close()
+    portfolio.store = None
+    portfolio.ledger = None
+    portfolio.fx_reference.clear()
+    portfolio.stock_data.clear()
+    portfolio.stock_order.clear()
+    formulas.PORTFOLIO_N = n
+    portfolio.set_fx_rate(fx)
+    portfolio.set_max_volume(0.0)
+
+
+@pytest.fixture
+def two_active(store_path):
+    """Two flat KR stocks, A and B, both with an ACTIVE LOAD in an empty portfolio."""
+    for name in list(portfolio.stock_order):
+        portfolio.remove_stock(name)
+    portfolio.set_portfolio_n(4)
+    portfolio.set_max_volume(10_000_000.0)
+    for name in ("A", "B"):
+        rec = portfolio.add_stock(name, "KR")
+        rec.update(current_price=91.0, high_5d=100.0, high_10d=100.0, low_today=90.0, high_today=92.0)
+        rec["max_volume"] = portfolio.GLOBAL_MAX_VOLUME_KRW
+    portfolio.save_records()
+    return ("A", "B")
+
+
+def random_record(rng, market):
+    rec = portfolio.default_record(market)
+    scale = 1.0 if market == "US" else 1000.0
+    if rng.random() < 0.6:
+        rec["avg_cost"] = rng.uniform(20, 200) * scale
+        rec["num_shares"] = float(rng.randint(1, 400))
+    rec.update(
+        current_price=rng.choice(["", rng.uniform(40, 200) * scale]),
+        high_5d=rng.choice(["", rng.uniform(50, 200) * scale]),
+        high_10d=rng.choice(["", 0.0, rng.uniform(50, 200) * scale]),
+        low_today=rng.choice(["", 0.0, rng.uniform(40, 200) * scale]),
+        high_today=rng.choice(["", rng.uniform(40, 200) * scale]),
+        g_score=rng.choice(["", 0.0, 2.5, rng.uniform(0, 5)]),
+        l_score=rng.choice(["", 0.0, rng.uniform(0, 5)]),
+        v_score=rng.choice(["", 0.0, 1.0, rng.uniform(0, 2)]),
+        manual_sell_mode=rng.choice([0, 1]),
+        manual_sell_step=rng.choice(["", -1.0, 2.5]),
+        manual_load_mode=rng.choice([0, 1]),
+        manual_load_drop=rng.choice(["", 0.0, 2.0, 5.0, 9.0]),
+        manual_rescue_mode=rng.choice(["AUTO", "AUTO"] + list(formulas.RESCUE_PRESETS) + ["bogus"]),
+    )
+    return rec
+
+
+@pytest.fixture
+def random_portfolio(store_path):
+    """Returns: fill(rng, count), replacing the active portfolio's stocks with ``count`` random ones."""
+
+    def fill(rng, count):
+        for name in list(portfolio.stock_order):
+            portfolio.remove_stock(name)
+        portfolio.set_fx_rate(rng.choice([1300.0, 1450.5]))
+        for i in range(count):
+            market = rng.choice(["KR", "US"])
+            portfolio.add_stock(f"S{i}", market).update(random_record(rng, market))
+        portfolio.set_max_volume(rng.choice([0.0, 5e7, 1e8, 1e9]))
+        portfolio.deployment.rebuild(portfolio.stock_data, portfolio.GLOBAL_FX_RATE)
+        return list(portfolio.stock_order)
+
+    return fill
@@ -0,0 +1,68 @@
+import random
+
+from seesaw import portfolio
+from seesaw.alerts import AlertMonitor, check_stocks
+from seesaw.state import compute_state, parse_record
+
+
+def expected_kinds(name):
+    # The alert conditions straight from compute_state (manual v1.4 section 6).
+    rec = portfolio.stock_data[name]
+    parsed = parse_record(rec)
+    data = compute_state(parsed, rec, name)
+    low = data["low_today"] if data["low_today"] > 0 else data["current_price"]
+    high = data["high_today"] if data["high_today"] > 0 else data["current_price"]
+    kinds = set()
+    if data["load_status"] == "ACTIVE":
+        kinds.add("LOAD")
+    if parsed["units_held"] > 0 and data["rescue_trigger"] > 0 and 0 < low <= data["rescue_trigger"]:
+        kinds.add("RESCUE")
+    if parsed["avg_cost"] > 0 and high > 0:
+        kinds.update(k for k, t in zip(("T1", "T2"), data["sell_targets"]) if t > 0 and high >= t)
+    return kinds
+
+
+def test_indexed_levels_match_compute_state(random_portfolio):
+    rng = random.Random(7)
+    names = random_portfolio(rng, 20)
+    # Leave room for new units so LOAD can go active.
+    portfolio.set_max_volume(5e9)
+    monitor = AlertMonitor()
+    for _ in range(300):
+        name = rng.choice(names)
+        rec = portfolio.stock_data[name]
+        if rng.random() < 0.2:
+            rec["g_score"] = rng.uniform(0, 5)
+        # Alerts are only re-evaluated on a price move.
+        base = float(rec["avg_cost"] or rec["high_10d"] or 100.0)
+        rec["low_today"] = base * rng.uniform(0.85, 1.05)
+        rec["high_today"] = base * rng.uniform(0.95, 1.15)
+        check_stocks(monitor, [name])
+        assert monitor._active[name] == expected_kinds(name)
+
+
+def test_price_ticks_reuse_the_levels_and_alert_once(two_active):
+    monitor = AlertMonitor()
+    alerts = check_stocks(monitor, ["A", "B"])
+    assert [(a.name, a.kind) for a in alerts] == [("A", "LOAD"), ("B", "LOAD")]
+    assert monitor.recomputed == 2
+
+    portfolio.stock_data["A"]["low_today"] = 89.0
+    assert check_stocks(monitor, ["A", "B"]) == []
+    assert monitor.recomputed == 0
+
+    portfolio.stock_data["A"]["low_today"] = 99.0
+    check_stocks(monitor, ["A"])
+    portfolio.stock_data["A"]["low_today"] = 90.0
+    assert [a.kind for a in check_stocks(monitor, ["A"])] == ["LOAD"]
+    assert monitor.recomputed == 0
+
+
+def test_portfolio_changes_recompute_the_levels(two_active):
+    monitor = AlertMonitor()
+    check_stocks(monitor, ["A", "B"])
+    portfolio.record_fill("A", "BUY", 90.0, 8_750_000 / 90.0, "LOAD")
+    portfolio.stock_data["B"]["low_today"] = 89.0
+    assert check_stocks(monitor, ["B"]) == []
+    assert monitor.recomputed == 1
+    assert monitor.index.levels("B") == {}
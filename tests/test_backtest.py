@@ -0,0 +1,62 @@
+import random
+from itertools import groupby
+
+import numpy as np
+import pytest
+
+from seesaw.backtest import run_backtest
+
+# One KR stock, N=4 on 4M KRW (1M per unit), G=L=0 and V=1: LOAD 6.5% under
+# the prior 10-day high, sell tiers 1% and 2% above the average cost.
+DAYS = [
+    ("2024-01-02", 100.0, 100.0, 99.0, 100.0),  # no prior high yet
+    ("2024-01-03", 100.0, 100.0, 80.0, 85.0),  # LOAD at 93.5; the low also clears the RESCUE line
+    ("2024-01-04", 85.0, 86.0, 70.0, 80.0),  # one RESCUE at the open, however far the low goes
+    ("2024-01-05", 95.0, 150.0, 60.0, 90.0),  # T1 and T2 at the open, then a fresh LOAD
+    ("2024-01-06", 94.0, 95.0, 85.0, 90.0),  # T1 only, then RESCUE on the smaller position
+]
+
+
+def bars_from(days):
+    dates, o, h, l, c = zip(*days)
+    return {"date": np.array(dates), "open": np.array(o), "high": np.array(h), "low": np.array(l), "close": np.array(c)}
+
+
+def test_sells_come_first_and_one_buy_per_day():
+    result = run_backtest({"T": bars_from(DAYS)}, {}, N=4, max_volume_krw=4_000_000.0)
+    trades = [(t["date"], t["side"], t["tag"], t["price"], t["shares"]) for t in result["trades"]]
+    assert trades == [
+        ("2024-01-03", "BUY", "LOAD", 93.5, 10695),
+        ("2024-01-04", "BUY", "RESCUE", 85.0, 5882),
+        ("2024-01-05", "SELL", "T1", 95.0, 8288),
+        ("2024-01-05", "SELL", "T2", 95.0, 8289),
+        ("2024-01-05", "BUY", "LOAD", 93.5, 10695),
+        ("2024-01-06", "SELL", "T1", pytest.approx(94.435), 5347),
+        ("2024-01-06", "BUY", "RESCUE", pytest.approx(89.76), 2785),
+    ]
+    assert result["stats"]["campaigns"] == 1
+
+
+def random_walk(rng, days):
+    rows, close = [], 100.0
+    for i in range(days):
+        open_ = close * rng.uniform(0.97, 1.03)
+        close = open_ * rng.uniform(0.9, 1.1)
+        high = max(open_, close) * rng.uniform(1.0, 1.06)
+        low = min(open_, close) * rng.uniform(0.9, 1.0)
+        rows.append((f"2024-{1 + i // 28:02d}-{1 + i % 28:02d}", open_, high, low, close))
+    return rows
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_daily_order_holds_on_random_bars(seed):
+    rng = random.Random(seed)
+    bars = {t: bars_from(random_walk(rng, 120)) for t in ("A", "B", "C")}
+    result = run_backtest(bars, {}, N=6, max_volume_krw=6_000_000.0)
+    trades = result["trades"]
+    assert any(t["side"] == "SELL" for t in trades) and any(t["tag"] == "RESCUE" for t in trades)
+    for _, day in groupby(trades, key=lambda t: (t["date"], t["ticker"])):
+        sides = [t["side"] for t in day]
+        assert sides == sorted(sides, key=lambda side: side == "BUY")
+        assert sides.count("BUY") <= 1
+    assert result["units"].max() <= 6.0 + 1e-9
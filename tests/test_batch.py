@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from seesaw import formulas, portfolio
+from seesaw.batch import batch_states
+from seesaw.state import compute_state, parse_record
+
+
+def assert_same(batch_value, scalar_value, key):
+    if isinstance(scalar_value, str):
+        assert batch_value == scalar_value, key
+    elif isinstance(scalar_value, dict):
+        for sub, value in scalar_value.items():
+            assert_same(batch_value[sub], value, f"{key}.{sub}")
+    elif isinstance(scalar_value, (list, tuple)):
+        for b, s in zip(batch_value, scalar_value):
+            assert_same(b, s, key)
+    else:
+        assert batch_value == pytest.approx(scalar_value, rel=1e-12, abs=1e-9), key
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_batch_states_match_compute_state(random_portfolio, seed):
+    rng = random.Random(seed)
+    formulas.PORTFOLIO_N = rng.choice([1, 4, 10])
+    random_portfolio(rng, rng.randint(1, 12))
+
+    states = batch_states(
+        portfolio.stock_data, portfolio.stock_order, portfolio.GLOBAL_FX_RATE, portfolio.GLOBAL_MAX_VOLUME_KRW
+    )
+    for name, state in zip(portfolio.stock_order, states):
+        rec = portfolio.stock_data[name]
+        parsed = parse_record(rec)
+        scalar = compute_state(parsed, rec, name)
+        for key, value in scalar.items():
+            assert_same(state[key], value, f"{name}.{key}")
+        for key in ("market", "avg_cost", "num_shares", "fx_rate", "g_score", "l_score", "v_score", "units_held"):
+            assert_same(state[key], parsed[key], f"{name}.{key}")
+
+
+def test_blank_v_score_defaults_to_one(store_path):
+    rec = portfolio.stock_data[portfolio.stock_order[0]]
+    rec["v_score"] = ""
+    (state,) = batch_states(portfolio.stock_data, portfolio.stock_order[:1], portfolio.GLOBAL_FX_RATE, 0.0)
+    assert state["v_score"] == 1.0
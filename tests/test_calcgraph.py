@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from seesaw import formulas, portfolio
+from seesaw.calcgraph import StateGraphs
+from seesaw.state import compute_state, parse_record
+
+
+def edit(rng, name, rec):
+    kind = rng.randrange(9)
+    if kind == 0:
+        rec["current_price"] = float(rec["current_price"] or 100.0) * rng.uniform(0.9, 1.1)
+    elif kind == 1:
+        rec["g_score"] = round(rng.uniform(0, 5), 1)
+    elif kind == 2:
+        rec["manual_rescue_mode"] = rng.choice(("AUTO", "LIGHT", "HEAVY", "DEFAULT", "bogus"))
+    elif kind == 3:
+        rec["num_shares"] = float(rng.randint(0, 300)) if rng.random() < 0.8 else ""
+        portfolio.deployment.update(name, rec)
+    elif kind == 4:
+        formulas.PORTFOLIO_N = rng.choice((4, 10, 25))
+    elif kind == 5:
+        portfolio.set_fx_rate(rng.uniform(1200, 1500))
+    elif kind == 6:
+        rec.update(manual_sell_mode=rng.randint(0, 1), manual_load_mode=rng.randint(0, 1))
+        rec["manual_load_drop"] = rng.uniform(0, 8)
+    elif kind == 7:
+        rec["low_today"] = rng.choice(("x", rec.get("current_price"), 0))
+    else:
+        portfolio.set_max_volume(rng.choice((5e7, 1e8, 1e9)))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_state_graphs_match_compute_state_through_edits(random_portfolio, seed):
+    rng = random.Random(seed)
+    names = random_portfolio(rng, 15)
+    graphs = StateGraphs()
+    for _ in range(400):
+        name = rng.choice(names)
+        rec = portfolio.stock_data[name]
+        edit(rng, name, rec)
+        parsed = parse_record(rec)
+        assert graphs.compute(parsed, rec, name) == compute_state(parsed, rec, name)
+
+
+def test_price_tick_leaves_the_sell_side_alone(two_active):
+    graphs = StateGraphs()
+    rec = portfolio.stock_data["A"]
+    graphs.compute(parse_record(rec), rec, "A")
+    before = graphs.graphs["A"].evaluations
+    rec["low_today"] = 99.0
+    state = graphs.compute(parse_record(rec), rec, "A")
+    assert state["load_status"] == "Watching"
+    assert graphs.why("A", "load_status") == {"low_today"}
+    # Only the LOAD status reads today's low.
+    assert graphs.graphs["A"].evaluations - before == 1
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from conftest import random_record
+from seesaw.deployment import DeploymentAggregate
+
+
+def brute_force_total(records, fx_rate, exclude=None):
+    total = 0.0
+    for name, rec in records.items():
+        if name == exclude:
+            continue
+        try:
+            cost = float(rec.get("avg_cost") or 0) * float(rec.get("num_shares") or 0)
+        except (TypeError, ValueError):
+            cost = 0.0
+        total += cost * fx_rate if rec.get("market") == "US" else cost
+    return total
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_running_total_matches_a_full_sum(seed):
+    rng = random.Random(seed)
+    fx_rate = 1300.0
+    records = {f"S{i}": random_record(rng, rng.choice(["KR", "US"])) for i in range(rng.randint(0, 6))}
+    agg = DeploymentAggregate(fx_rate)
+    agg.rebuild(records)
+
+    for _ in range(300):
+        op = rng.random()
+        if op < 0.5:
+            name = f"S{rng.randint(0, 9)}"
+            records[name] = random_record(rng, rng.choice(["KR", "US"]))
+            if rng.random() < 0.1:
+                records[name]["num_shares"] = "n/a"
+            agg.update(name, records[name])
+        elif op < 0.75 and records:
+            name = rng.choice(sorted(records))
+            del records[name]
+            agg.remove(name)
+        elif op < 0.95:
+            fx_rate = rng.choice([1250.0, 1300.0, 1385.5, 1450.25])
+            agg.set_fx(fx_rate)
+        else:
+            agg.rebuild(records, fx_rate)
+
+        assert len(agg) == len(records)
+        assert agg.total_krw() == pytest.approx(brute_force_total(records, fx_rate), rel=1e-9, abs=1e-6)
+        for name in list(records) + ["missing"]:
+            expected = brute_force_total(records, fx_rate, exclude=name)
+            assert agg.total_excluding(name) == pytest.approx(expected, rel=1e-9, abs=1e-6), name
+
+
+def test_emptied_book_resets_to_zero():
+    agg = DeploymentAggregate(1300.0)
+    agg.update("A", {"market": "KR", "avg_cost": 0.1, "num_shares": 3})
+    agg.update("B", {"market": "US", "avg_cost": 0.7, "num_shares": 3})
+    agg.remove("A")
+    agg.remove("B")
+    assert agg.division_totals() == {"KR": 0.0, "US": 0.0, "US_USD": 0.0}
@@ -0,0 +1,75 @@
+import pytest
+
+from seesaw.fxref import GREEN, RED, YELLOW, FxReference, traffic_light
+from seesaw.ledger import Position
+
+
+def position(shares, avg_cost, fx):
+    pos = Position()
+    pos.apply("BUY", avg_cost, shares, fx)
+    return pos
+
+
+def test_manual_worked_example():
+    # Manual 7.2: $10,000 of NVIDIA at 1,450 and $6,000 of Alphabet at 1,480.
+    ref = FxReference()
+    ref.set_position("NVIDIA", position(50, 200.0, 1450.0))
+    ref.set_position("Alphabet", position(30, 200.0, 1480.0))
+    assert (ref.usd_cost, ref.krw_cost) == (16_000.0, 23_380_000.0)
+    assert ref.rate(1400.0) == 1461.25
+
+
+def test_lots_are_replaced_and_removed():
+    ref = FxReference()
+    ref.set_lot("NVIDIA", 10_000.0, 14_500_000.0)
+    ref.set_lot("Alphabet", 6_000.0, 8_880_000.0)
+    ref.set_lot("NVIDIA", 5_000.0, 7_250_000.0)
+    assert ref.rate() == pytest.approx(16_130_000.0 / 11_000.0)
+    ref.remove("Alphabet")
+    assert ref.rate() == 1450.0
+    assert len(ref) == 1
+
+
+def test_rate_without_lots_falls_back_to_spot():
+    ref = FxReference()
+    assert ref.rate(1380.0) == 1380.0
+    assert ref.rate() is None
+    ref.set_lot("NVIDIA", 10_000.0, 14_500_000.0)
+    ref.remove("NVIDIA")
+    assert ref.rate(1380.0) == 1380.0
+    assert (ref.usd_cost, ref.krw_cost) == (0.0, 0.0)
+
+
+@pytest.mark.parametrize(
+    "fx, repatriate, reinforce",
+    [
+        # Manual 7.3 examples at R_ref 1,460.
+        (1490.0, GREEN, RED),
+        (1455.0, YELLOW, YELLOW),
+        (1425.0, RED, GREEN),
+    ],
+)
+def test_manual_traffic_light_examples(fx, repatriate, reinforce):
+    light = traffic_light(fx, 1460.0)
+    assert (light["repatriate"], light["reinforce"]) == (repatriate, reinforce)
+
+
+@pytest.mark.parametrize(
+    "fx, repatriate, reinforce",
+    [
+        (1020.01, GREEN, RED),
+        (1020.0, YELLOW, YELLOW),
+        (1000.0, YELLOW, YELLOW),
+        (980.0, YELLOW, YELLOW),
+        (979.99, RED, GREEN),
+    ],
+)
+def test_band_edges_are_yellow(fx, repatriate, reinforce):
+    light = traffic_light(fx, 1000.0)
+    assert (light["repatriate"], light["reinforce"]) == (repatriate, reinforce)
+    assert light["deviation_pct"] == pytest.approx((fx / 1000.0 - 1) * 100)
+
+
+def test_traffic_light_needs_both_rates():
+    assert traffic_light(0.0, 1460.0) is None
+    assert traffic_light(1460.0, None) is None
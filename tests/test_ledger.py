@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+from seesaw import ledger as ledger_mod
+from seesaw.ledger import Ledger, Position, validate_fill
+from seesaw.recordstore import RecordStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RecordStore(str(tmp_path / "ledger.db"))
+    yield store
+    store.close()
+
+
+def test_partial_sell_keeps_the_average_cost(store):
+    book = Ledger(store)
+    book.record("A", "BUY", 100.0, 10, tag="LOAD", date="2024-01-02")
+    book.record("A", "BUY", 110.0, 10, tag="RESCUE", date="2024-01-03")
+    pos = book.position("A")
+    assert (pos.shares, pos.avg_cost, pos.q) == (20.0, 105.0, 20.0)
+
+    fill = book.record("A", "SELL", 120.0, 5, tag="T1", date="2024-01-04")
+    assert fill == (3, "A", "2024-01-04", "SELL", 120.0, 5, 1.0, "T1")
+    assert (pos.shares, pos.avg_cost, pos.q) == (15.0, 105.0, 20.0)
+    assert pos.realized_pnl == pytest.approx(75.0)
+
+    book.record("A", "SELL", 100.0, 15, tag="T2")
+    assert (pos.shares, pos.avg_cost, pos.q) == (0.0, 0.0, 0.0)
+    assert pos.realized_pnl == pytest.approx(0.0)
+
+
+def test_krw_cost_follows_the_fx_of_each_buy(store):
+    book = Ledger(store)
+    book.record("N", "BUY", 100.0, 1, fx=1300.0)
+    book.record("N", "BUY", 100.0, 1, fx=1400.0)
+    book.record("N", "SELL", 100.0, 1, fx=1500.0, tag="T1")
+    pos = book.position("N")
+    assert (pos.avg_cost, pos.avg_cost_krw) == (100.0, 135_000.0)
+    assert (pos.realized_pnl, pos.realized_pnl_krw) == (0.0, 15_000.0)
+
+
+def test_oversized_sell_is_rejected_and_not_stored(store):
+    book = Ledger(store)
+    book.record("A", "BUY", 100.0, 10)
+    with pytest.raises(ValueError, match="cannot sell 11 shares of A, only 10 held"):
+        book.record("A", "SELL", 100.0, 11, tag="T2")
+    with pytest.raises(ValueError, match="only 0 held"):
+        book.record("B", "SELL", 100.0, 1, tag="T1")
+    assert len(store.fills()) == 1
+    assert book.position("A").shares == 10.0
+
+
+@pytest.mark.parametrize(
+    "fill, message",
+    [
+        (("HOLD", 100.0, 1, 1.0, "LOAD"), "side must be one of"),
+        (("BUY", 100.0, 1, 1.0, "T1"), "a buy must be tagged LOAD or RESCUE"),
+        (("SELL", 100.0, 1, 1.0, "LOAD"), "a sell must be tagged T1 or T2"),
+        (("BUY", 0.0, 1, 1.0, "LOAD"), "price and quantity"),
+        (("BUY", 100.0, -1, 1.0, "LOAD"), "price and quantity"),
+        (("BUY", 100.0, 1, 0.0, "LOAD"), "FX must be above 0"),
+    ],
+)
+def test_validate_fill_rejects(fill, message):
+    with pytest.raises(ValueError, match=message):
+        validate_fill(*fill)
+
+
+def random_fills(book, rng, count):
+    for i in range(count):
+        name = rng.choice("ABC")
+        pos = book.position(name)
+        if pos and pos.shares and rng.random() < 0.4:
+            qty = pos.shares if rng.random() < 0.3 else rng.randint(1, max(1, int(pos.shares) // 2))
+            book.record(name, "SELL", rng.uniform(50, 150), qty, fx=rng.uniform(1200, 1500), tag="T1", date=f"d{i}")
+        else:
+            book.record(name, "BUY", rng.uniform(50, 150), rng.randint(1, 50), fx=rng.uniform(1200, 1500), date=f"d{i}")
+
+
+def full_replay(store):
+    positions = {}
+    for _, name, fill_date, side, price, qty, fx, _ in store.fills():
+        pos = positions.setdefault(name, Position())
+        pos.apply(side, price, qty, fx)
+        pos.last_date = fill_date
+    return {name: pos.to_json() for name, pos in positions.items()}
+
+
+def test_snapshot_plus_replay_matches_a_full_replay(store):
+    book = Ledger(store)
+    random_fills(book, random.Random(7), ledger_mod.SNAPSHOT_EVERY * 2 + 57)
+    assert store.ledger_snapshot()[0] == ledger_mod.SNAPSHOT_EVERY * 2
+
+    reloaded = Ledger(store)
+    reloaded.load()
+    assert reloaded.replayed == 57
+    assert reloaded.seq == book.seq
+    assert {name: pos.to_json() for name, pos in reloaded.positions.items()} == full_replay(store)
+    assert {name: pos.to_json() for name, pos in book.positions.items()} == full_replay(store)
+
+
+def test_remove_drops_the_position_and_its_fills(store):
+    book = Ledger(store)
+    random_fills(book, random.Random(3), ledger_mod.SNAPSHOT_EVERY + 10)
+    book.remove("A")
+    store.delete("A")
+    assert book.position("A") is None
+    assert store.fills(name="A") == []
+
+    reloaded = Ledger(store)
+    reloaded.load()
+    assert reloaded.position("A") is None
+    assert set(reloaded.positions) == {"B", "C"}
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from seesaw import market
+from seesaw.market import FX_TICKER, StubProvider, fetch_market_snapshot
+
+TICKERS = {"Alpha": "AAA", "Beta": "BBB", "Gamma": "CCC"}
+
+
+def bars(close):
+    return [(f"2024-01-{day:02d}", close, close + 1, close - 1, close) for day in range(1, 13)]
+
+
+@pytest.fixture(autouse=True)
+def ticker_map(monkeypatch):
+    monkeypatch.setattr(market, "TICKER_MAP", dict(TICKERS))
+
+
+def provider(**kwargs):
+    canned = {ticker: bars(100.0 + i) for i, ticker in enumerate(TICKERS.values())}
+    canned[FX_TICKER] = bars(1350.0)
+    return StubProvider(canned, **kwargs)
+
+
+def test_partial_failure_keeps_the_other_tickers():
+    stub = provider(errors={"BBB": ConnectionError("reset by peer")})
+    prices, fx_rate, errors = fetch_market_snapshot(list(TICKERS) + ["Unmapped"], stub)
+    assert sorted(prices) == ["Alpha", "Gamma"]
+    assert prices["Gamma"]["current"] == 102.0
+    assert fx_rate == 1350.0
+    assert errors == {"Beta": "reset by peer", "Unmapped": "no ticker mapping"}
+
+
+def test_empty_history_is_an_error():
+    stub = provider()
+    stub.bars["CCC"] = []
+    prices, _, errors = fetch_market_snapshot(list(TICKERS), stub)
+    assert errors == {"Gamma": "no bars returned"}
+    assert sorted(prices) == ["Alpha", "Beta"]
+
+
+def test_slow_ticker_is_reported_as_timed_out():
+    stub = provider(delays={"AAA": 1.0})
+    started = time.monotonic()
+    prices, fx_rate, errors = fetch_market_snapshot(list(TICKERS), stub, timeout=0.2)
+    assert time.monotonic() - started < 0.8
+    assert errors == {"Alpha": "timed out after 0.2s"}
+    assert sorted(prices) == ["Beta", "Gamma"]
+    assert fx_rate == 1350.0
+
+
+def test_timeout_runs_from_when_each_ticker_starts():
+    # One worker: the tickers queue behind each other for longer than the
+    # timeout in total, but each finishes well within its own.
+    stub = provider(delay=0.1)
+    prices, fx_rate, errors = fetch_market_snapshot(list(TICKERS), stub, timeout=0.3, max_workers=1)
+    assert errors == {}
+    assert sorted(prices) == sorted(TICKERS)
+    assert fx_rate == 1350.0
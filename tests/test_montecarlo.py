@@ -0,0 +1,56 @@
+import random
+import time
+
+import numpy as np
+
+from seesaw import formulas, portfolio
+from seesaw.batch import auto_gear_batch
+from seesaw.montecarlo import SimulationJob, campaign_inputs
+
+
+def drain(job, timeout=30.0):
+    events = []
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        events.extend(job.poll())
+        time.sleep(0.01)
+    assert job.finished
+    return events
+
+
+def test_job_reports_progress_then_the_result(two_active):
+    job = SimulationJob(campaign_inputs("A"), 300, 20, "gbm", chunk=100, seed=1).start()
+    events = drain(job)
+    assert [value for kind, value in events if kind == "progress"] == [(100, 300), (200, 300), (300, 300)]
+    kind, result = events[-1]
+    assert kind == "result"
+    assert len(result["final_pnl_krw"]) == 300
+
+
+def test_cancel_stops_without_a_result(two_active):
+    job = SimulationJob(campaign_inputs("A"), 10_000, 20, "gbm", chunk=100, seed=1)
+    job.cancel()
+    events = drain(job.start())
+    assert [kind for kind, _ in events] == ["progress"]
+    assert job.cancelled
+
+
+def test_errors_come_back_as_messages(two_active):
+    events = drain(SimulationJob(campaign_inputs("A"), 10, 5, "nope").start())
+    assert events == [("error", "unknown method 'nope'; expected one of gbm, bootstrap")]
+
+
+def test_unknown_rescue_mode_runs_as_default(two_active):
+    portfolio.stock_data["A"]["manual_rescue_mode"] = "DEFALT"
+    assert campaign_inputs("A")["rescue_override"] == formulas.RESCUE_PRESETS["DEFAULT"]
+    portfolio.stock_data["A"]["manual_rescue_mode"] = "AUTO"
+    assert campaign_inputs("A")["rescue_override"] is None
+
+
+def test_sell_step_matches_compute_auto_gear():
+    rng = random.Random(3)
+    for _ in range(200):
+        g, l, f = rng.uniform(0, 5), rng.uniform(0, 5), rng.choice([0.0, 0.4, rng.uniform(0, 1.2)])
+        gear, penalty, base_step = auto_gear_batch(formulas.compute_trend(g, l), np.array([f]))
+        expected = formulas.compute_auto_gear(g, l, f)
+        assert (gear[0], penalty[0], base_step[0]) == (expected["gear"], expected["penalty"], expected["base_step"])
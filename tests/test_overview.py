@@ -0,0 +1,32 @@
+import pytest
+
+from seesaw import portfolio
+from seesaw.overview import OverviewCache, overview_row
+
+
+def test_context_change_rebuilds_rows_from_the_batch(two_active):
+    cache = OverviewCache()
+    assert cache.refresh() == ["A", "B"]
+    assert cache.recomputed == 2
+
+    portfolio.record_fill("A", "BUY", 90.0, 8_750_000 / 90.0, "LOAD")
+    cache.invalidate(["A"])
+    changed = cache.refresh()
+
+    assert changed == ["A", "B"]
+    assert cache.rows["A"]["load_status"] == "Held"
+    assert cache.rows["B"]["load_status"] == "Blocked (capacity<1u)"
+    for name in two_active:
+        assert cache.rows[name] == pytest.approx(overview_row(name))
+
+
+def test_refresh_only_recomputes_dirty_rows(two_active):
+    cache = OverviewCache()
+    cache.refresh()
+    portfolio.stock_data["B"]["low_today"] = 99.0
+    assert cache.refresh() == []
+    assert cache.recomputed == 0
+    cache.invalidate(["B"])
+    assert cache.refresh() == ["B"]
+    assert cache.recomputed == 1
+    assert cache.rows["B"]["load_status"] == "Watching"
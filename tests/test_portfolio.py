@@ -0,0 +1,74 @@
+import csv
+
+from seesaw import portfolio
+
+LEGACY_ROWS = [
+    {
+        "name": "Samsung",
+        "avg_cost": "71000",
+        "num_shares": "12",
+        "max_volume": "50000000",
+        "g_score": "3.5",
+        "l_score": "2",
+        "market": "KR",
+        "fx_rate": "1",
+        "buy_model": "Heavy (-6%,0.7)",
+        "manual_mode": "1",
+        "manual_gear": "gear2",
+    },
+    {
+        "name": "NVIDIA",
+        "avg_cost": "120.5",
+        "num_shares": "3",
+        "max_volume": "50000000",
+        "g_score": "4",
+        "l_score": "",
+        "market": "us",
+        "fx_rate": "1385.5",
+        "buy_model": "Agile (-5%,0.6)",
+        "manual_mode": "0",
+        "manual_gear": "",
+    },
+]
+
+
+def write_legacy_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_legacy_csv_is_migrated_once(store_path, tmp_path):
+    csv_path = str(tmp_path / "data.csv")
+    db_path = str(tmp_path / "migrated.db")
+    write_legacy_csv(csv_path, LEGACY_ROWS)
+
+    portfolio.load_data(db_path, legacy_csv=csv_path)
+    assert portfolio.stock_order == ["Samsung", "NVIDIA"]
+    assert portfolio.load_errors == []
+    samsung, nvidia = portfolio.stock_data["Samsung"], portfolio.stock_data["NVIDIA"]
+    assert (samsung["avg_cost"], samsung["num_shares"], samsung["g_score"], samsung["l_score"]) == (71000.0, 12.0, 3.5, 2.0)
+    assert (samsung["manual_mode"], samsung["manual_gear"], samsung["buy_model"]) == (1, 2.0, "Heavy (-6%,0.7)")
+    assert (nvidia["market"], nvidia["avg_cost"], nvidia["l_score"], nvidia["manual_gear"]) == ("US", 120.5, 0.0, 0.0)
+    assert portfolio.GLOBAL_FX_RATE == 1385.5
+    assert portfolio.GLOBAL_MAX_VOLUME_KRW == 50_000_000.0
+
+    # Edits go to the store; the CSV is left as it was and is never read again.
+    samsung["num_shares"] = 20.0
+    portfolio.remove_stock("NVIDIA")
+    portfolio.save_records()
+    write_legacy_csv(csv_path, LEGACY_ROWS + [dict(LEGACY_ROWS[0], name="Extra")])
+
+    portfolio.load_data(db_path, legacy_csv=csv_path)
+    assert portfolio.stock_order == ["Samsung"]
+    assert portfolio.stock_data["Samsung"]["num_shares"] == 20.0
+    assert portfolio.stock_data["Samsung"]["manual_gear"] == 2.0
+
+
+def test_missing_csv_does_not_mark_the_store(store_path, tmp_path):
+    assert portfolio.store.get_meta("csv_migrated") is None
+    csv_path = str(tmp_path / "data.csv")
+    write_legacy_csv(csv_path, LEGACY_ROWS[:1])
+    portfolio.load_data(store_path, legacy_csv=csv_path)
+    assert "Samsung" in portfolio.stock_order
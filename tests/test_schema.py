@@ -0,0 +1,77 @@
+import pytest
+
+from seesaw import schema
+from seesaw.schema import KEPT, RESET, SKIPPED, FieldError, format_error, read_table
+
+HEADER = ["name", "avg_cost", "g_score", "manual_sell_mode", "market", "manual_rescue_mode", "manual_gear"]
+
+
+def test_clean_rows_convert_and_fill_defaults():
+    records, errors = read_table(HEADER, [("A", "100.5", "3", "1", "us", "light", "1.5")])
+    assert errors == []
+    [(index, name, rec)] = records
+    assert (index, name) == (0, "A")
+    assert rec["avg_cost"] == 100.5
+    assert rec["g_score"] == 3.0
+    assert rec["manual_sell_mode"] == 1
+    assert rec["market"] == "US"
+    assert rec["manual_rescue_mode"] == "LIGHT"
+    assert rec["manual_gear"] == 1.5
+    # Columns missing from the header take their defaults.
+    assert (rec["v_score"], rec["l_score"], rec["last_update"]) == (1.0, 0.0, "")
+    assert set(rec) == {f.name for f in schema.FIELDS}
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("gear2", 2.0), ("GEAR3", 3.0), ("gear 4", 4.0), ("2.5", 2.5), (2, 2.0), ("", 0.0), (None, 0.0)],
+)
+def test_gear_column_reads_legacy_gear_names(value, expected):
+    records, errors = read_table(["name", "manual_gear"], [("A", value)])
+    assert errors == []
+    assert records[0][2]["manual_gear"] == expected
+
+
+def test_bad_gear_is_reset_and_reported():
+    records, errors = read_table(["name", "manual_gear"], [("A", "gear"), ("B", "fast")])
+    assert [rec["manual_gear"] for _, _, rec in records] == [0.0, 0.0]
+    assert errors == [
+        FieldError(1, "manual_gear", "gear", "not a number or gearN", RESET),
+        FieldError(2, "manual_gear", "fast", "not a number or gearN", RESET),
+    ]
+
+
+def test_errors_name_their_row_and_field():
+    rows = [
+        ("A", "100", "3", "1", "KR", "AUTO", ""),
+        ("B", "abc", "9", "yes", "JP", "WILD", ""),
+        ("", "", "", "", "", "", ""),
+        ("", "50", "", "", "", "", ""),
+        ("C", "-5", "2", "0", "US", "", "gear1"),
+    ]
+    records, errors = read_table(HEADER, rows)
+    assert [(i, name) for i, name, _ in records] == [(0, "A"), (1, "B"), (4, "C")]
+    assert errors == [
+        FieldError(2, "avg_cost", "abc", "not a number", RESET),
+        FieldError(2, "g_score", "9", "out of range 0.0..5.0", KEPT),
+        FieldError(2, "market", "JP", "expected one of KR, US", RESET),
+        FieldError(2, "manual_sell_mode", "yes", "expected 0 or 1", RESET),
+        FieldError(2, "manual_rescue_mode", "WILD", f"expected one of {', '.join(schema.RESCUE_MODES)}", RESET),
+        FieldError(4, "name", "", "missing name; row skipped", SKIPPED),
+        FieldError(5, "avg_cost", "-5", "out of range 0.0..", KEPT),
+    ]
+    b, c = records[1][2], records[2][2]
+    # Unreadable cells fall back to the default; out-of-range numbers are kept.
+    assert (b["avg_cost"], b["g_score"], b["manual_sell_mode"], b["market"], b["manual_rescue_mode"]) == ("", 9.0, 0, "KR", "AUTO")
+    assert (c["avg_cost"], c["manual_gear"]) == (-5.0, 1.0)
+
+
+def test_short_rows_and_sqlite_nulls_take_defaults():
+    records, errors = read_table(HEADER, [("A", 10.0), ("B", None, None, None, None, None, None)])
+    assert errors == []
+    for _, _, rec in records:
+        assert (rec["g_score"], rec["manual_sell_mode"], rec["market"], rec["manual_rescue_mode"]) == (0.0, 0, "KR", "AUTO")
+
+
+def test_format_error():
+    assert format_error(FieldError(3, "g_score", "9", "out of range 0.0..5.0", KEPT)) == "row 3, g_score: out of range 0.0..5.0 ('9')"
@@ -0,0 +1,29 @@
+import json
+
+from seesaw import portfolio
+from seesaw.sheet import EXIT_DATA_ERROR, main
+
+
+def test_clean_portfolio_exits_zero(two_active, tmp_path, capsys):
+    out = tmp_path / "sheet.json"
+    assert main(["--data", portfolio.store.path, "-o", str(out)]) == 0
+    assert capsys.readouterr().err == ""
+    sheet = json.loads(out.read_text(encoding="utf-8"))
+    assert [row["name"] for row in sheet["stocks"]] == ["A", "B"]
+    assert [row["load_status"] for row in sheet["stocks"]] == ["ACTIVE", "ACTIVE"]
+    assert sheet["portfolio_n"] == 4
+
+
+def test_unreadable_row_exits_non_zero_and_still_writes(two_active, tmp_path, capsys):
+    portfolio.stock_data["B"]["g_score"] = "abc"
+    portfolio.save_records(["B"])
+    out = tmp_path / "sheet.csv"
+    assert main(["--data", portfolio.store.path, "--format", "csv", "-o", str(out)]) == EXIT_DATA_ERROR
+    assert "row 2, g_score: not a number ('abc')" in capsys.readouterr().err
+    lines = out.read_text(encoding="utf-8").splitlines()
+    assert [line.split(",")[0] for line in lines] == ["name", "A", "B"]
+
+
+def test_missing_data_file_exits_non_zero(store_path, tmp_path, capsys):
+    assert main(["--data", str(tmp_path / "nope.db")]) == EXIT_DATA_ERROR
+    assert "not found" in capsys.readouterr().err
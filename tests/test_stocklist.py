@@ -0,0 +1,37 @@
+from seesaw import portfolio
+from seesaw.stocklist import StockList
+
+
+def test_update_recomputes_every_row_when_the_portfolio_fills(two_active):
+    stock_list = StockList()
+    stock_list.update()
+    assert [stock_list.rows[n]["load_status"] for n in two_active] == ["ACTIVE", "ACTIVE"]
+
+    # 3.5 of the 4 units go into A, leaving B less than one unit.
+    portfolio.record_fill("A", "BUY", 90.0, 8_750_000 / 90.0, "LOAD")
+    changed = stock_list.update(["A"])
+
+    assert "B" in changed
+    assert stock_list.rows["A"]["load_status"] == "Held"
+    assert stock_list.rows["B"]["load_status"] == "Blocked (capacity<1u)"
+
+
+def test_update_only_touches_named_rows_while_the_context_holds(two_active):
+    stock_list = StockList()
+    stock_list.update()
+    portfolio.stock_data["B"]["low_today"] = 99.0
+    assert stock_list.update(["A"]) == ["A"]
+    assert stock_list.rows["B"]["load_status"] == "ACTIVE"
+    assert stock_list.update(["B"]) == ["B"]
+    assert stock_list.rows["B"]["load_status"] == "Watching"
+
+
+def test_visible_matches_name_substring_or_whole_market(two_active):
+    portfolio.add_stock("Busan Bank", "KR")
+    portfolio.add_stock("Uber", "US")
+    stock_list = StockList()
+    stock_list.update()
+    assert stock_list.visible("us") == ["Busan Bank", "Uber"]
+    assert stock_list.visible("u") == ["Busan Bank", "Uber"]
+    assert stock_list.visible("kr") == ["A", "B", "Busan Bank"]
+    assert stock_list.visible("b") == ["B", "Busan Bank", "Uber"]
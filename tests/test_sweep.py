@@ -0,0 +1,89 @@
+import csv
+
+import numpy as np
+import pytest
+
+from seesaw.sweep import STAT_COLUMNS, expand_grid, param_key, read_checkpoint, run_sweep
+
+GRID = ("PORTFOLIO_N", "RESCUE_U_SAT")
+FIELDNAMES = list(GRID) + list(STAT_COLUMNS) + ["error"]
+
+
+def write_results(path, rows, tail=""):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
+        f.write(tail)
+
+
+def result(n, u_sat, error=""):
+    row = dict.fromkeys(STAT_COLUMNS, 1.0)
+    row.update(PORTFOLIO_N=n, RESCUE_U_SAT=u_sat, error=error)
+    return row
+
+
+def test_finished_rows_are_done(tmp_path):
+    path = tmp_path / "results.csv"
+    write_results(path, [result(20, 8), result(25, 10)])
+    done = read_checkpoint(str(path), FIELDNAMES)
+    assert done == {param_key({"PORTFOLIO_N": 20, "RESCUE_U_SAT": 8}), param_key({"PORTFOLIO_N": 25, "RESCUE_U_SAT": 10})}
+
+
+def test_truncated_and_unreadable_rows_are_skipped(tmp_path):
+    path = tmp_path / "results.csv"
+    # A kill mid-write leaves the last row without its stats (or half a number).
+    write_results(path, [result(20, 8), result("", 9), result("abc", 9)], tail="25,1")
+    done = read_checkpoint(str(path), FIELDNAMES)
+    assert done == {param_key({"PORTFOLIO_N": 20, "RESCUE_U_SAT": 8})}
+
+
+def test_errored_rows_run_again(tmp_path):
+    path = tmp_path / "results.csv"
+    write_results(path, [result(20, 8, error="ZeroDivisionError"), result(25, 10)])
+    done = read_checkpoint(str(path), FIELDNAMES)
+    assert done == {param_key({"PORTFOLIO_N": 25, "RESCUE_U_SAT": 10})}
+
+
+class Interrupted(Exception):
+    pass
+
+
+def tiny_bars():
+    close = np.array([100.0, 96.0, 93.0, 95.0, 99.0, 104.0, 108.0, 110.0])
+    dates = np.array([f"2024-01-{day:02d}" for day in range(1, 9)])
+    return {"T": {"date": dates, "open": close, "high": close * 1.01, "low": close * 0.99, "close": close}}
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_resumed_sweep_keeps_one_row_per_combination(tmp_path):
+    grid = {"PORTFOLIO_N": [2, 4], "RESCUE_U_SAT": [8, 10]}
+    path = str(tmp_path / "results.csv")
+    bars = tiny_bars()
+
+    def stop(done, total):
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        run_sweep(grid, bars, {}, path, workers=1, chunksize=1, progress=stop)
+    first = read_rows(path)
+    assert len(first) == 1
+
+    # A combination that failed last time, then a row cut short by a kill.
+    failed = next(p for p in expand_grid(grid) if param_key(p) != param_key({k: first[0][k] for k in grid}))
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        csv.DictWriter(f, fieldnames=FIELDNAMES).writerow(dict(failed, error="ZeroDivisionError"))
+        f.write("4,1")
+
+    assert run_sweep(grid, bars, {}, path, workers=1, chunksize=1) == 3
+    rows = read_rows(path)
+    assert sorted(param_key({k: row[k] for k in grid}) for row in rows) == sorted(map(param_key, expand_grid(grid)))
+    assert [row["error"] for row in rows] == [""] * 4
+    assert rows[0] == first[0]
+
+    assert run_sweep(grid, bars, {}, path, workers=1, chunksize=1) == 0
+    assert read_rows(path) == rows
@@ -0,0 +1,46 @@
+import sqlite3
+from math import sqrt
+
+import numpy as np
+
+from seesaw.barstore import BarStore
+from seesaw.volatility import rolling_volatility
+
+
+def test_volatility_uses_simple_returns():
+    rng = np.random.default_rng(3)
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.03, size=(2, 80)), axis=1)
+    vols = rolling_volatility(closes, window=60)
+    assert vols.shape == (2, 20)
+    # The manual's Method B: pct_change().std() * sqrt(252).
+    rets = closes[0, -61:][1:] / closes[0, -61:][:-1] - 1
+    assert vols[0, -1] == np.float64(rets.std(ddof=1) * sqrt(252) * 100).item()
+
+
+def test_missing_closes_give_nan():
+    closes = np.array([[np.nan, 100.0, 101.0, 99.0, 100.0], [100.0, 0.0, 101.0, 99.0, 100.0]])
+    vols = rolling_volatility(closes, window=2)
+    assert np.isnan(vols[:, 0]).all()
+    assert np.isfinite(vols[0, 1]) and np.isnan(vols[1, 1])
+    assert np.isfinite(vols[:, 2]).all()
+
+
+def test_scores_from_an_older_formula_are_dropped(tmp_path):
+    path = str(tmp_path / "bars.db")
+    BarStore(path).close()
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO vscores VALUES ('AAA', '2024-01-02', 30.0, 1.0)")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+    store = BarStore(path)
+    try:
+        assert store.vscores() == {}
+        store.put_vscores([("AAA", "2024-01-02", 31.0, 1.0)])
+    finally:
+        store.close()
+    store = BarStore(path)
+    try:
+        assert store.vscores() == {"AAA": ("2024-01-02", 31.0, 1.0)}
+    finally:
+        store.close()